@@ -1,7 +1,9 @@
 import sqlite3
 from pathlib import Path
 
-from utils.db_schema import DB_SCHEMA
+from fastapi import Request
+
+from utils.db_schema import COLUMN_MIGRATIONS, DB_SCHEMA, REBUILD_COUNTERS_SQL
 
 DATABASE_PATH = Path(__file__).resolve().parent / "app.db"
 
@@ -10,22 +12,110 @@ def init_db() -> None:
     """
     Initialize the database by creating necessary tables.
 
-    At the time of writing, this only creates the 'users' table as an example schema.
+    Also recomputes the trigger-maintained counters (see REBUILD_COUNTERS_SQL), so they
+    are correct for databases created before the counters existed.
+
+    Switches the database to write-ahead logging, which is kept in the file. Readers
+    then see a snapshot without locking the database, so a long read, like a streamed
+    export the client downloads slowly, doesn't make writes fail with "database is
+    locked".
     """
     with sqlite3.connect(DATABASE_PATH, check_same_thread=False) as conn:
+        conn.execute("PRAGMA journal_mode = WAL;")
         conn.execute("PRAGMA foreign_keys = ON;")
+        _add_missing_columns(conn)
         conn.executescript(DB_SCHEMA)
+        # executescript runs its statements in autocommit mode, so wrap the rebuild in
+        # a transaction to never expose half-rebuilt counters to other processes
+        conn.executescript(f"BEGIN;\n{REBUILD_COUNTERS_SQL}\nCOMMIT;")
         conn.commit()
 
 
-def get_connection():
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    """
+    Add the columns from COLUMN_MIGRATIONS to existing tables that don't have them yet.
+    Tables that don't exist yet are skipped, DB_SCHEMA creates them with every column.
+    """
+    for table, column, definition in COLUMN_MIGRATIONS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if existing and column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Open a new connection configured the same way as the per-request connections.
+
+    Use this for work that happens outside of a request's dependency lifecycle, such as
+    startup tasks. The caller is responsible for closing the connection.
+    """
     # the check_same_thread prevents a common issue where sqlite flags the fact
     # that the connection is being used across multiple threads
     # (which can happen in a web server context)
     conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
     conn.execute("PRAGMA foreign_keys = ON;")
     conn.row_factory = sqlite3.Row
+    return conn
+
+
+# Key of the request scope state holding a connection shared by several requests, set
+# by the batch route for its sub-requests
+SHARED_CONNECTION_STATE = "shared_connection"
+
+
+def get_connection(request: Request):
+    shared = request.scope.get("state", {}).get(SHARED_CONNECTION_STATE)
+    if shared is not None:
+        # owned (and closed) by whoever shares it
+        yield shared
+        return
+    conn = connect()
     try:
         yield conn
     finally:
         conn.close()
+
+
+def get_table_versions(conn: sqlite3.Connection, *tables: str) -> tuple[int, ...]:
+    """
+    Read the write counters of the given tables from ``table_versions``.
+
+    The counters are bumped by triggers on every write, so comparing two readings tells
+    whether any of the tables changed in between, no matter which process wrote to them.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :return: the version of each table, in the order the tables were given
+    :rtype: tuple[int, ...]
+    """
+    placeholders = ",".join("?" * len(tables))
+    versions = dict(
+        conn.execute(
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            tables,
+        ).fetchall()
+    )
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def get_row_version(conn: sqlite3.Connection, entity: str, entity_id: int) -> int:
+    """
+    Read the write counter of a single row from ``row_versions``.
+
+    Like the table counters, it is bumped by triggers on every write to the row or to
+    what its response includes, so an unchanged version means an unchanged response.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param entity: 'event', 'organization' or 'user'
+    :type entity: str
+    :param entity_id: the id of the row
+    :type entity_id: int
+    :return: the version of the row, 0 if it was never written to
+    :rtype: int
+    """
+    row = conn.execute(
+        "SELECT version FROM row_versions WHERE entity = ? AND entity_id = ?",
+        (entity, entity_id),
+    ).fetchone()
+    return row[0] if row else 0
@@ -1,16 +1,30 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from db import init_db
+from db import connect, init_db
 from routes.auth import router as auth_router
+from routes.batch import router as batch_router
+from routes.catalog import router as catalog_router
+from routes.changes import router as changes_router
 from routes.event_registrations import router as event_registrations_router
+from routes.event_series import router as event_series_router
 from routes.events import router as events_router
+from routes.imports import router as imports_router
+from routes.metrics import router as metrics_router
 from routes.organization import router as organization_router
 from routes.roles import router as roles_router
 from routes.users import router as users_router
+from utils.catalog_snapshots import (
+    CATALOG_SNAPSHOT_INTERVAL_SECONDS,
+    refresh_catalog_periodically,
+)
+from utils.change_log import compact_change_log
+from utils.compression import CompressionMiddleware
+from utils.event_index import event_index
 from utils.logger import get_logger, setup_logging
 
 setup_logging()
@@ -26,7 +40,19 @@ async def lifespan(app: FastAPI):
     otherwise without a DB connection the server is useless.
     """
     init_db()
+    conn = connect()
+    try:
+        compact_change_log(conn)
+        if event_index.enabled:
+            event_index.load(conn)
+    finally:
+        conn.close()
+    catalog_refresher = None
+    if CATALOG_SNAPSHOT_INTERVAL_SECONDS > 0:
+        catalog_refresher = asyncio.create_task(refresh_catalog_periodically())
     yield
+    if catalog_refresher is not None:
+        catalog_refresher.cancel()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -48,11 +74,16 @@ app.add_middleware(
     allow_origins=_allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "If-None-Match", "Last-Event-ID"],
+    # lets the client read the ETag to send back in If-None-Match
+    expose_headers=["ETag"],
 )
 
 logger.info(f"CORS configured with allowed origins: {_allowed_origins}")
 
+# gzip/brotli for clients that accept it, see utils/compression.py
+app.add_middleware(CompressionMiddleware)
+
 
 # Helper/demo endpoints below
 @app.get("/api")
@@ -71,4 +102,10 @@ app.include_router(users_router, prefix="/api")
 app.include_router(organization_router, prefix="/api")
 app.include_router(events_router, prefix="/api")
 app.include_router(event_registrations_router, prefix="/api")
+app.include_router(event_series_router, prefix="/api")
 app.include_router(roles_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(batch_router, prefix="/api")
+app.include_router(imports_router, prefix="/api")
+app.include_router(changes_router, prefix="/api")
+app.include_router(catalog_router, prefix="/api")
@@ -1,5 +1,45 @@
-from .event import Event, EventIn, EventUpdate
-from .event_registration import EventRegistrationIn, EventRegistrationWithEvent
-from .organization import Organization, OrganizationCreate, OrganizationUpdate
-from .role import Role, RoleAndUser, RoleCreate, RoleUpdate
-from .user import User
+from .batch import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+from .bulk_import import ImportReport, ImportRowError
+from .change import Change, ChangePage
+from .event import (
+    Event,
+    EventBatch,
+    EventBulkCreated,
+    EventBulkIn,
+    EventCalendarDay,
+    EventFacets,
+    EventIn,
+    EventListWithFacets,
+    EventUpdate,
+)
+from .event_registration import (
+    EventConflicts,
+    EventGroupRegistration,
+    EventGroupRegistrationIn,
+    EventGroupRegistrationResult,
+    EventRegistrationCreated,
+    EventRegistrationIn,
+    EventRegistrationWithEvent,
+)
+from .event_series import EventSeries, EventSeriesIn
+from .organization import (
+    EventFillRate,
+    EventWeeklyRegistrations,
+    Organization,
+    OrganizationAnalytics,
+    OrganizationBatch,
+    OrganizationCreate,
+    OrganizationUpdate,
+    VolunteerActivityWeek,
+)
+from .role import (
+    Role,
+    RoleAndUser,
+    RoleBulkOperation,
+    RoleBulkRequest,
+    RoleBulkResponse,
+    RoleBulkResult,
+    RoleCreate,
+    RoleUpdate,
+)
+from .user import User, UserBatch
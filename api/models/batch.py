@@ -0,0 +1,24 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class BatchSubRequest(BaseModel):
+    # path of a GET route with its query string, e.g. "/api/events?organization_id=3"
+    path: str
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchSubRequest]
+
+
+class BatchSubResponse(BaseModel):
+    status: int
+    # the decoded JSON body, the text of non-JSON responses, None for empty ones
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """The responses of a batch, in the order of its requests."""
+
+    responses: list[BatchSubResponse]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    # line of the input the row starts on, the header of a CSV file is line 1
+    line: int
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    """The outcome of a bulk import, counting the lines of earlier runs it resumed."""
+
+    import_id: str
+    kind: str
+    # last line of the input that was committed, resume after it
+    line_number: int
+    # line the run started after, 0 unless it resumed an interrupted import
+    resumed_from: int
+    inserted_count: int
+    error_count: int
+    # the errors of this run, at most MAX_REPORTED_ERRORS of them
+    errors: list[ImportRowError]
@@ -0,0 +1,27 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+ChangeEntity = Literal[
+    "event", "organization", "event_series", "event_registration", "role"
+]
+
+
+class Change(BaseModel):
+    cursor: int
+    entity: ChangeEntity
+    # primary key of the changed row, e.g. {"id": 3} for an event
+    key: dict[str, Optional[int]]
+    operation: Literal["insert", "update", "delete"]
+    changed_at: str
+
+
+class ChangePage(BaseModel):
+    """A batch of changes in cursor order."""
+
+    changes: list[Change]
+    # pass as ``since`` to get the changes after this batch
+    next_cursor: int
+    has_more: bool
+    # cursor of the last change logged so far
+    latest_cursor: int
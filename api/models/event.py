@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, PositiveInt
 from typing import Optional
 
@@ -10,6 +10,10 @@ class EventIn(BaseModel):
     date_time: datetime
     organization_id: PositiveInt
     category: Optional[str] = None
+    # maximum number of registrations, None means unlimited
+    capacity: Optional[PositiveInt] = None
+    # how long the event lasts, used to detect schedule conflicts
+    duration_minutes: PositiveInt = 60
 
 
 class EventUpdate(BaseModel):
@@ -19,6 +23,8 @@ class EventUpdate(BaseModel):
     date_time: Optional[datetime] = None
     organization_id: Optional[PositiveInt] = None
     category: Optional[str] = None
+    capacity: Optional[PositiveInt] = None
+    duration_minutes: Optional[PositiveInt] = None
 
 
 class Event(BaseModel):
@@ -29,3 +35,56 @@ class Event(BaseModel):
     date_time: datetime
     organization_id: PositiveInt
     category: Optional[str] = None
+    capacity: Optional[PositiveInt] = None
+    duration_minutes: PositiveInt = 60
+    registration_count: int = 0
+    # the recurring event this is an occurrence of, if any
+    series_id: Optional[PositiveInt] = None
+
+
+class EventFacets(BaseModel):
+    """
+    Counts of matching events per filter option, used by the events FilterBar to show how
+    many results each choice would return.
+    """
+
+    category: dict[str, int] = {}
+    organization_id: dict[int, int] = {}
+    # keys are "weekday" and "weekend"
+    day_type: dict[str, int] = {}
+    # keys match the ``availability`` filter options (Mornings, Afternoons, Evenings, Weekends, Flexible)
+    availability: dict[str, int] = {}
+
+
+class EventListWithFacets(BaseModel):
+    events: list[Event]
+    facets: EventFacets
+
+
+class EventBulkIn(BaseModel):
+    events: list[EventIn]
+
+
+class EventBulkCreated(BaseModel):
+    """The ids of events created in bulk, in the order of the request."""
+
+    ids: list[int]
+
+
+class EventBatch(BaseModel):
+    """Events looked up by id, in the requested order, and the ids that don't exist."""
+
+    events: list[Event]
+    missing_ids: list[int]
+
+
+class EventCalendarDay(BaseModel):
+    """
+    Totals for one day of the events calendar. ``open_seats`` only counts events with a
+    capacity.
+    """
+
+    day: date
+    event_count: int
+    registration_count: int
+    open_seats: int
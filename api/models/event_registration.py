@@ -1,4 +1,6 @@
-from pydantic import BaseModel, PositiveInt
+from typing import Optional
+
+from pydantic import BaseModel, PositiveInt, model_validator
 
 
 class EventRegistrationIn(BaseModel):
@@ -18,3 +20,47 @@ class EventRegistrationWithEvent(BaseModel):
     event_name: str
     event_location: str
     event_date_time: str
+
+
+class EventRegistrationCreated(EventRegistrationIn):
+    # events the user was already registered for that overlap this one
+    conflicting_event_ids: list[PositiveInt] = []
+
+
+class EventConflicts(BaseModel):
+    event_id: PositiveInt
+    # events the user is registered for that overlap this one
+    conflicting_event_ids: list[PositiveInt]
+
+
+class EventGroupRegistrationIn(BaseModel):
+    event_id: PositiveInt
+    # either the users to register, or an organization to register all the members of
+    user_ids: Optional[list[PositiveInt]] = None
+    organization_id: Optional[PositiveInt] = None
+    registration_time: str  # ISO 8601 format, e.g., "2024-06-01T12:00:00"
+
+    @model_validator(mode="after")
+    def check_users(self):
+        if (self.user_ids is None) == (self.organization_id is None):
+            raise ValueError("Provide either user_ids or organization_id")
+        return self
+
+
+class EventGroupRegistrationResult(BaseModel):
+    user_id: PositiveInt
+    # the HTTP status registering the user on their own would have had
+    status: int
+    detail: Optional[str] = None
+    # registered events of the user overlapping the event, as for single registrations
+    conflicting_event_ids: list[int] = []
+
+
+class EventGroupRegistration(BaseModel):
+    """The outcome of a group registration, one result per user in request order."""
+
+    event_id: PositiveInt
+    organization_id: PositiveInt
+    registration_time: str
+    registered_count: int
+    results: list[EventGroupRegistrationResult]
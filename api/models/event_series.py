@@ -0,0 +1,28 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, PositiveInt
+
+
+class EventSeriesIn(BaseModel):
+    name: str
+    description: str
+    location: str
+    # date_time of the first occurrence, later ones keep its time of day
+    first_date_time: datetime
+    organization_id: PositiveInt
+    category: Optional[str] = None
+    capacity: Optional[PositiveInt] = None
+    # how long each occurrence lasts
+    duration_minutes: PositiveInt = 60
+    frequency: Literal["weekly", "monthly"]
+    # number of weeks/months between occurrences
+    interval: PositiveInt = 1
+    # last day an occurrence may fall on, None repeats forever
+    until: Optional[date] = None
+
+
+class EventSeries(EventSeriesIn):
+    id: PositiveInt
+    # days on which the occurrence is cancelled
+    exceptions: list[date] = []
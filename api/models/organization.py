@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, PositiveInt
@@ -11,6 +12,18 @@ class Organization(BaseModel):
     description: Optional[str] = None
     category: categoriesEnum
     created_by_user_id: PositiveInt
+    admin_count: int = 0
+    volunteer_count: int = 0
+    upcoming_event_count: int = 0
+
+
+class OrganizationBatch(BaseModel):
+    """
+    Organizations looked up by id, in the requested order, and the ids that don't exist.
+    """
+
+    organizations: list[Organization]
+    missing_ids: list[int]
 
 
 class OrganizationCreate(BaseModel):
@@ -23,3 +36,38 @@ class OrganizationUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     category: categoriesEnum
+
+
+class EventWeeklyRegistrations(BaseModel):
+    event_id: PositiveInt
+    event_name: str
+    # Monday of the week the registrations were made
+    week: date
+    registration_count: int
+
+
+class VolunteerActivityWeek(BaseModel):
+    # Monday of the week
+    week: date
+    # distinct users who registered for at least one event during the week
+    active_volunteers: int
+    registration_count: int
+
+
+class EventFillRate(BaseModel):
+    event_id: PositiveInt
+    event_name: str
+    date_time: datetime
+    capacity: PositiveInt
+    registration_count: int
+    # registration_count / capacity
+    fill_rate: float
+
+
+class OrganizationAnalytics(BaseModel):
+    organization_id: PositiveInt
+    start_date: date
+    end_date: date
+    weekly_registrations: list[EventWeeklyRegistrations]
+    volunteer_activity: list[VolunteerActivityWeek]
+    fill_rates: list[EventFillRate]
@@ -1,5 +1,5 @@
-from typing import Literal
-from pydantic import BaseModel, PositiveInt
+from typing import Literal, Optional
+from pydantic import BaseModel, PositiveInt, model_validator
 
 
 class Role(BaseModel):
@@ -28,3 +28,36 @@ class RoleAndUser(BaseModel):
     organization_id: PositiveInt
     name: str
     permission_level: Literal["admin", "volunteer"]
+
+
+class RoleBulkOperation(BaseModel):
+    action: Literal["add", "update", "remove"]
+    user_id: PositiveInt
+    # required to add or update a member, ignored when removing one
+    permission_level: Optional[Literal["admin", "volunteer"]] = None
+
+    @model_validator(mode="after")
+    def check_permission_level(self):
+        if self.action != "remove" and self.permission_level is None:
+            raise ValueError(f"permission_level is required to {self.action} a member")
+        return self
+
+
+class RoleBulkRequest(BaseModel):
+    operations: list[RoleBulkOperation]
+
+
+class RoleBulkResult(BaseModel):
+    action: Literal["add", "update", "remove"]
+    user_id: PositiveInt
+    # the HTTP status the operation would have had on its own
+    status: int
+    detail: Optional[str] = None
+    # the role after adding or updating it, or the role that was removed
+    role: Optional[RoleAndUser] = None
+
+
+class RoleBulkResponse(BaseModel):
+    """The result of every operation of a bulk request, in the same order."""
+
+    results: list[RoleBulkResult]
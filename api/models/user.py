@@ -22,6 +22,13 @@ class User(BaseModel):
     interests: list[str] = []
 
 
+class UserBatch(BaseModel):
+    """Users looked up by id, in the requested order, and the ids that don't exist."""
+
+    users: list[User]
+    missing_ids: list[int]
+
+
 class UserUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
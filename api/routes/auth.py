@@ -4,11 +4,11 @@ import sqlite3
 from datetime import timedelta
 
 import jwt
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
-from db import get_connection
+from db import get_connection, get_row_version
 from models.auth import (
     RequestResetBody,
     ResetPasswordBody,
@@ -16,6 +16,8 @@ from models.auth import (
     SignupResponse,
 )
 from utils.auth import get_current_user
+from utils.etag import check_etag, make_etag
+from utils.fast_json import fast_response, negotiate_media_type
 from utils.security import (
     create_access_token,
     decode_access_token,
@@ -245,15 +247,28 @@ def reset_password(
 
 @router.get("/me")
 def get_me(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     _conn: sqlite3.Connection = Depends(get_connection),
 ):
     """
     Return the currently authenticated user's full profile.
 
-    Requires a valid session cookie or Bearer token.
+    Requires a valid session cookie or Bearer token. Responses have an ETag that changes
+    when the profile or interests change, send it back in ``If-None-Match`` to get a 304
+    when nothing changed. Send ``Accept: application/msgpack`` to get the profile as
+    MessagePack.
     """
     user_id = current_user["user_id"]
+    media_type = negotiate_media_type(request)
+    etag = make_etag(
+        "get_me", user_id, media_type, get_row_version(_conn, "user", user_id)
+    )
+    # the profile must not be shared by caches between users
+    not_modified = check_etag(request, response, etag, "private, no-cache")
+    if not_modified is not None:
+        return not_modified
     row = _conn.execute(
         "SELECT user_id, email, first_name, last_name, availability, skills FROM users WHERE user_id = ?",
         (user_id,),
@@ -267,15 +282,19 @@ def get_me(
         (user_id,),
     ).fetchall()
     interests = [r["category"] for r in interest_rows]
-    return {
-        "user_id": row["user_id"],
-        "email": row["email"],
-        "first_name": row["first_name"],
-        "last_name": row["last_name"],
-        "availability": row["availability"],
-        "skills": row["skills"] or "",
-        "interests": interests,
-    }
+    return fast_response(
+        {
+            "user_id": row["user_id"],
+            "email": row["email"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "availability": row["availability"],
+            "skills": row["skills"] or "",
+            "interests": interests,
+        },
+        media_type,
+        dict(response.headers),
+    )
 
 
 @router.delete("/delete-account")
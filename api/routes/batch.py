@@ -0,0 +1,197 @@
+import json
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+import anyio
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from db import SHARED_CONNECTION_STATE, connect
+from models import BatchRequest, BatchResponse, BatchSubResponse
+from utils.auth import SHARED_USER_STATE, oauth2_scheme, resolve_user
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+MAX_BATCH_REQUESTS = int(os.environ.get("MAX_BATCH_REQUESTS", "20"))
+
+# request headers that describe the batch request itself rather than its sub-requests,
+# sub-responses always have a body and are embedded as JSON
+_DROPPED_HEADERS = {
+    b"content-length",
+    b"content-type",
+    b"accept",
+    b"accept-encoding",
+    b"if-none-match",
+}
+
+# routes that only stream, and would hold the batch's snapshot open until they end
+_STREAMING_PATHS = {"/api/events/stream"}
+# streamed responses of other routes, aborted as soon as they start
+_STREAMED_MEDIA_TYPES = (
+    "text/event-stream",
+    "application/x-ndjson",
+    "application/jsonl",
+    "text/csv",
+)
+
+
+def _open_snapshot(token: Optional[str]):
+    """
+    Open the connection shared by the sub-requests inside a read transaction and resolve
+    the user once. Returns the connection and the user, or the HTTPException resolving
+    the user raised so sub-requests that need a user fail the same way.
+    """
+    conn = connect()
+    # outside of WAL mode the snapshot would lock writers out until the batch ends
+    (journal_mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    if journal_mode != "wal":
+        conn.close()
+        raise RuntimeError("Batch snapshots need the database in WAL mode, see init_db")
+    # the transaction keeps the snapshot from the first query to the last, so every
+    # sub-request sees the same state of the database
+    conn.execute("BEGIN")
+    try:
+        user: dict | HTTPException = resolve_user(token, conn)
+    except HTTPException as error:
+        user = error
+    return conn, user
+
+
+def _close_snapshot(conn) -> None:
+    conn.rollback()
+    conn.close()
+
+
+async def _dispatch(request: Request, path: str, state: dict) -> BatchSubResponse:
+    """Run a GET sub-request through the app in-process and collect its response."""
+    url = urlsplit(path)
+    scope = {
+        key: request.scope[key]
+        for key in ("type", "asgi", "http_version", "scheme", "server", "client")
+        if key in request.scope
+    }
+    scope.update(
+        method="GET",
+        path=url.path,
+        raw_path=url.path.encode(),
+        root_path=request.scope.get("root_path", ""),
+        query_string=url.query.encode(),
+        headers=[
+            (name, value)
+            for name, value in request.scope["headers"]
+            if name not in _DROPPED_HEADERS
+        ],
+        state=state,
+    )
+    response: dict = {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "headers": []}
+    body = bytearray()
+    request_sent = False
+    streamed = False
+    response_complete = anyio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # streamed responses keep listening for a disconnect while they send
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal streamed
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+            content_type = dict(response["headers"]).get(b"content-type", b"")
+            if content_type.decode().startswith(_STREAMED_MEDIA_TYPES):
+                # answer as if the client went away, which ends the stream
+                streamed = True
+                response_complete.set()
+        elif streamed:
+            return
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # the app already answered 500, only keep the error from failing the whole batch
+        logger.exception("Batch sub-request %s failed", path)
+        return BatchSubResponse(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if streamed:
+        return BatchSubResponse(
+            status=status.HTTP_400_BAD_REQUEST,
+            body="Streamed responses are not supported in a batch",
+        )
+
+    content_type = dict(response["headers"]).get(b"content-type", b"").decode()
+    if not body:
+        decoded = None
+    elif content_type.startswith("application/json"):
+        decoded = json.loads(body)
+    else:
+        decoded = body.decode(errors="replace")
+    return BatchSubResponse(status=response["status"], body=decoded)
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    payload: BatchRequest,
+    request: Request,
+    bearer_token: Optional[str] = Depends(oauth2_scheme),
+    session: Optional[str] = Cookie(default=None),
+):
+    """
+    Run several GET requests in one round trip. Sub-requests are dispatched in-process
+    against the regular routes, in order, and their responses are returned in the same
+    order, each with its own status, so one failing sub-request doesn't fail the others.
+
+    The user is resolved once from the batch request's credentials, and every
+    sub-request reads through the same connection inside one read transaction, so they
+    all see a consistent snapshot of the database. The database is in WAL mode, so the
+    snapshot doesn't hold up writes while the batch runs.
+
+    Streamed responses (server-sent events, NDJSON, CSV) can't be part of a batch.
+
+    :param payload: the sub-requests, at most ``MAX_BATCH_REQUESTS``. Paths must be API routes (starting with '/api/') and may include a query string
+    :type payload: BatchRequest
+    """
+    if len(payload.requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch cannot contain more than {MAX_BATCH_REQUESTS} requests",
+        )
+    for sub_request in payload.requests:
+        path = urlsplit(sub_request.path).path
+        if (
+            not path.startswith("/api/")
+            or path.rstrip("/") == "/api/batch"
+            or path.rstrip("/") in _STREAMING_PATHS
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid batch request path: {sub_request.path}",
+            )
+
+    conn, user = await run_in_threadpool(_open_snapshot, session or bearer_token)
+    try:
+        state = {
+            **request.scope.get("state", {}),
+            SHARED_CONNECTION_STATE: conn,
+            SHARED_USER_STATE: user,
+        }
+        responses = [
+            await _dispatch(request, sub_request.path, state)
+            for sub_request in payload.requests
+        ]
+    finally:
+        await run_in_threadpool(_close_snapshot, conn)
+    return BatchResponse(responses=responses)
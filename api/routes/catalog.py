@@ -0,0 +1,80 @@
+import re
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+
+from utils.catalog_snapshots import CATALOG_SNAPSHOT_DIR, ENCODINGS, MANIFEST_FILE
+from utils.compression import preferred_encoding
+from utils.etag import check_etag, make_etag
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+# clients revalidate the manifest after this long, the files it points to never change
+CATALOG_MANIFEST_MAX_AGE = 60
+_FILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_FILE_NAME = re.compile(r"[0-9a-f]{20}\.json")
+
+
+@router.get("", response_class=FileResponse)
+def get_catalog_manifest(request: Request, response: Response):
+    """
+    Get the manifest of the public catalog snapshots: when they were generated and the
+    file of each view, to fetch from ``/api/catalog/{file_name}``.
+
+    Views are 'upcoming' (the home page), 'events' (every event),
+    'events/category/<category>', 'events/day/<YYYY-MM-DD>' for the next days and
+    'organizations' (the directory). They hold the same events as ``list_events``
+    returns with ``fields=id,name,date_time,location,category&expand=organization``.
+    The manifest may be cached for ``CATALOG_MANIFEST_MAX_AGE`` seconds.
+    """
+    path = CATALOG_SNAPSHOT_DIR / MANIFEST_FILE
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Catalog snapshots have not been generated",
+        )
+    not_modified = check_etag(
+        request,
+        response,
+        make_etag("catalog", stat.st_mtime_ns, stat.st_size),
+        f"public, max-age={CATALOG_MANIFEST_MAX_AGE}",
+    )
+    if not_modified is not None:
+        return not_modified
+    return FileResponse(
+        path, media_type="application/json", headers=dict(response.headers)
+    )
+
+
+@router.get("/{file_name}", response_class=FileResponse)
+def get_catalog_file(file_name: str, request: Request):
+    """
+    Get a file of the catalog snapshots, named in the manifest. Files never change, so
+    they can be cached for a year. They are sent gzip (or brotli) compressed to clients
+    that accept it, compressed ahead of time, and uncompressed when no accepted copy
+    exists.
+
+    :param file_name: the file name from the manifest
+    :type file_name: str
+    """
+    path = CATALOG_SNAPSHOT_DIR / file_name
+    if not _FILE_NAME.fullmatch(file_name) or not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Catalog file not found"
+        )
+    headers = {"Cache-Control": _FILE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    # a compressed copy can be missing, e.g. when brotli was installed after it was
+    # written, the next accepted one (or the file itself) is sent instead
+    encodings = [
+        encoding
+        for encoding, suffix in ENCODINGS.items()
+        if path.with_name(file_name + suffix).exists()
+    ]
+    encoding = preferred_encoding(request.headers.get("accept-encoding", ""), encodings)
+    if encoding is not None:
+        path = path.with_name(file_name + ENCODINGS[encoding])
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type="application/json", headers=headers)
@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+from typing import List, get_args
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from db import get_connection
+from models import Change, ChangePage
+from models.change import ChangeEntity
+from utils.auth import get_current_user
+from utils.change_log import compacted_through
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+MAX_CHANGES_LIMIT = int(os.environ.get("MAX_CHANGES_LIMIT", "1000"))
+
+CHANGE_ENTITIES = get_args(ChangeEntity)
+
+
+@router.get("", response_model=ChangePage)
+def list_changes(
+    since: int = 0,
+    limit: int = 500,
+    entity: List[str] = Query(default=[]),
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    List the changes to events, organizations, event series, registrations and roles
+    after a cursor, in the order they were made, so a consumer can stay in sync by only
+    reading what changed since its last sync.
+
+    Each change has the key of the changed row and whether it was inserted, updated or
+    deleted; read the rows themselves from the regular routes. Start with ``since=0``
+    (or the ``latest_cursor`` read before loading the full lists), then pass the
+    ``next_cursor`` of each batch until ``has_more`` is false.
+
+    Entries older than the retention period are compacted to the last change of each
+    row, so treat inserts and updates alike. If deletes after ``since`` were compacted
+    away, this returns 410 Gone: reload the full lists and continue from
+    ``latest_cursor``. The user id of other users' registrations and roles is left out.
+
+    :param since: return the changes after this cursor
+    :type since: int
+    :param limit: the maximum number of changes to return, at most ``MAX_CHANGES_LIMIT``
+    :type limit: int
+    :param entity: only return changes to these kinds of rows: 'event', 'organization', 'event_series', 'event_registration' or 'role'
+    :type entity: List[str]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    if since < 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Since cannot be negative"
+        )
+    if limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Limit must be at least 1"
+        )
+    limit = min(limit, MAX_CHANGES_LIMIT)
+    for value in entity:
+        if value not in CHANGE_ENTITIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown entity: {value}",
+            )
+    if since and since < compacted_through(_conn):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes after this cursor were compacted, reload the full lists "
+            "and continue from the latest cursor",
+        )
+
+    query = """
+        SELECT id, entity, entity_key, operation, changed_at
+        FROM change_log
+        WHERE id > ?
+    """
+    params: list = [since]
+    if entity:
+        query += f" AND entity IN ({','.join('?' * len(entity))})"
+        params.extend(entity)
+    # one extra row tells whether there are more
+    query += " ORDER BY id LIMIT ?"
+    params.append(limit + 1)
+    rows = _conn.execute(query, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = []
+    for row in rows:
+        key = json.loads(row["entity_key"])
+        if (
+            row["entity"] in ("event_registration", "role")
+            and key["user_id"] != _current_user["user_id"]
+        ):
+            key["user_id"] = None
+        changes.append(
+            Change(
+                cursor=row["id"],
+                entity=row["entity"],
+                key=key,
+                operation=row["operation"],
+                changed_at=row["changed_at"],
+            )
+        )
+    latest = _conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"
+    ).fetchone()
+    return ChangePage(
+        changes=changes,
+        next_cursor=rows[-1]["id"] if rows else since,
+        has_more=has_more,
+        latest_cursor=latest[0] if latest else 0,
+    )
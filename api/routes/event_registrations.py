@@ -1,18 +1,42 @@
+import json
+import os
 import sqlite3
+from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from db import get_connection
-from models import EventRegistrationIn, EventRegistrationWithEvent
+from models import (
+    EventConflicts,
+    EventGroupRegistration,
+    EventGroupRegistrationIn,
+    EventGroupRegistrationResult,
+    EventRegistrationCreated,
+    EventRegistrationIn,
+    EventRegistrationWithEvent,
+)
 from utils.auth import get_current_user
+from utils.event_index import event_index
+from utils.fast_json import fast_response, negotiate_media_type
+from utils.recurrence import materialize_occurrence, parse_occurrence_id
+from utils.schedule_conflicts import event_intervals, find_conflicts
 
 router = APIRouter(prefix="/event-registrations", tags=["event_registrations"])
 
+# maximum number of candidate events per conflict check
+MAX_CONFLICT_CHECK_EVENTS = 200
+
+# maximum number of users registered by one group registration
+MAX_GROUP_REGISTRATION_USERS = int(
+    os.environ.get("MAX_GROUP_REGISTRATION_USERS", "1000")
+)
+
 
 @router.get(
     "", response_model=list[EventRegistrationWithEvent] | list[EventRegistrationIn]
 )
 def list_event_registrations(
+    request: Request,
     organization_id: int | None = None,
     event_id: int | None = None,
     skip: int = 0,
@@ -23,7 +47,8 @@ def list_event_registrations(
 ):
     """
     List event registrations, optionally filtered by organization or event.
-    The user is derived from the current session.
+    The user is derived from the current session. Send ``Accept: application/msgpack``
+    to get the list as MessagePack.
 
     :param organization_id: filter by organization ID
     :type organization_id: int | None
@@ -92,29 +117,50 @@ def list_event_registrations(
     params.extend([limit, skip])
 
     rows = _conn.execute(query, params).fetchall()
+    # the selected columns are the fields of the response model, in order
+    return fast_response(
+        [dict(row) for row in rows], negotiate_media_type(request)
+    )
 
-    if include_event_details:
-        return [
-            EventRegistrationWithEvent(
-                user_id=row["user_id"],
-                event_id=row["event_id"],
-                organization_id=row["organization_id"],
-                registration_time=row["registration_time"],
-                event_name=row["event_name"],
-                event_location=row["event_location"],
-                event_date_time=row["event_date_time"],
-            )
-            for row in rows
-        ]
 
+@router.get("/conflicts", response_model=list[EventConflicts])
+def check_event_conflicts(
+    event_id: List[int] = Query(),
+    _conn: sqlite3.Connection = Depends(get_connection),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Check a batch of candidate events against the events the current user is registered
+    for, e.g. to mark conflicting events in a list before the user registers.
+    Returns 404 Not Found if any of the events doesn't exist.
+
+    :param event_id: the candidate events, at most MAX_CONFLICT_CHECK_EVENTS of them. Occurrences of recurring events are accepted
+    :type event_id: List[int]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    if len(event_id) > MAX_CONFLICT_CHECK_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_CONFLICT_CHECK_EVENTS} events can be checked at once",
+        )
+    intervals = event_intervals(_conn, event_id)
+    missing = [
+        requested_id for requested_id in event_id if requested_id not in intervals
+    ]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Events not found: {', '.join(map(str, missing))}",
+        )
+
+    conflicts = find_conflicts(_conn, current_user["user_id"], set(intervals.values()))
     return [
-        EventRegistrationIn(
-            user_id=row["user_id"],
-            event_id=row["event_id"],
-            organization_id=row["organization_id"],
-            registration_time=row["registration_time"],
+        EventConflicts(
+            event_id=requested_id,
+            conflicting_event_ids=conflicts[intervals[requested_id][0]],
         )
-        for row in rows
+        for requested_id in event_id
     ]
 
 
@@ -167,32 +213,75 @@ def get_event_registration(
 
 
 @router.post(
-    "", response_model=EventRegistrationIn, status_code=status.HTTP_201_CREATED
+    "", response_model=EventRegistrationCreated, status_code=status.HTTP_201_CREATED
 )
 def create_event_registration(
     payload: EventRegistrationIn,
+    reject_conflicts: bool = False,
     _conn: sqlite3.Connection = Depends(get_connection),
     _current_user: dict = Depends(get_current_user),
 ):
     """
     Create a new event registration.
+    Returns 409 Conflict if the event has a capacity and is already full.
+
+    ``event_id`` may be the ID of an occurrence of a recurring event, the occurrence is
+    then stored as an event of its own and the registration points at it.
+
+    Events the user is already registered for that overlap this one are returned in
+    ``conflicting_event_ids``, found through the per-user interval index.
 
     :param payload: the event registration details
     :type payload: EventRegistrationIn
+    :param reject_conflicts: when True, return 409 Conflict instead of registering if the event overlaps one the user is registered for
+    :type reject_conflicts: bool
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
+    event_id = payload.event_id
+    occurrence = parse_occurrence_id(event_id)
+    if occurrence is not None:
+        event_id = materialize_occurrence(_conn, *occurrence)
+        if event_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+            )
+
+    intervals = event_intervals(_conn, [event_id])
+    conflicting_event_ids = (
+        find_conflicts(_conn, _current_user["user_id"], intervals.values())[event_id]
+        if intervals
+        else []
+    )
+    if conflicting_event_ids and reject_conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Event overlaps registered events: "
+            + ", ".join(map(str, conflicting_event_ids)),
+        )
+
     try:
-        _conn.execute(
+        # the capacity check is part of the INSERT so two concurrent registrations
+        # cannot both take the last seat
+        cursor = _conn.execute(
             """
 			INSERT INTO event_registrations (user_id, event_id, organization_id, registration_time)
-			VALUES (?, ?, ?, ?)
+			SELECT ?, ?, ?, ?
+			WHERE NOT EXISTS (
+			    SELECT 1
+			    FROM events
+			    LEFT JOIN event_counters ON event_counters.event_id = events.id
+			    WHERE events.id = ?
+			      AND events.capacity IS NOT NULL
+			      AND COALESCE(event_counters.registration_count, 0) >= events.capacity
+			)
 			""",
             (
                 _current_user["user_id"],
-                payload.event_id,
+                event_id,
                 payload.organization_id,
                 payload.registration_time,
+                event_id,
             ),
         )
         _conn.commit()
@@ -201,12 +290,223 @@ def create_event_registration(
             status_code=status.HTTP_409_CONFLICT,
             detail="Registration already exists",
         )
+    if occurrence is not None:
+        event_index.upsert(_conn, event_id)
+    if cursor.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Event is full"
+        )
 
-    return EventRegistrationIn(
+    return EventRegistrationCreated(
         user_id=_current_user["user_id"],
-        event_id=payload.event_id,
+        event_id=event_id,
         organization_id=payload.organization_id,
         registration_time=payload.registration_time,
+        conflicting_event_ids=conflicting_event_ids,
+    )
+
+
+@router.post(
+    "/group",
+    response_model=EventGroupRegistration,
+    summary="Register a group of users for an event",
+)
+def create_group_event_registration(
+    payload: EventGroupRegistrationIn,
+    reject_conflicts: bool = False,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Register several users for an event in one transaction, e.g. a corporate volunteer
+    team: either the users in ``user_ids``, or every member of ``organization_id``.
+
+    Registering all the members of an organization requires being its admin. Users in
+    ``user_ids`` can only be the current user or members of an organization the current
+    user is an admin of.
+
+    Each user gets a result with the status registering them on their own would have
+    had: 201 when registered, 404 if the user doesn't exist, 403 if the current user
+    can't register them, and 409 if they were already registered or the event is full.
+    Like for single registrations, events a user is already registered for that
+    overlap this one are returned in their ``conflicting_event_ids``, or make their
+    result a 409 with ``reject_conflicts``.
+    When there are fewer seats left than users, the first users in request order get
+    the remaining seats. Seats are counted with the database write lock held, so
+    concurrent registrations can never overbook the event.
+
+    ``event_id`` may be the ID of an occurrence of a recurring event, like for single
+    registrations.
+
+    :param payload: the event, the users or organization to register and the registration time
+    :type payload: EventGroupRegistrationIn
+    :param reject_conflicts: when True, don't register users for whom the event overlaps one they are registered for
+    :type reject_conflicts: bool
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    current_user_id = _current_user["user_id"]
+    if (
+        payload.user_ids is not None
+        and len(set(payload.user_ids)) > MAX_GROUP_REGISTRATION_USERS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot register more than "
+            f"{MAX_GROUP_REGISTRATION_USERS} users at once",
+        )
+
+    # the write lock is held from the capacity check to the commit
+    _conn.execute("BEGIN IMMEDIATE")
+    try:
+        event_id = payload.event_id
+        occurrence = parse_occurrence_id(event_id)
+        if occurrence is not None:
+            event_id = materialize_occurrence(_conn, *occurrence)
+        event = (
+            _conn.execute(
+                """
+                SELECT e.organization_id, e.capacity,
+                       COALESCE(ec.registration_count, 0) AS registration_count
+                FROM events e
+                LEFT JOIN event_counters ec ON ec.event_id = e.id
+                WHERE e.id = ?
+                """,
+                (event_id,),
+            ).fetchone()
+            if event_id is not None
+            else None
+        )
+        if event is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+            )
+
+        if payload.organization_id is not None:
+            admin_row = _conn.execute(
+                "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ? AND permission_level = 'admin'",
+                (payload.organization_id, current_user_id),
+            ).fetchone()
+            if admin_row is None:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Only organization admins can register all its members",
+                )
+            user_ids = [
+                row[0]
+                for row in _conn.execute(
+                    "SELECT user_id FROM roles WHERE organization_id = ? ORDER BY user_id",
+                    (payload.organization_id,),
+                )
+            ]
+            if len(user_ids) > MAX_GROUP_REGISTRATION_USERS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cannot register more than "
+                    f"{MAX_GROUP_REGISTRATION_USERS} users at once",
+                )
+        else:
+            user_ids = list(dict.fromkeys(payload.user_ids))
+
+        # whether each user exists, is already registered and can be registered by the
+        # current user, in one query whatever the number of users
+        rows = _conn.execute(
+            """
+            WITH requested (user_id) AS (SELECT value FROM json_each(?))
+            SELECT requested.user_id,
+                   u.user_id IS NOT NULL AS user_exists,
+                   EXISTS (
+                       SELECT 1 FROM event_registrations er
+                       WHERE er.event_id = ? AND er.user_id = requested.user_id
+                   ) AS registered,
+                   requested.user_id = ?
+                   OR EXISTS (
+                       SELECT 1 FROM roles member
+                       JOIN roles admin
+                         ON admin.organization_id = member.organization_id
+                        AND admin.user_id = ? AND admin.permission_level = 'admin'
+                       WHERE member.user_id = requested.user_id
+                   ) AS allowed
+            FROM requested
+            LEFT JOIN users u ON u.user_id = requested.user_id
+            """,
+            (
+                json.dumps(user_ids),
+                event_id,
+                current_user_id,
+                current_user_id,
+            ),
+        ).fetchall()
+        statuses = {row["user_id"]: row for row in rows}
+        intervals = list(event_intervals(_conn, [event_id]).values())
+
+        seats_left = (
+            None
+            if event["capacity"] is None
+            else max(event["capacity"] - event["registration_count"], 0)
+        )
+        results = []
+        registrations = []
+        for user_id in user_ids:
+            row = statuses[user_id]
+            result = EventGroupRegistrationResult(
+                user_id=user_id, status=status.HTTP_201_CREATED
+            )
+            results.append(result)
+            if not row["user_exists"]:
+                result.status = status.HTTP_404_NOT_FOUND
+                result.detail = "User not found"
+            elif not row["allowed"]:
+                result.status = status.HTTP_403_FORBIDDEN
+                result.detail = "Not allowed to register this user"
+            elif row["registered"]:
+                result.status = status.HTTP_409_CONFLICT
+                result.detail = "Registration already exists"
+            elif seats_left == 0:
+                result.status = status.HTTP_409_CONFLICT
+                result.detail = "Event is full"
+            else:
+                if intervals:
+                    result.conflicting_event_ids = find_conflicts(
+                        _conn, user_id, intervals
+                    )[event_id]
+                if result.conflicting_event_ids and reject_conflicts:
+                    result.status = status.HTTP_409_CONFLICT
+                    result.detail = "Event overlaps registered events: " + ", ".join(
+                        map(str, result.conflicting_event_ids)
+                    )
+                    continue
+                if seats_left is not None:
+                    seats_left -= 1
+                registrations.append(
+                    (
+                        user_id,
+                        event_id,
+                        event["organization_id"],
+                        payload.registration_time,
+                    )
+                )
+
+        _conn.executemany(
+            """
+            INSERT INTO event_registrations (user_id, event_id, organization_id, registration_time)
+            VALUES (?, ?, ?, ?)
+            """,
+            registrations,
+        )
+        _conn.commit()
+    except BaseException:
+        _conn.rollback()
+        raise
+    if occurrence is not None:
+        event_index.upsert(_conn, event_id)
+
+    return EventGroupRegistration(
+        event_id=event_id,
+        organization_id=event["organization_id"],
+        registration_time=payload.registration_time,
+        registered_count=len(registrations),
+        results=results,
     )
 
 
@@ -0,0 +1,214 @@
+import sqlite3
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from db import get_connection
+from models import EventSeries, EventSeriesIn
+from utils.auth import get_current_user
+from utils.event_index import event_index
+from utils.recurrence import SERIES_SELECT_SQL, find_materialized_on, load_exceptions
+
+router = APIRouter(prefix="/event-series", tags=["event_series"])
+
+
+def _require_series_admin(
+    _conn: sqlite3.Connection, series_id: int, current_user: dict, action: str
+) -> sqlite3.Row:
+    """
+    Load a series, raising 404 if it doesn't exist and 403 if the user is not an admin
+    of its organization.
+    """
+    series = _conn.execute(f"{SERIES_SELECT_SQL} WHERE id = ?", (series_id,)).fetchone()
+    if series is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event series not found"
+        )
+    role_row = _conn.execute(
+        "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ?",
+        (series["organization_id"], current_user["user_id"]),
+    ).fetchone()
+    if role_row is None or role_row["permission_level"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Only organization admins can {action} recurring events",
+        )
+    return series
+
+
+@router.post("", response_model=EventSeries, status_code=status.HTTP_201_CREATED)
+def create_event_series(
+    payload: EventSeriesIn,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Create a recurring event. The rule is stored once, its occurrences are expanded when
+    events are listed and show up there like any other event.
+    Only admins of the target organization may create recurring events.
+
+    :param payload: the recurring event data to create
+    :type payload: EventSeriesIn
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    role_row = _conn.execute(
+        "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ?",
+        (payload.organization_id, _current_user["user_id"]),
+    ).fetchone()
+    if role_row is None or role_row["permission_level"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organization admins can create recurring events",
+        )
+    if payload.until is not None and payload.until < payload.first_date_time.date():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="until must not be before the first occurrence",
+        )
+
+    cursor = _conn.execute(
+        """
+        INSERT INTO event_series (
+            name, description, location, first_date_time, organization_id, category,
+            capacity, duration_minutes, frequency, interval, until
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            payload.name,
+            payload.description,
+            payload.location,
+            payload.first_date_time,
+            payload.organization_id,
+            payload.category,
+            payload.capacity,
+            payload.duration_minutes,
+            payload.frequency,
+            payload.interval,
+            payload.until,
+        ),
+    )
+    _conn.commit()
+    return EventSeries(id=cursor.lastrowid, **payload.model_dump())
+
+
+@router.get("/{series_id}", response_model=EventSeries)
+def get_event_series(series_id: int, _conn=Depends(get_connection)):
+    """
+    Get a recurring event by its ID, along with its cancelled occurrences.
+
+    :param series_id: the ID of the recurring event
+    :type series_id: int
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    row = _conn.execute(f"{SERIES_SELECT_SQL} WHERE id = ?", (series_id,)).fetchone()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event series not found"
+        )
+    return EventSeries(
+        **dict(row), exceptions=sorted(load_exceptions(_conn, series_id))
+    )
+
+
+@router.delete("/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_event_series(
+    series_id: int,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Delete a recurring event, so its occurrences are no longer listed.
+    Occurrences that were already stored as events (e.g. because users registered for
+    them) are kept as one-off events along with their registrations.
+
+    :param series_id: the ID of the recurring event to delete
+    :type series_id: int
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    _require_series_admin(_conn, series_id, _current_user, "delete")
+    _conn.execute(
+        """
+        UPDATE events SET series_id = NULL, occurrence_index = NULL
+        WHERE series_id = ?
+        """,
+        (series_id,),
+    )
+    _conn.execute("DELETE FROM event_series WHERE id = ?", (series_id,))
+    _conn.commit()
+
+
+@router.put(
+    "/{series_id}/exceptions/{occurrence_date}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def add_event_series_exception(
+    series_id: int,
+    occurrence_date: date,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Cancel the occurrence of a recurring event on a given day.
+    Occurrences that were already stored as events are cancelled by deleting the event
+    and its registrations.
+
+    :param series_id: the ID of the recurring event
+    :type series_id: int
+    :param occurrence_date: the day of the occurrence to cancel
+    :type occurrence_date: date
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    series = _require_series_admin(_conn, series_id, _current_user, "update")
+    event_ids = find_materialized_on(_conn, series, occurrence_date)
+    if event_ids:
+        placeholders = ",".join("?" * len(event_ids))
+        _conn.execute(
+            f"DELETE FROM event_registrations WHERE event_id IN ({placeholders})",
+            event_ids,
+        )
+        _conn.execute(f"DELETE FROM events WHERE id IN ({placeholders})", event_ids)
+    _conn.execute(
+        """
+        INSERT OR IGNORE INTO event_series_exceptions (series_id, occurrence_date)
+        VALUES (?, ?)
+        """,
+        (series_id, occurrence_date.isoformat()),
+    )
+    _conn.commit()
+    event_index.remove(_conn, *event_ids)
+
+
+@router.delete(
+    "/{series_id}/exceptions/{occurrence_date}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def remove_event_series_exception(
+    series_id: int,
+    occurrence_date: date,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Restore a cancelled occurrence of a recurring event.
+
+    :param series_id: the ID of the recurring event
+    :type series_id: int
+    :param occurrence_date: the day of the occurrence to restore
+    :type occurrence_date: date
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    _require_series_admin(_conn, series_id, _current_user, "update")
+    _conn.execute(
+        """
+        DELETE FROM event_series_exceptions
+        WHERE series_id = ? AND occurrence_date = ?
+        """,
+        (series_id, occurrence_date.isoformat()),
+    )
+    _conn.commit()
@@ -1,78 +1,225 @@
+import heapq
+import os
 import sqlite3
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from db import get_connection
-from models import Event, EventIn, EventUpdate
+from db import connect, get_connection, get_row_version, get_table_versions
+from models import (
+    Event,
+    EventBatch,
+    EventBulkCreated,
+    EventBulkIn,
+    EventCalendarDay,
+    EventFacets,
+    EventIn,
+    EventListWithFacets,
+    EventUpdate,
+)
 from utils.auth import get_current_user
+from utils.batch_ids import order_by_ids, parse_ids
+from utils.bulk_import import insert_events
+from utils.etag import check_etag, make_etag
+from utils.event_index import event_index
+from utils.fast_json import fast_response, negotiate_media_type, render
+from utils.live_updates import live_updates
+from utils.recurrence import (
+    SERIES_SELECT_SQL,
+    cancel_occurrence,
+    expand_occurrences,
+    find_materialized,
+    is_valid_occurrence,
+    load_exceptions,
+    materialize_occurrence,
+    occurrence_id,
+    parse_date_time,
+    parse_occurrence_id,
+)
+from utils.result_cache import make_cache_key, result_cache
+from utils.single_flight import single_flight
+from utils.streaming import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    STREAM_CHUNK_SIZE,
+    chunked,
+    csv_chunks,
+    ndjson_chunks,
+)
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
-@router.get("", response_model=None)
-def list_events(
-    # TODO: improve type
+# Time-of-day windows used by the ``availability`` filter and the availability facet.
+# Bounds are compared against SQLite's time(), so they are inclusive "HH:MM" strings.
+AVAILABILITY_TIME_WINDOWS = {
+    "Mornings": ("06:00", "11:59"),
+    "Afternoons": ("12:00", "16:59"),
+    "Evenings": ("17:00", "21:59"),
+}
+
+# The same windows as seconds of day, for occurrences of recurring events that are
+# filtered in Python. time(date_time) is 'HH:MM:SS', which already sorts after the
+# 'HH:MM' upper bound when equal, so the windows are [start, end).
+_AVAILABILITY_SECONDS = {
+    name: tuple(
+        time.fromisoformat(bound).hour * 3600 + time.fromisoformat(bound).minute * 60
+        for bound in window
+    )
+    for name, window in AVAILABILITY_TIME_WINDOWS.items()
+}
+
+# How far ahead recurring events are expanded when a list query has no end_date
+RECURRENCE_WINDOW_DAYS = 365
+
+# Most events a (non-streamed) list response holds, larger results have to be streamed
+MAX_EVENT_LIST_LIMIT = int(os.environ.get("MAX_EVENT_LIST_LIMIT", "1000"))
+
+# Response formats of list_events, ndjson and csv are streamed
+EVENT_LIST_FORMATS = ("json", "ndjson", "csv")
+
+# events created by one bulk request, they are inserted in a single transaction
+MAX_BULK_EVENTS = int(os.environ.get("MAX_BULK_EVENTS", "1000"))
+
+
+# SQL expression of every Event field, which is also the set of names ``fields=`` accepts.
+# registration_count comes from the trigger-maintained event_counters table, so it
+# costs a join instead of a COUNT(*) per event.
+_EVENT_FIELD_SQL = {
+    "id": "events.id",
+    "name": "events.name",
+    "description": "events.description",
+    "location": "events.location",
+    "date_time": "events.date_time",
+    "organization_id": "events.organization_id",
+    "category": "events.category",
+    "capacity": "events.capacity",
+    "duration_minutes": "events.duration_minutes",
+    "registration_count": "COALESCE(event_counters.registration_count, 0)",
+    "series_id": "events.series_id",
+}
+
+# Related objects that can be embedded in each event with ``expand=``
+EVENT_EXPANSIONS = ("organization",)
+
+
+def _event_select_sql(
+    fields: Optional[Iterable[str]] = None, expand: Iterable[str] = ()
+) -> str:
+    """
+    Build the SELECT of an event query returning only ``fields`` (every field when
+    None), plus the summary of the event's organization when ``expand`` contains
+    'organization'. id and date_time are always selected, the list order needs them.
+
+    Organization columns come from an aliased subquery so their names can't clash with
+    the unqualified event columns used by the filters.
+    """
+    fields = list(_EVENT_FIELD_SQL) if fields is None else list(fields)
+    names = ["id", "date_time", *fields]
+    joins = []
+    if "registration_count" in fields:
+        joins.append("LEFT JOIN event_counters ON event_counters.event_id = events.id")
+    if "organization" in expand:
+        names.append("organization_id")
+        joins.append(
+            """
+            LEFT JOIN (
+                SELECT organization_id AS summary_organization_id,
+                       name AS organization_name,
+                       category AS organization_category
+                FROM organizations
+            ) AS organization_summaries
+              ON organization_summaries.summary_organization_id = events.organization_id
+            """
+        )
+    columns = [f"{_EVENT_FIELD_SQL[name]} AS {name}" for name in dict.fromkeys(names)]
+    if "organization" in expand:
+        columns.extend(["organization_name", "organization_category"])
+    return f"SELECT {', '.join(columns)} FROM events {' '.join(joins)}"
+
+
+# Every column of an Event response
+_EVENT_SELECT_SQL = _event_select_sql()
+
+
+def _parse_event_fields(fields: Optional[List[str]]) -> Optional[list[str]]:
+    """
+    Turn the ``fields`` query parameter, repeated and/or comma separated, into the list
+    of fields to return, always starting with id. Unknown fields are a 400.
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for value in fields for name in value.split(",")]
+    names = [name for name in names if name]
+    unknown = [name for name in names if name not in _EVENT_FIELD_SQL]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown event fields: {', '.join(unknown)}",
+        )
+    return list(dict.fromkeys(["id", *names]))
+
+
+def _parse_event_expand(expand: Optional[List[str]]) -> list[str]:
+    """Like ``_parse_event_fields``, for the ``expand`` query parameter."""
+    if expand is None:
+        return []
+    names = [name.strip() for value in expand for name in value.split(",")]
+    names = [name for name in names if name]
+    unknown = [name for name in names if name not in EVENT_EXPANSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown event expansions: {', '.join(unknown)}",
+        )
+    return sorted(set(names))
+
+
+def _build_event_filters(
     begin_time: Optional[str] = None,
     end_time: Optional[str] = None,
     begin_date: Optional[str] = None,
     end_date: Optional[str] = None,
     is_weekday: Optional[bool] = None,
-    organization_id: Optional[List[int]] = Query(default=None),
-    availability: Optional[List[str]] = Query(default=None),
-    category: Optional[List[str]] = Query(default=None),
-    # TODO: Option B — split location into city/state columns for structured filtering
+    organization_id: Optional[List[int]] = None,
+    availability: Optional[List[str]] = None,
+    category: Optional[List[str]] = None,
     location: Optional[str] = None,
-    limit: Optional[int] = None,
-    _conn=Depends(get_connection),
-):
+) -> Optional[tuple[str, list]]:
     """
-    Get a list of all events with optional filtering by date/time and availability matching.
-    Supports filtering by time range, date range, weekday/weekend, and organization.
+    Build the WHERE clause shared by the event list query and the facet query.
 
-    **note** time values must be in the format 'HH:MM' a value such as "8:00" will not work properly, it should be "08:00"
+    Returns ``None`` when the filters can never match anything (an explicitly empty
+    ``organization_id`` list), so callers can skip the database entirely.
 
-    :param begin_time: the earliest time of day to filter events by (e.g., '08:00:00'). Only the time portion is compared, ignoring the date
-    :type begin_time: Optional[str]
-    :param end_time: the latest time of day to filter events by (e.g., '18:00:00'). Only the time portion is compared, ignoring the date
-    :type end_time: Optional[str]
-    :param begin_date: the earliest date to filter events by. Events on or after this date will be included
-    :type begin_date: Optional[str]
-    :param end_date: the latest date to filter events by. Events on or before this date will be included
-    :type end_date: Optional[str]
-    :param is_weekday: filter events by weekday (True for Monday-Friday, False for Saturday-Sunday). If None, no weekday filtering is applied
-    :type is_weekday: Optional[bool]
-    :param organization_id: one or more organization IDs to filter by. Only events belonging to these organizations will be returned. If omitted, events from all organizations are returned
-    :type organization_id: Optional[List[int]]
-    :param availability: one or more availability options to filter by. Accepts 'Mornings' (06:00-11:59), 'Afternoons' (12:00-16:59), 'Evenings' (17:00-21:59), 'Weekends', or 'Flexible' (no restriction). Multiple values are combined with OR logic. If not provided or 'Flexible' is included, no availability filtering is applied
-    :type availability: Optional[List[str]]
-    :param category: one or more category names to filter by. Only events with a matching category will be returned
-    :type category: Optional[List[str]]
-    :param limit: the maximum number of events to return. If omitted, all matching events are returned
-    :type limit: Optional[int]
-    :param _conn: the connection to the database
-    :type _conn: sqlite3.Connection
+    :return: the SQL condition (without the ``WHERE`` keyword) and its parameters
+    :rtype: Optional[tuple[str, list]]
     """
-    query = "SELECT id, name, description, location, date_time, organization_id, category FROM events WHERE 1=1"
-    params = []
+    conditions = ["1=1"]
+    params: list = []
 
     # Apply time-based filtering - compares only the time portion, ignoring date
     if begin_time is not None:
-        query += " AND time(date_time) >= time(?)"
+        conditions.append("time(date_time) >= time(?)")
         params.append(begin_time)
 
     if end_time is not None:
-        query += " AND time(date_time) <= time(?)"
+        conditions.append("time(date_time) <= time(?)")
         params.append(end_time)
 
     # Apply date-based filtering
-    # Note: This assumes date_time column might contain date information or we use SQLite date functions
+    # date_time is stored as an ISO 8601 string starting with the date, so comparing
+    # the raw column against a date string is equivalent to comparing date(date_time),
+    # and lets SQLite use the date_time index instead of scanning every row.
     if begin_date is not None:
-        query += " AND date(date_time) >= date(?)"
+        conditions.append("date_time >= date(?)")
         params.append(begin_date)
 
     if end_date is not None:
-        query += " AND date(date_time) <= date(?)"
+        conditions.append("date_time < date(?, '+1 day')")
         params.append(end_date)
 
     # Apply weekday filtering using SQLite's strftime function
@@ -80,22 +227,21 @@ def list_events(
     if is_weekday is not None:
         if is_weekday:
             # Weekdays: Monday(1) through Friday(5)
-            query += (
-                " AND CAST(strftime('%w', date(date_time)) AS INTEGER) BETWEEN 1 AND 5"
+            conditions.append(
+                "CAST(strftime('%w', date(date_time)) AS INTEGER) BETWEEN 1 AND 5"
             )
         else:
             # Weekends: Saturday(6) and Sunday(0)
-            query += " AND (strftime('%w', date(date_time)) IN ('0', '6'))"
+            conditions.append("(strftime('%w', date(date_time)) IN ('0', '6'))")
 
     # Filter by one or more organization IDs
     # Handle empty list case: if organization_id is explicitly an empty list,
     # return no results (user has no orgs to view)
     if organization_id is not None:
         if len(organization_id) == 0:
-            # Empty list means no organizations to filter by - return empty result set
-            return []
+            return None
         placeholders = ",".join("?" * len(organization_id))
-        query += f" AND organization_id IN ({placeholders})"
+        conditions.append(f"organization_id IN ({placeholders})")
         params.extend(organization_id)
 
     # Filter by availability options using OR logic across all selected options.
@@ -107,55 +253,936 @@ def list_events(
                 availability_conditions.append(
                     "(strftime('%w', date(date_time)) IN ('0', '6'))"
                 )
-            elif option == "Mornings":
+            elif option in AVAILABILITY_TIME_WINDOWS:
+                window_start, window_end = AVAILABILITY_TIME_WINDOWS[option]
                 availability_conditions.append(
-                    "(time(date_time) BETWEEN '06:00' AND '11:59')"
-                )
-            elif option == "Afternoons":
-                availability_conditions.append(
-                    "(time(date_time) BETWEEN '12:00' AND '16:59')"
-                )
-            elif option == "Evenings":
-                availability_conditions.append(
-                    "(time(date_time) BETWEEN '17:00' AND '21:59')"
+                    f"(time(date_time) BETWEEN '{window_start}' AND '{window_end}')"
                 )
         if availability_conditions:
-            query += " AND (" + " OR ".join(availability_conditions) + ")"
+            conditions.append("(" + " OR ".join(availability_conditions) + ")")
 
     if category:
         placeholders = ",".join("?" * len(category))
-        query += f" AND category IN ({placeholders})"
+        conditions.append(f"category IN ({placeholders})")
         params.extend(category)
 
     # Option A: free-text substring match on location field
     if location:
-        query += " AND LOWER(location) LIKE LOWER(?)"
+        conditions.append("LOWER(location) LIKE LOWER(?)")
         params.append(f"%{location}%")
 
-    query += " ORDER BY date_time ASC"
+    return " AND ".join(conditions), params
 
-    if limit is not None:
-        query += " LIMIT ?"
-        params.append(limit)
 
-    rows = _conn.execute(query, params).fetchall()
+def _compute_event_facets(
+    _conn: sqlite3.Connection,
+    where_sql: str,
+    params: list,
+    occurrences: Iterable[Event] = (),
+) -> EventFacets:
+    """
+    Count the events matching ``where_sql``, plus the given occurrences of recurring
+    events, per category, organization, weekday/weekend and availability bucket.
+
+    All facets come from a single grouped scan over the filtered rows: SQLite groups by
+    every facet dimension at once and the (small) grouped result is folded into the
+    individual facets here, instead of running one COUNT query per facet.
+    """
+    case_windows = " ".join(
+        f"WHEN time(date_time) BETWEEN '{window_start}' AND '{window_end}' THEN '{name}'"
+        for name, (window_start, window_end) in AVAILABILITY_TIME_WINDOWS.items()
+    )
+    rows = _conn.execute(
+        f"""
+        SELECT category,
+               organization_id,
+               strftime('%w', date(date_time)) IN ('0', '6') AS is_weekend,
+               CASE {case_windows} ELSE NULL END AS time_window,
+               COUNT(*) AS event_count
+        FROM events
+        WHERE {where_sql}
+        GROUP BY category, organization_id, is_weekend, time_window
+        """,
+        params,
+    ).fetchall()
+
+    facets = EventFacets(
+        day_type={"weekday": 0, "weekend": 0},
+        availability={name: 0 for name in [*AVAILABILITY_TIME_WINDOWS, "Weekends"]},
+    )
+    total = 0
+    for row in rows:
+        count = row["event_count"]
+        total += count
+        if row["category"] is not None:
+            facets.category[row["category"]] = (
+                facets.category.get(row["category"], 0) + count
+            )
+        facets.organization_id[row["organization_id"]] = (
+            facets.organization_id.get(row["organization_id"], 0) + count
+        )
+        if row["is_weekend"]:
+            facets.day_type["weekend"] += count
+            facets.availability["Weekends"] += count
+        else:
+            facets.day_type["weekday"] += count
+        if row["time_window"] is not None:
+            facets.availability[row["time_window"]] += count
+    for event in occurrences:
+        total += 1
+        if event.category is not None:
+            facets.category[event.category] = facets.category.get(event.category, 0) + 1
+        facets.organization_id[event.organization_id] = (
+            facets.organization_id.get(event.organization_id, 0) + 1
+        )
+        if event.date_time.weekday() >= 5:
+            facets.day_type["weekend"] += 1
+            facets.availability["Weekends"] += 1
+        else:
+            facets.day_type["weekday"] += 1
+        seconds = _seconds_of_day(event.date_time)
+        for name, (window_start, window_end) in _AVAILABILITY_SECONDS.items():
+            if window_start <= seconds < window_end:
+                facets.availability[name] += 1
+    # 'Flexible' applies no restriction, so it matches every event in the filter set
+    facets.availability["Flexible"] = total
+    return facets
+
+
+# the filter of each facet's dimension, see _facets_for_filters
+_FACET_FILTERS = {
+    "category": "category",
+    "organization_id": "organization_id",
+    "day_type": "is_weekday",
+    "availability": "availability",
+}
+
+
+def _facets_for_filters(_conn: sqlite3.Connection, filters: dict) -> EventFacets:
+    """
+    The facets of the events matching ``filters``, the keyword arguments of
+    ``_build_event_filters``. Each facet counts how many events each of its choices
+    would return, so it is computed with the filter of its own dimension left out and
+    the others kept: filtering on a category still shows the counts of the other
+    categories. Facets whose filter is unset share one scan.
+    """
+
+    def count(filters: dict) -> EventFacets:
+        built = _build_event_filters(**filters)
+        if built is None:
+            return EventFacets()
+        where_sql, params = built
+        return _compute_event_facets(
+            _conn, where_sql, params, _query_occurrences(_conn, **filters)
+        )
+
+    facets = count(filters)
+    for facet, name in _FACET_FILTERS.items():
+        if filters[name] is not None:
+            setattr(facets, facet, getattr(count({**filters, name: None}), facet))
+    return facets
+
+
+def _event_from_row(row: sqlite3.Row) -> Event:
+    """Build an Event from a row selected with ``_EVENT_SELECT_SQL``."""
+    return Event(
+        id=row["id"],
+        name=row["name"],
+        description=row["description"],
+        location=row["location"],
+        date_time=row["date_time"],
+        organization_id=row["organization_id"],
+        category=row["category"],
+        capacity=row["capacity"],
+        duration_minutes=row["duration_minutes"],
+        registration_count=row["registration_count"],
+        series_id=row["series_id"],
+    )
+
+
+def _event_dict(row: sqlite3.Row) -> dict:
+    """
+    The response dict of a row selected with ``_EVENT_SELECT_SQL``, the same as its
+    Event's but without building one (see ``utils/fast_json.py``). Render it with
+    ``utc_z`` so ``date_time`` is written like Event's.
+    """
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "location": row["location"],
+        "date_time": datetime.fromisoformat(row["date_time"]),
+        "organization_id": row["organization_id"],
+        "category": row["category"],
+        "capacity": row["capacity"],
+        "duration_minutes": row["duration_minutes"],
+        "registration_count": row["registration_count"],
+        "series_id": row["series_id"],
+    }
+
+
+def _fetch_event_rows_by_ids(
+    _conn: sqlite3.Connection, event_ids: list[int], select_sql: str = _EVENT_SELECT_SQL
+) -> list[sqlite3.Row]:
+    """
+    Load the rows of the events with the given ids, returned in the same order as
+    ``event_ids``. Ids that no longer exist are skipped.
+    """
+    rows_by_id = {}
+    # stay well below SQLite's limit on the number of bound parameters
+    for start in range(0, len(event_ids), 500):
+        chunk = event_ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in _conn.execute(
+            f"{select_sql} WHERE events.id IN ({placeholders})",
+            chunk,
+        ):
+            rows_by_id[row["id"]] = row
     return [
-        Event(
-            id=row["id"],
-            name=row["name"],
-            description=row["description"],
-            location=row["location"],
-            date_time=row["date_time"],
-            organization_id=row["organization_id"],
-            category=row["category"],
+        row
+        for row in (rows_by_id.get(event_id) for event_id in event_ids)
+        if row is not None
+    ]
+
+
+def _fetch_events_by_ids(
+    _conn: sqlite3.Connection, event_ids: list[int]
+) -> list[Event]:
+    """Load the events with the given ids, in the same order as ``event_ids``."""
+    return [_event_from_row(row) for row in _fetch_event_rows_by_ids(_conn, event_ids)]
+
+
+def _shape_events(
+    _conn: sqlite3.Connection,
+    events: Iterable[Event | sqlite3.Row],
+    fields: Optional[list[str]],
+    expand: list[str],
+) -> list[dict]:
+    """
+    Turn events, as Events or rows selected with ``_event_select_sql(fields, expand)``,
+    into response dicts holding only ``fields`` (every field when None) and the
+    requested expansions.
+
+    Occurrences of recurring events are Events without the joined organization columns,
+    so their organization summaries are loaded with one extra query.
+    """
+    events = list(events)
+    fields = list(_EVENT_FIELD_SQL) if fields is None else fields
+    organizations: dict[int, dict] = {}
+    if "organization" in expand:
+        missing = list(
+            {event.organization_id for event in events if isinstance(event, Event)}
         )
-        for row in rows
+        for start in range(0, len(missing), 500):
+            chunk = missing[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in _conn.execute(
+                f"""
+                SELECT organization_id, name, category FROM organizations
+                WHERE organization_id IN ({placeholders})
+                """,
+                chunk,
+            ):
+                organizations[row["organization_id"]] = dict(row)
+
+    shaped = []
+    for event in events:
+        if isinstance(event, Event):
+            item = {name: getattr(event, name) for name in fields}
+            organization = organizations.get(event.organization_id)
+        else:
+            item = {name: event[name] for name in fields}
+            if "date_time" in item:
+                # serialized like Event.date_time
+                item["date_time"] = datetime.fromisoformat(item["date_time"])
+            organization = None
+            if "organization" in expand and event["organization_name"] is not None:
+                organization = {
+                    "organization_id": event["organization_id"],
+                    "name": event["organization_name"],
+                    "category": event["organization_category"],
+                }
+        if "organization" in expand:
+            item["organization"] = organization
+        shaped.append(item)
+    return shaped
+
+
+def _seconds_of_day(value: datetime) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _event_sort_key(event: Event | sqlite3.Row) -> tuple[datetime, int]:
+    """The ``list_events`` order, date_time then id, as a key for merging."""
+    if isinstance(event, sqlite3.Row):
+        return parse_date_time(event["date_time"]) or datetime.min, event["id"]
+    value = event.date_time
+    if value.tzinfo is not None:
+        value = parse_date_time(value.isoformat())
+    return value, event.id
+
+
+def _occurrence_event(series: sqlite3.Row, index: int, value: datetime) -> Event:
+    """Build the Event of a virtual (not materialized) occurrence of a series."""
+    return Event(
+        id=occurrence_id(series["id"], index),
+        name=series["name"],
+        description=series["description"],
+        location=series["location"],
+        date_time=value,
+        organization_id=series["organization_id"],
+        category=series["category"],
+        capacity=series["capacity"],
+        duration_minutes=series["duration_minutes"],
+        series_id=series["id"],
+    )
+
+
+def _occurrence_filter(
+    begin_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    is_weekday: Optional[bool] = None,
+    availability: Optional[List[str]] = None,
+) -> Optional[Callable[[datetime], bool]]:
+    """
+    Python equivalent of the per-row conditions of ``_build_event_filters``, for
+    occurrences of recurring events that only exist in memory. Returns ``None`` when
+    nothing can match, like SQLite comparing against an unparsable time.
+    """
+    time_bounds = []
+    for value in (begin_time, end_time):
+        if value is None:
+            time_bounds.append(None)
+            continue
+        try:
+            time_bounds.append(_seconds_of_day(time.fromisoformat(value)))
+        except ValueError:
+            return None
+    begin_seconds, end_seconds = time_bounds
+
+    windows = None
+    if availability and "Flexible" not in availability:
+        windows = [
+            _AVAILABILITY_SECONDS[option]
+            for option in availability
+            if option in _AVAILABILITY_SECONDS
+        ]
+        # weekends are the whole of Saturday and Sunday
+        weekends = "Weekends" in availability
+        # unknown options alone apply no filter, same as the SQL path
+        if not windows and not weekends:
+            windows = None
+
+    def matches(value: datetime) -> bool:
+        seconds = _seconds_of_day(value)
+        is_weekend = value.weekday() >= 5
+        if begin_seconds is not None and seconds < begin_seconds:
+            return False
+        if end_seconds is not None and seconds > end_seconds:
+            return False
+        if is_weekday is not None and is_weekend == is_weekday:
+            return False
+        if windows is not None and not (
+            (weekends and is_weekend)
+            or any(start <= seconds < end for start, end in windows)
+        ):
+            return False
+        return True
+
+    return matches
+
+
+def _query_occurrences(
+    _conn: sqlite3.Connection,
+    begin_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    begin_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    is_weekday: Optional[bool] = None,
+    organization_id: Optional[List[int]] = None,
+    availability: Optional[List[str]] = None,
+    category: Optional[List[str]] = None,
+    location: Optional[str] = None,
+) -> Iterator[Event]:
+    """
+    Expand the virtual occurrences of the recurring events matching the ``list_events``
+    filters, lazily and in ``list_events`` order.
+
+    Only the occurrences inside the requested date window are generated, up to
+    ``RECURRENCE_WINDOW_DAYS`` ahead when the query has no ``end_date``. Occurrences
+    that were materialized are skipped, their stored rows come from the events query.
+    """
+    matches = _occurrence_filter(begin_time, end_time, is_weekday, availability)
+    if matches is None or organization_id == []:
+        return iter(())
+    try:
+        start = (
+            datetime.combine(date.fromisoformat(begin_date[:10]), time())
+            if begin_date is not None
+            else None
+        )
+        end = (
+            datetime.combine(
+                date.fromisoformat(end_date[:10]) + timedelta(days=1), time()
+            )
+            if end_date is not None
+            else datetime.combine(
+                (start.date() if start is not None else date.today())
+                + timedelta(days=RECURRENCE_WINDOW_DAYS),
+                time(),
+            )
+        )
+    except ValueError:
+        # SQLite's date() returns NULL for these, which matches nothing
+        return iter(())
+
+    conditions = ["first_date_time < ?"]
+    params: list = [str(end)]
+    if start is not None:
+        conditions.append("(until IS NULL OR until >= ?)")
+        params.append(start.date().isoformat())
+    if organization_id is not None:
+        placeholders = ",".join("?" * len(organization_id))
+        conditions.append(f"organization_id IN ({placeholders})")
+        params.extend(organization_id)
+    if category:
+        placeholders = ",".join("?" * len(category))
+        conditions.append(f"category IN ({placeholders})")
+        params.extend(category)
+    if location:
+        conditions.append("LOWER(location) LIKE LOWER(?)")
+        params.append(f"%{location}%")
+    series_rows = _conn.execute(
+        f"{SERIES_SELECT_SQL} WHERE {' AND '.join(conditions)}", params
+    ).fetchall()
+    if not series_rows:
+        return iter(())
+
+    exceptions: dict[int, set[date]] = {}
+    materialized: dict[int, set[int]] = {}
+    series_ids = [row["id"] for row in series_rows]
+    for chunk_start in range(0, len(series_ids), 500):
+        chunk = series_ids[chunk_start : chunk_start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in _conn.execute(
+            f"SELECT series_id, occurrence_date FROM event_series_exceptions WHERE series_id IN ({placeholders})",
+            chunk,
+        ):
+            exceptions.setdefault(row[0], set()).add(date.fromisoformat(row[1]))
+        for row in _conn.execute(
+            f"SELECT series_id, occurrence_index FROM events WHERE series_id IN ({placeholders})",
+            chunk,
+        ):
+            materialized.setdefault(row[0], set()).add(row[1])
+
+    def occurrences_of(series: sqlite3.Row) -> Iterator[Event]:
+        first = parse_date_time(series["first_date_time"])
+        if first is None:
+            return
+        until = date.fromisoformat(series["until"]) if series["until"] else None
+        skipped = materialized.get(series["id"], set())
+        for index, value in expand_occurrences(
+            first,
+            series["frequency"],
+            series["interval"],
+            until,
+            start,
+            end,
+            exceptions.get(series["id"], ()),
+        ):
+            if index not in skipped and matches(value):
+                yield _occurrence_event(series, index, value)
+
+    return heapq.merge(
+        *(occurrences_of(series) for series in series_rows), key=_event_sort_key
+    )
+
+
+def _merge_events(
+    events: Iterable[Event | sqlite3.Row],
+    occurrences: Iterator[Event],
+    limit: Optional[int],
+) -> list[Event | sqlite3.Row]:
+    """
+    Merge stored events (as Events or rows) and expanded occurrences, both already in
+    ``list_events`` order, stopping as soon as ``limit`` events were produced.
+    """
+    merged = heapq.merge(events, occurrences, key=_event_sort_key)
+    # like SQLite, a negative limit means no limit
+    if limit is not None and limit >= 0:
+        merged = islice(merged, limit)
+    return list(merged)
+
+
+def _fetch_event(_conn: sqlite3.Connection, event_id: int) -> Optional[Event]:
+    """
+    Load a single event, which may be a virtual occurrence of a recurring event.
+    """
+    occurrence = parse_occurrence_id(event_id)
+    if occurrence is None:
+        events = _fetch_events_by_ids(_conn, [event_id])
+        return events[0] if events else None
+
+    series_id, index = occurrence
+    materialized_id = find_materialized(_conn, series_id, index)
+    if materialized_id is not None:
+        return _fetch_event(_conn, materialized_id)
+    series = _conn.execute(f"{SERIES_SELECT_SQL} WHERE id = ?", (series_id,)).fetchone()
+    if series is None:
+        return None
+    value = is_valid_occurrence(series, index, load_exceptions(_conn, series_id))
+    if value is None:
+        return None
+    return _occurrence_event(series, index, value)
+
+
+def _materialize_for_admin(
+    _conn: sqlite3.Connection, event_id: int, current_user: dict, action: str
+) -> int:
+    """
+    Turn a virtual occurrence id into the id of its stored row, materializing it if
+    needed, so it can be updated or deleted like any other event. Ids of stored events
+    are returned unchanged. Only admins of the series' organization may do this.
+    """
+    occurrence = parse_occurrence_id(event_id)
+    if occurrence is None:
+        return event_id
+    series_id, index = occurrence
+    series = _conn.execute(
+        "SELECT organization_id FROM event_series WHERE id = ?", (series_id,)
+    ).fetchone()
+    if series is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+        )
+    role_row = _conn.execute(
+        "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ?",
+        (series["organization_id"], current_user["user_id"]),
+    ).fetchone()
+    if role_row is None or role_row["permission_level"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Only organization admins can {action} events",
+        )
+    materialized_id = materialize_occurrence(_conn, series_id, index)
+    if materialized_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
+        )
+    _conn.commit()
+    event_index.upsert(_conn, materialized_id)
+    return materialized_id
+
+
+def _query_events(
+    _conn: sqlite3.Connection,
+    begin_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    begin_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    is_weekday: Optional[bool] = None,
+    organization_id: Optional[List[int]] = None,
+    availability: Optional[List[str]] = None,
+    category: Optional[List[str]] = None,
+    location: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_facets: bool = False,
+    fields: Optional[list[str]] = None,
+    expand: Optional[list[str]] = None,
+    fast: bool = False,
+) -> list[Event] | list[dict] | EventListWithFacets | dict:
+    """
+    Run the ``list_events`` query, bypassing the result cache. Parameters have the same
+    meaning as in ``list_events``, with ``fields`` and ``expand`` already parsed.
+
+    Stored events and the occurrences of recurring events are both produced in
+    ``date_time`` order and merged lazily, so only as many occurrences are expanded as
+    the page needs.
+
+    Without ``fields`` and ``expand`` events are returned as Events, otherwise the SQL
+    only selects the requested columns and events are returned as dicts. When ``fast``
+    the result is only meant for ``fast_json.render``: stored events are response dicts
+    instead of Events, and a result with facets is a dict.
+    """
+    expand = expand or []
+    shaped = fields is not None or bool(expand)
+    # rows are kept as they are and mapped once the page is merged
+    keep_rows = shaped or fast
+    select_sql = _event_select_sql(fields, expand) if shaped else _EVENT_SELECT_SQL
+    filters = _build_event_filters(
+        begin_time=begin_time,
+        end_time=end_time,
+        begin_date=begin_date,
+        end_date=end_date,
+        is_weekday=is_weekday,
+        organization_id=organization_id,
+        availability=availability,
+        category=category,
+        location=location,
+    )
+    if filters is None:
+        # Empty list means no organizations to filter by - return empty result set
+        if include_facets:
+            if shaped or fast:
+                return {"events": [], "facets": EventFacets()}
+            return EventListWithFacets(events=[], facets=EventFacets())
+        return []
+    where_sql, params = filters
+    occurrence_filters = {
+        "begin_time": begin_time,
+        "end_time": end_time,
+        "begin_date": begin_date,
+        "end_date": end_date,
+        "is_weekday": is_weekday,
+        "organization_id": organization_id,
+        "availability": availability,
+        "category": category,
+        "location": location,
+    }
+
+    # Upcoming-event queries can be answered from the in-memory index, which only
+    # hands back the matching ids; anything it can't answer exactly goes to SQL.
+    if not include_facets:
+        event_ids = event_index.search(
+            _conn,
+            begin_time=begin_time,
+            end_time=end_time,
+            begin_date=begin_date,
+            end_date=end_date,
+            is_weekday=is_weekday,
+            organization_id=organization_id,
+            availability=availability,
+            category=category,
+            location=location,
+            limit=limit,
+        )
+        if event_ids is not None:
+            rows = _fetch_event_rows_by_ids(_conn, event_ids, select_sql)
+            events = _merge_events(
+                rows if keep_rows else map(_event_from_row, rows),
+                _query_occurrences(_conn, **occurrence_filters),
+                limit,
+            )
+            return _finish_events(_conn, events, fields, expand, fast)
+
+    query = f"{select_sql} WHERE {where_sql} ORDER BY date_time ASC, id ASC"
+    query_params = list(params)
+
+    if limit is not None:
+        query += " LIMIT ?"
+        query_params.append(limit)
+
+    cursor = _conn.execute(query, query_params)
+    events = _merge_events(
+        cursor if keep_rows else map(_event_from_row, cursor),
+        _query_occurrences(_conn, **occurrence_filters),
+        limit,
+    )
+    events = _finish_events(_conn, events, fields, expand, fast)
+
+    if include_facets:
+        facets = _facets_for_filters(_conn, occurrence_filters)
+        if shaped or fast:
+            return {"events": events, "facets": facets}
+        return EventListWithFacets(events=events, facets=facets)
+    return events
+
+
+def _finish_events(
+    _conn: sqlite3.Connection,
+    events: list[Event | sqlite3.Row],
+    fields: Optional[list[str]],
+    expand: list[str],
+    fast: bool,
+) -> list:
+    """Map the merged page of ``_query_events`` to what it returns."""
+    if fields is not None or expand:
+        return _shape_events(_conn, events, fields, expand)
+    if fast:
+        # occurrences are Events already
+        return [
+            _event_dict(event) if isinstance(event, sqlite3.Row) else event
+            for event in events
+        ]
+    return events
+
+
+def _query_events_by_ids(
+    _conn: sqlite3.Connection,
+    event_ids: list[int],
+    fields: Optional[list[str]] = None,
+    expand: Optional[list[str]] = None,
+) -> EventBatch | dict:
+    """
+    Look up events by id for ``list_events(ids=...)``, keeping the order of
+    ``event_ids``. Stored events are loaded with a single query, ids of occurrences of
+    recurring events are resolved from their series.
+    """
+    expand = expand or []
+    shaped = fields is not None or bool(expand)
+    select_sql = _event_select_sql(fields, expand) if shaped else _EVENT_SELECT_SQL
+    stored_ids = [
+        event_id for event_id in event_ids if parse_occurrence_id(event_id) is None
     ]
+    events_by_id: dict[int, Event | sqlite3.Row] = {
+        row["id"]: row
+        for row in _fetch_event_rows_by_ids(_conn, stored_ids, select_sql)
+    }
+    for event_id in event_ids:
+        if event_id not in events_by_id and parse_occurrence_id(event_id) is not None:
+            event = _fetch_event(_conn, event_id)
+            if event is not None:
+                events_by_id[event_id] = event
+
+    events, missing_ids = order_by_ids(events_by_id, event_ids)
+    if shaped:
+        return {
+            "events": _shape_events(_conn, events, fields, expand),
+            "missing_ids": missing_ids,
+        }
+    return EventBatch(
+        events=[
+            event if isinstance(event, Event) else _event_from_row(event)
+            for event in events
+        ],
+        missing_ids=missing_ids,
+    )
+
+
+def _stream_events(
+    filters: dict,
+    limit: Optional[int],
+    fields: Optional[list[str]],
+    expand: list[str],
+) -> Iterator[dict]:
+    """
+    Yield the ``list_events`` results one at a time as response dicts, for the streamed
+    formats. ``filters`` are the ``list_events`` filter parameters.
+
+    The cursor is read in chunks of ``STREAM_CHUNK_SIZE`` rows and merged lazily with
+    the occurrences of recurring events, so memory doesn't grow with the result. This
+    runs on its own connection, the request's connection is closed before a streamed
+    body is sent. It reads until the client has received the last row, which doesn't
+    hold up writers since the database is in WAL mode (see ``init_db``).
+    """
+    conn = connect()
+    try:
+        event_filters = _build_event_filters(**filters)
+        if event_filters is None:
+            return
+        where_sql, params = event_filters
+        query = (
+            f"{_event_select_sql(fields, expand)} WHERE {where_sql}"
+            " ORDER BY date_time ASC, id ASC"
+        )
+        query_params = list(params)
+        if limit is not None:
+            query += " LIMIT ?"
+            query_params.append(limit)
+        cursor = conn.execute(query, query_params)
+
+        def rows() -> Iterator[sqlite3.Row]:
+            while chunk := cursor.fetchmany(STREAM_CHUNK_SIZE):
+                yield from chunk
+
+        merged: Iterator = heapq.merge(
+            rows(), _query_occurrences(conn, **filters), key=_event_sort_key
+        )
+        # like SQLite, a negative limit means no limit
+        if limit is not None and limit >= 0:
+            merged = islice(merged, limit)
+        for chunk in chunked(merged):
+            yield from _shape_events(conn, chunk, fields, expand)
+    finally:
+        conn.close()
+
+
+@router.get("", response_model=None)
+def list_events(
+    request: Request,
+    response: Response,
+    # TODO: improve type
+    begin_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    begin_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    is_weekday: Optional[bool] = None,
+    organization_id: Optional[List[int]] = Query(default=None),
+    availability: Optional[List[str]] = Query(default=None),
+    category: Optional[List[str]] = Query(default=None),
+    # TODO: Option B — split location into city/state columns for structured filtering
+    location: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_facets: bool = False,
+    fields: Optional[List[str]] = Query(default=None),
+    expand: Optional[List[str]] = Query(default=None),
+    ids: Optional[List[str]] = Query(default=None),
+    format: Optional[str] = None,
+    _conn=Depends(get_connection),
+):
+    """
+    Get a list of all events with optional filtering by date/time and availability matching.
+    Supports filtering by time range, date range, weekday/weekend, and organization.
+
+    Occurrences of recurring events are included, expanded for the requested date range
+    (or the next year when there is no ``end_date``).
+
+    Responses have an ETag that changes when events, registrations, series or
+    organizations are written to. Send it back in ``If-None-Match`` to get a 304 when
+    nothing changed.
+
+    **note** time values must be in the format 'HH:MM' a value such as "8:00" will not work properly, it should be "08:00"
+
+    :param begin_time: the earliest time of day to filter events by (e.g., '08:00:00'). Only the time portion is compared, ignoring the date
+    :type begin_time: Optional[str]
+    :param end_time: the latest time of day to filter events by (e.g., '18:00:00'). Only the time portion is compared, ignoring the date
+    :type end_time: Optional[str]
+    :param begin_date: the earliest date to filter events by. Events on or after this date will be included
+    :type begin_date: Optional[str]
+    :param end_date: the latest date to filter events by. Events on or before this date will be included
+    :type end_date: Optional[str]
+    :param is_weekday: filter events by weekday (True for Monday-Friday, False for Saturday-Sunday). If None, no weekday filtering is applied
+    :type is_weekday: Optional[bool]
+    :param organization_id: one or more organization IDs to filter by. Only events belonging to these organizations will be returned. If omitted, events from all organizations are returned
+    :type organization_id: Optional[List[int]]
+    :param availability: one or more availability options to filter by. Accepts 'Mornings' (06:00-11:59), 'Afternoons' (12:00-16:59), 'Evenings' (17:00-21:59), 'Weekends', or 'Flexible' (no restriction). Multiple values are combined with OR logic. If not provided or 'Flexible' is included, no availability filtering is applied
+    :type availability: Optional[List[str]]
+    :param category: one or more category names to filter by. Only events with a matching category will be returned
+    :type category: Optional[List[str]]
+    :param limit: the maximum number of events to return. If omitted, all matching events are returned when streamed, and at most ``MAX_EVENT_LIST_LIMIT`` events otherwise. A larger limit on a non-streamed list is rejected with 400, stream the list to read more
+    :type limit: Optional[int]
+    :param include_facets: when True, the response is an object with the matching ``events`` and ``facets``, the number of events per category, organization, weekday/weekend and availability option for the current filters. Each facet ignores its own filter (``category``, ``organization_id``, ``is_weekday`` and ``availability``), so it counts what each of its choices would return. Facet counts ignore ``limit``
+    :type include_facets: bool
+    :param fields: the event fields to return, repeated or comma separated (e.g. 'id,name,date_time'). ``id`` is always returned. If omitted, every field is returned
+    :type fields: Optional[List[str]]
+    :param expand: related objects to embed in each event. 'organization' adds an ``organization`` object with the organization's ``organization_id``, ``name`` and ``category``, loaded in the same query
+    :type expand: Optional[List[str]]
+    :param ids: look up these events instead of filtering, repeated or comma separated (e.g. '1,2,3'), at most ``MAX_BATCH_IDS``. The response is an object with the ``events`` in the requested order and the ``missing_ids`` that don't exist. The other filters are ignored, ``fields`` and ``expand`` still apply
+    :type ids: Optional[List[str]]
+    :param format: 'json' (default), or 'ndjson' or 'csv' to stream the events one per line as they are read, without a size limit. Sending ``Accept: application/x-ndjson`` also selects 'ndjson'. Streamed formats don't support ``include_facets``. Non-streamed responses are sent as MessagePack instead of JSON to clients sending ``Accept: application/msgpack``
+    :type format: Optional[str]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    versions = get_table_versions(
+        _conn, "events", "event_registrations", "event_series", "organizations"
+    )
+    media_type = negotiate_media_type(request)
+    # recurring events are expanded from today when there is no begin_date
+    etag = make_etag(
+        "list_events",
+        sorted(request.query_params.multi_items()),
+        NDJSON_MEDIA_TYPE in request.headers.get("accept", ""),
+        media_type,
+        versions,
+        date.today(),
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if ids is not None:
+        return fast_response(
+            _query_events_by_ids(
+                _conn,
+                parse_ids(ids),
+                _parse_event_fields(fields),
+                _parse_event_expand(expand),
+            ),
+            media_type,
+            dict(response.headers),
+        )
+
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "ndjson" if NDJSON_MEDIA_TYPE in accept else "json"
+    if format not in EVENT_LIST_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown format: {format}",
+        )
+    filters = {
+        "begin_time": begin_time,
+        "end_time": end_time,
+        "begin_date": begin_date,
+        "end_date": end_date,
+        "is_weekday": is_weekday,
+        "organization_id": organization_id,
+        "availability": availability,
+        "category": category,
+        "location": location,
+    }
+    if format != "json":
+        if include_facets:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="include_facets is not supported for streamed formats",
+            )
+        parsed_fields = _parse_event_fields(fields)
+        parsed_expand = _parse_event_expand(expand)
+        events = _stream_events(filters, limit, parsed_fields, parsed_expand)
+        if format == "ndjson":
+            return StreamingResponse(
+                ndjson_chunks(events),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=dict(response.headers),
+            )
+        columns = list(parsed_fields or _EVENT_FIELD_SQL)
+        if "organization" in parsed_expand:
+            columns += [
+                "organization_organization_id",
+                "organization_name",
+                "organization_category",
+            ]
+        return StreamingResponse(
+            csv_chunks(events, columns),
+            media_type=CSV_MEDIA_TYPE,
+            headers=dict(response.headers),
+        )
+
+    if limit is not None and limit > MAX_EVENT_LIST_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Limit cannot be more than {MAX_EVENT_LIST_LIMIT}, "
+            "use format=ndjson to stream larger lists",
+        )
+    # like SQLite, a negative limit means no limit, which is capped as well
+    if limit is None or limit < 0:
+        limit = MAX_EVENT_LIST_LIMIT
+    params = {
+        **filters,
+        "limit": limit,
+        "include_facets": include_facets,
+        "fields": _parse_event_fields(fields),
+        "expand": _parse_event_expand(expand),
+    }
+    cache_key = make_cache_key("list_events", {**params, "media_type": media_type})
+    # only lists expanding the organization depend on organizations
+    version = versions if params["expand"] else versions[:3]
+    # the rendered body is cached, a hit is sent without serializing anything
+    body = result_cache.get(cache_key, version)
+    if body is None:
+
+        def load():
+            loaded = render(
+                _query_events(_conn, fast=True, **params),
+                media_type,
+                utc_z=params["fields"] is None and not params["expand"],
+            )
+            result_cache.set(cache_key, version, loaded)
+            return loaded
+
+        # identical concurrent misses share a single query instead of stampeding
+        body = single_flight.do((cache_key, version), load)
+    return fast_response(body, media_type, dict(response.headers))
 
 
 @router.get("/recommended", response_model=list[Event])
 def recommended_events(
+    request: Request,
     limit: int = 10,
+    fields: Optional[List[str]] = Query(default=None),
+    expand: Optional[List[str]] = Query(default=None),
     _conn: sqlite3.Connection = Depends(get_connection),
     current_user: dict = Depends(get_current_user),
 ):
@@ -170,9 +1197,17 @@ def recommended_events(
 
     :param limit: maximum number of events to return (default 10)
     :type limit: int
+    :param fields: the event fields to return, as in ``list_events``. The events then only have these fields instead of the documented ``Event`` schema
+    :type fields: Optional[List[str]]
+    :param expand: related objects to embed in each event, as in ``list_events``
+    :type expand: Optional[List[str]]
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
+    fields = _parse_event_fields(fields)
+    expand = _parse_event_expand(expand)
+    shaped = fields is not None or bool(expand)
+    select_sql = _event_select_sql(fields, expand) if shaped else _EVENT_SELECT_SQL
     user_id = current_user["user_id"]
     # Load the user's interest categories
     interest_rows = _conn.execute(
@@ -183,8 +1218,7 @@ def recommended_events(
     if interests:
         placeholders = ",".join("?" * len(interests))
         query = f"""
-            SELECT id, name, description, location, date_time, organization_id, category
-            FROM events
+            {select_sql}
             WHERE id NOT IN (
                 SELECT event_id FROM event_registrations WHERE user_id = ?
             )
@@ -194,9 +1228,8 @@ def recommended_events(
         """
         params: list = [user_id] + interests + [limit]
     else:
-        query = """
-            SELECT id, name, description, location, date_time, organization_id, category
-            FROM events
+        query = f"""
+            {select_sql}
             WHERE id NOT IN (
                 SELECT event_id FROM event_registrations WHERE user_id = ?
             )
@@ -206,36 +1239,160 @@ def recommended_events(
         params = [user_id, limit]
 
     rows = _conn.execute(query, params).fetchall()
-    return [Event(**dict(row)) for row in rows]
+    media_type = negotiate_media_type(request)
+    if shaped:
+        return fast_response(_shape_events(_conn, rows, fields, expand), media_type)
+    return fast_response([_event_dict(row) for row in rows], media_type, utc_z=True)
+
+
+@router.get("/calendar", response_model=list[EventCalendarDay])
+def event_calendar(
+    start_date: date,
+    end_date: date,
+    organization_id: Optional[List[int]] = Query(default=None),
+    category: Optional[List[str]] = Query(default=None),
+    _conn: sqlite3.Connection = Depends(get_connection),
+):
+    """
+    Get the number of events, registrations and open seats for each day in a date range,
+    for a month or year calendar heatmap. Days without events are omitted.
+
+    Served from the per-day ``event_day_rollups`` table, which triggers keep up to date on
+    every event and registration write, so a full year is at most 365 summed rows per
+    organization/category instead of every event row.
+
+    :param start_date: the first day of the calendar (inclusive)
+    :type start_date: date
+    :param end_date: the last day of the calendar (inclusive), at most 366 days after start_date
+    :type end_date: date
+    :param organization_id: one or more organization IDs to count events for. If omitted, events from all organizations are counted
+    :type organization_id: Optional[List[int]]
+    :param category: one or more event category names to count events for. If omitted, events of every category are counted
+    :type category: Optional[List[str]]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date",
+        )
+    if (end_date - start_date).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The calendar range cannot be longer than a year",
+        )
+
+    query = """
+        SELECT day,
+               SUM(event_count) AS event_count,
+               SUM(registration_count) AS registration_count,
+               MAX(SUM(open_seats), 0) AS open_seats
+        FROM event_day_rollups
+        WHERE day BETWEEN ? AND ?
+    """
+    params: list = [start_date.isoformat(), end_date.isoformat()]
+    if organization_id:
+        placeholders = ",".join("?" * len(organization_id))
+        query += f" AND organization_id IN ({placeholders})"
+        params.extend(organization_id)
+    if category:
+        placeholders = ",".join("?" * len(category))
+        query += f" AND category IN ({placeholders})"
+        params.extend(category)
+    query += " GROUP BY day HAVING SUM(event_count) > 0 ORDER BY day"
+
+    rows = _conn.execute(query, params).fetchall()
+    return [
+        EventCalendarDay(
+            day=row["day"],
+            event_count=row["event_count"],
+            registration_count=row["registration_count"],
+            open_seats=row["open_seats"],
+        )
+        for row in rows
+    ]
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_event_updates(
+    request: Request,
+    ids: List[str] = Query(),
+    last_event_id: Optional[int] = None,
+):
+    """
+    Push updates of events to the client as server-sent events, instead of polling
+    ``get_event``: an ``update`` message with the event, including its registration
+    count, whenever the event or its registrations change, and a ``delete`` message
+    (with only the id) once it is deleted or if it doesn't exist.
+
+    The stream starts with the current state of every event. Bursts of changes are
+    coalesced into one message per event. Message ids are cursors: a reconnecting
+    ``EventSource`` sends the last one as ``Last-Event-ID`` and only gets the events
+    that changed since.
+
+    :param ids: the events to watch, repeated and/or comma separated, at most ``MAX_BATCH_IDS``
+    :type ids: List[str]
+    :param last_event_id: resume after this message id, for clients that can't send the ``Last-Event-ID`` header
+    :type last_event_id: Optional[int]
+    """
+    event_ids = parse_ids(ids)
+    header = request.headers.get("last-event-id")
+    if header is not None:
+        if not header.isdigit():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID"
+            )
+        last_event_id = int(header)
+    return StreamingResponse(
+        live_updates.stream(event_ids, last_event_id),
+        media_type="text/event-stream",
+        # keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{event_id}", response_model=Event)
-def get_event(event_id: int, _conn=Depends(get_connection)):
+def get_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    _conn=Depends(get_connection),
+):
     """
-    Get a single event by its ID.
+    Get a single event by its ID, which may be the ID of an occurrence of a recurring event.
+
+    Responses have an ETag that changes when the event or its registrations change. Send
+    it back in ``If-None-Match`` to get a 304 when nothing changed. Send
+    ``Accept: application/msgpack`` to get the event as MessagePack.
 
     :param event_id: the ID of the event to retrieve
     :type event_id: int
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
-    row = _conn.execute(
-        "SELECT id, name, description, location, date_time, organization_id, category FROM events WHERE id = ?",
-        (event_id,),
-    ).fetchone()
-    if row is None:
+    if parse_occurrence_id(event_id) is None:
+        version = (get_row_version(_conn, "event", event_id),)
+    else:
+        # an occurrence that was never stored is read from its series
+        version = get_table_versions(
+            _conn, "events", "event_registrations", "event_series"
+        )
+    media_type = negotiate_media_type(request)
+    not_modified = check_etag(
+        request, response, make_etag("get_event", event_id, media_type, version)
+    )
+    if not_modified is not None:
+        return not_modified
+    # a request after a write doesn't join a load that started before it
+    event = single_flight.do(
+        ("get_event", event_id, version), lambda: _fetch_event(_conn, event_id)
+    )
+    if event is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
         )
-    return Event(
-        id=row["id"],
-        name=row["name"],
-        description=row["description"],
-        location=row["location"],
-        date_time=row["date_time"],
-        organization_id=row["organization_id"],
-        category=row["category"],
-    )
+    return fast_response(event, media_type, dict(response.headers))
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -264,7 +1421,7 @@ def add_event(
         )
 
     cursor = _conn.execute(
-        "INSERT INTO events (name, description, location, date_time, organization_id, category) VALUES (?, ?, ?, ?, ?, ?)",
+        "INSERT INTO events (name, description, location, date_time, organization_id, category, capacity, duration_minutes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
         (
             payload.name,
             payload.description,
@@ -272,9 +1429,12 @@ def add_event(
             payload.date_time,
             payload.organization_id,
             payload.category,
+            payload.capacity,
+            payload.duration_minutes,
         ),
     )
     _conn.commit()
+    event_index.upsert(_conn, cursor.lastrowid)
     return Event(
         id=cursor.lastrowid,
         name=payload.name,
@@ -283,9 +1443,75 @@ def add_event(
         date_time=payload.date_time,
         organization_id=payload.organization_id,
         category=payload.category,
+        capacity=payload.capacity,
+        duration_minutes=payload.duration_minutes,
     )
 
 
+@router.post(
+    "/bulk", response_model=EventBulkCreated, status_code=status.HTTP_201_CREATED
+)
+def add_events_bulk(
+    payload: EventBulkIn,
+    _conn=Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Create many events at once, e.g. a season of events. Only admins of the target
+    organizations may create events.
+
+    Every event is validated before anything is written, and the user must be an admin
+    of all of their organizations (checked once per organization). Then all events are
+    inserted in a single transaction: either every event is created or none is.
+
+    :param payload: the events to create, at most ``MAX_BULK_EVENTS``
+    :type payload: EventBulkIn
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    if len(payload.events) > MAX_BULK_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot create more than {MAX_BULK_EVENTS} events at once",
+        )
+    organization_ids = sorted({event.organization_id for event in payload.events})
+    if organization_ids:
+        placeholders = ",".join("?" * len(organization_ids))
+        admin_organization_ids = {
+            row[0]
+            for row in _conn.execute(
+                f"""
+                SELECT organization_id FROM roles
+                WHERE user_id = ? AND permission_level = 'admin'
+                  AND organization_id IN ({placeholders})
+                """,
+                [_current_user["user_id"], *organization_ids],
+            )
+        }
+        forbidden = [
+            str(organization_id)
+            for organization_id in organization_ids
+            if organization_id not in admin_organization_ids
+        ]
+        if forbidden:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only organization admins can create events (organizations "
+                f"{', '.join(forbidden)})",
+            )
+
+    # one transaction (and one commit) for all the events
+    _conn.execute("BEGIN IMMEDIATE")
+    try:
+        event_ids = insert_events(_conn, payload.events)
+        _conn.commit()
+    except BaseException:
+        _conn.rollback()
+        raise
+    event_index.upsert(_conn, *event_ids)
+    return EventBulkCreated(ids=event_ids)
+
+
 @router.put("/{event_id}", response_model=Event)
 def update_event(
     event_id: int,
@@ -295,7 +1521,8 @@ def update_event(
 ):
     """
     Update an existing event with new data. Only fields provided in the payload will be updated.
-    Only admins of the event's organization may update it.
+    Only admins of the event's organization may update it. Updating an occurrence of a
+    recurring event only changes that occurrence.
 
     :param event_id: the ID of the event to update
     :type event_id: int
@@ -304,12 +1531,9 @@ def update_event(
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
+    event_id = _materialize_for_admin(_conn, event_id, _current_user, "update")
     row = _conn.execute(
-        """
-        SELECT id, name, description, location, date_time, organization_id, category
-        FROM events
-        WHERE id = ?
-        """,
+        f"{_EVENT_SELECT_SQL} WHERE events.id = ?",
         (event_id,),
     ).fetchone()
     if row is None:
@@ -345,11 +1569,24 @@ def update_event(
     updated_category = (
         payload.category if payload.category is not None else row["category"]
     )
+    updated_capacity = (
+        payload.capacity if payload.capacity is not None else row["capacity"]
+    )
+    updated_duration_minutes = (
+        payload.duration_minutes
+        if payload.duration_minutes is not None
+        else row["duration_minutes"]
+    )
+    if updated_capacity is not None and updated_capacity < row["registration_count"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Capacity cannot be lower than the number of registrations",
+        )
 
     _conn.execute(
         """
         UPDATE events
-        SET name = ?, description = ?, location = ?, date_time = ?, organization_id = ?, category = ?
+        SET name = ?, description = ?, location = ?, date_time = ?, organization_id = ?, category = ?, capacity = ?, duration_minutes = ?
         WHERE id = ?
         """,
         (
@@ -359,10 +1596,13 @@ def update_event(
             updated_date_time,
             updated_organization_id,
             updated_category,
+            updated_capacity,
+            updated_duration_minutes,
             event_id,
         ),
     )
     _conn.commit()
+    event_index.upsert(_conn, event_id)
 
     return Event(
         id=event_id,
@@ -372,6 +1612,10 @@ def update_event(
         date_time=updated_date_time,
         organization_id=updated_organization_id,
         category=updated_category,
+        capacity=updated_capacity,
+        duration_minutes=updated_duration_minutes,
+        registration_count=row["registration_count"],
+        series_id=row["series_id"],
     )
 
 
@@ -383,15 +1627,18 @@ def delete_event(
 ):
     """
     Delete an event from the database. Only admins of the event's organization may delete it.
+    Deleting an occurrence of a recurring event cancels only that occurrence.
 
     :param event_id: the ID of the event to delete
     :type event_id: int
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
+    event_id = _materialize_for_admin(_conn, event_id, _current_user, "delete")
     row = _conn.execute(
         """
-        SELECT id, name, description, location, date_time, organization_id
+        SELECT id, name, description, location, date_time, organization_id,
+               series_id, occurrence_index
         FROM events
         WHERE id = ?
         """,
@@ -416,4 +1663,8 @@ def delete_event(
         "DELETE FROM events WHERE id = ?",
         (event_id,),
     )
+    if row["series_id"] is not None:
+        # keep the occurrence from being expanded again now that its row is gone
+        cancel_occurrence(_conn, row["series_id"], row["occurrence_index"])
     _conn.commit()
+    event_index.remove(_conn, event_id)
@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import uuid
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from db import connect
+from models import ImportReport
+from utils.auth import get_current_user
+from utils.bulk_import import import_records, read_records
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+# uploads larger than this are spooled to a temporary file instead of kept in memory
+IMPORT_SPOOL_SIZE = int(os.environ.get("IMPORT_SPOOL_SIZE", str(1024 * 1024)))
+
+
+def _run_import(
+    upload, kind: str, format: str, import_id: str, user_id: int
+) -> ImportReport:
+    conn = connect()
+    try:
+        # utf-8-sig also reads the byte order mark spreadsheet exports start with
+        lines = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        return import_records(
+            conn, kind, read_records(lines, format), import_id, user_id=user_id
+        )
+    finally:
+        conn.close()
+
+
+@router.post("/{kind}", response_model=ImportReport)
+async def bulk_import(
+    kind: Literal["organizations", "events"],
+    request: Request,
+    format: Optional[Literal["jsonl", "csv"]] = None,
+    import_id: Optional[str] = None,
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Import organizations or events in bulk from the request body, a JSON Lines or CSV
+    file, with the same validation as the create routes. Rows are inserted in chunks,
+    one transaction each, and invalid rows are reported with their line number instead
+    of failing the import.
+
+    Imported organizations are created by the user, who becomes their admin. Events can
+    only be imported into organizations the user is an admin of.
+
+    Pass an ``import_id`` to be able to resume: if the import is interrupted, sending
+    the same file again with the same ``import_id`` skips the lines that were already
+    committed (up to the ``line_number`` of the report).
+
+    :param kind: what the file contains, 'organizations' or 'events'
+    :type kind: str
+    :param format: 'jsonl' or 'csv', by default from the Content-Type ('text/csv' for CSV)
+    :type format: Optional[str]
+    :param import_id: identifies the import to resume it, a new import if omitted
+    :type import_id: Optional[str]
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if content_type.startswith("text/csv") else "jsonl"
+    import_id = import_id or uuid.uuid4().hex
+    user_id = _current_user["user_id"]
+
+    # the body is spooled instead of parsed as it arrives because the import is
+    # synchronous and runs in the threadpool
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as upload:
+        async for data in request.stream():
+            upload.write(data)
+        upload.seek(0)
+        try:
+            report = await run_in_threadpool(
+                _run_import,
+                upload,
+                kind,
+                format,
+                # users can't resume each other's imports
+                f"user-{user_id}:{import_id}",
+                user_id,
+            )
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The file must be UTF-8 encoded",
+            )
+        except ValueError as error:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    report.import_id = import_id
+    return report
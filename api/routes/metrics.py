@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+
+from utils.compression import compression_stats
+from utils.live_updates import live_updates
+from utils.result_cache import result_cache
+from utils.single_flight import single_flight
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+def get_metrics():
+    """
+    Return in-process performance counters, such as the result cache hit/miss/eviction
+    counts, how many reads were coalesced onto an in-flight query and how much responses
+    were compressed and how long it took. Counters are per server process and reset when
+    it restarts.
+    """
+    return {
+        "result_cache": result_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "live_updates": live_updates.stats(),
+        "compression": compression_stats.stats(),
+    }
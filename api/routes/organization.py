@@ -1,24 +1,129 @@
 import sqlite3
-
-from fastapi import APIRouter, Depends, HTTPException, status
-
-from db import get_connection
-from models import Organization, OrganizationCreate, OrganizationUpdate
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from db import get_connection, get_row_version, get_table_versions
+from models import (
+    EventFillRate,
+    EventWeeklyRegistrations,
+    Organization,
+    OrganizationAnalytics,
+    OrganizationBatch,
+    OrganizationCreate,
+    OrganizationUpdate,
+    VolunteerActivityWeek,
+)
+from routes.organization_exports import router as organization_exports_router
 from routes.organization_roles import router as organization_roles_router
 from utils.auth import get_current_user
+from utils.batch_ids import order_by_ids, parse_ids
+from utils.etag import check_etag, make_etag
+from utils.fast_json import fast_response, negotiate_media_type, render
+from utils.result_cache import make_cache_key, result_cache
+from utils.single_flight import single_flight
 
 router = APIRouter(prefix="/organization", tags=["organization"])
 
+# Every column of an Organization response. Member counts come from the trigger-maintained
+# organization_counters table and upcoming events from the per-day event_day_rollups, so
+# they are read in the same query instead of a COUNT(*) per organization.
+_ORGANIZATION_SELECT_SQL = """
+    SELECT organizations.organization_id, organizations.name, organizations.description,
+           organizations.category, organizations.created_by_user_id,
+           COALESCE(organization_counters.admin_count, 0) AS admin_count,
+           COALESCE(organization_counters.volunteer_count, 0) AS volunteer_count,
+           (
+               SELECT COALESCE(SUM(event_day_rollups.event_count), 0)
+               FROM event_day_rollups
+               WHERE event_day_rollups.organization_id = organizations.organization_id
+                 AND event_day_rollups.day >= date('now')
+           ) AS upcoming_event_count
+    FROM organizations
+    LEFT JOIN organization_counters
+        ON organization_counters.organization_id = organizations.organization_id
+"""
+
+
+def _organization_from_row(row: sqlite3.Row) -> Organization:
+    """Build an Organization from a row selected with ``_ORGANIZATION_SELECT_SQL``."""
+    return Organization(
+        organization_id=row["organization_id"],
+        name=row["name"],
+        description=row["description"],
+        category=row["category"],
+        created_by_user_id=row["created_by_user_id"],
+        admin_count=row["admin_count"],
+        volunteer_count=row["volunteer_count"],
+        upcoming_event_count=row["upcoming_event_count"],
+    )
+
+
+def _organization_dict(row: sqlite3.Row) -> dict:
+    """
+    The response dict of a row selected with ``_ORGANIZATION_SELECT_SQL``, the same as
+    its Organization's but without building one (see ``utils/fast_json.py``).
+    """
+    return {
+        "organization_id": row["organization_id"],
+        "name": row["name"],
+        "description": row["description"],
+        "category": row["category"],
+        "created_by_user_id": row["created_by_user_id"],
+        "admin_count": row["admin_count"],
+        "volunteer_count": row["volunteer_count"],
+        "upcoming_event_count": row["upcoming_event_count"],
+    }
+
+
+def _query_organizations(
+    _conn: sqlite3.Connection,
+    skip: int,
+    limit: int,
+    query: str | None,
+    fast: bool = False,
+) -> list[Organization] | list[dict]:
+    """
+    Run the ``list_organizations`` query, bypassing the result cache. Parameters have the
+    same meaning as in ``list_organizations``. When ``fast`` organizations are returned
+    as response dicts instead of Organizations.
+    """
+    base_sql = _ORGANIZATION_SELECT_SQL
+    params: list[object] = []
+    if query:
+        base_sql += """
+            WHERE lower(name) LIKE ?
+               OR lower(description) LIKE ?
+        """
+        term = f"%{query.lower()}%"
+        params.extend([term, term])
+
+    base_sql += " ORDER BY organizations.organization_id LIMIT ? OFFSET ?"
+    params.extend([limit, skip])
+
+    rows = _conn.execute(base_sql, params).fetchall()
+    if fast:
+        return [_organization_dict(row) for row in rows]
+    return [_organization_from_row(row) for row in rows]
+
 
-@router.get("", response_model=list[Organization])
+@router.get("", response_model=list[Organization] | OrganizationBatch)
 def list_organizations(
+    request: Request,
+    response: Response,
     _conn: sqlite3.Connection = Depends(get_connection),
     skip: int = 0,
     limit: int = 10,
     query: str | None = None,
+    ids: Optional[List[str]] = Query(default=None),
 ):
     """
-    List organizations with pagination and optional search query.
+    List organizations with pagination and optional search query. Send
+    ``Accept: application/msgpack`` to get the list as MessagePack.
+
+    Responses have an ETag that changes when organizations, their members or their
+    events change. Send it back in ``If-None-Match`` to get a 304 when nothing changed.
 
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
@@ -28,34 +133,61 @@ def list_organizations(
     :type limit: int, optional
     :param query: optional search query to filter organizations by name or description, defaults to None
     :type query: str | None, optional
+    :param ids: look up these organizations instead of listing, repeated or comma separated (e.g. '1,2,3'), at most ``MAX_BATCH_IDS``. The response is an object with the ``organizations`` in the requested order and the ``missing_ids`` that don't exist
+    :type ids: Optional[List[str]], optional
     """
-    base_sql = """
-        SELECT organization_id, name, description, category, created_by_user_id
-        FROM organizations
-    """
-    params: list[object] = []
-    if query:
-        base_sql += """
-            WHERE lower(name) LIKE ?
-               OR lower(description) LIKE ?
-        """
-        term = f"%{query.lower()}%"
-        params.extend([term, term])
+    media_type = negotiate_media_type(request)
+    version = get_table_versions(_conn, "organizations", "roles", "events")
+    etag = make_etag(
+        "list_organizations",
+        sorted(request.query_params.multi_items()),
+        media_type,
+        version,
+        # the upcoming event counts go down as days pass
+        date.today(),
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if ids is not None:
+        organization_ids = parse_ids(ids)
+        placeholders = ",".join("?" * len(organization_ids))
+        rows = _conn.execute(
+            f"""
+            {_ORGANIZATION_SELECT_SQL}
+            WHERE organizations.organization_id IN ({placeholders})
+            """,
+            organization_ids,
+        ).fetchall()
+        organizations, missing_ids = order_by_ids(
+            {row["organization_id"]: _organization_from_row(row) for row in rows},
+            organization_ids,
+        )
+        return fast_response(
+            OrganizationBatch(organizations=organizations, missing_ids=missing_ids),
+            media_type,
+            dict(response.headers),
+        )
 
-    base_sql += " ORDER BY organization_id LIMIT ? OFFSET ?"
-    params.extend([limit, skip])
+    cache_key = make_cache_key(
+        "list_organizations",
+        {"skip": skip, "limit": limit, "query": query, "media_type": media_type},
+    )
+    # the rendered body is cached, a hit is sent without serializing anything
+    body = result_cache.get(cache_key, version)
+    if body is None:
 
-    rows = _conn.execute(base_sql, params).fetchall()
-    return [
-        Organization(
-            organization_id=row["organization_id"],
-            name=row["name"],
-            description=row["description"],
-            category=row["category"],
-            created_by_user_id=row["created_by_user_id"],
-        )
-        for row in rows
-    ]
+        def load():
+            loaded = render(
+                _query_organizations(_conn, skip, limit, query, fast=True), media_type
+            )
+            result_cache.set(cache_key, version, loaded)
+            return loaded
+
+        # identical concurrent misses share a single query instead of stampeding
+        body = single_flight.do((cache_key, version), load)
+    return fast_response(body, media_type, dict(response.headers))
 
 
 @router.post("", response_model=Organization, status_code=status.HTTP_201_CREATED)
@@ -120,38 +252,49 @@ def create_organization(
         description=payload.description,
         category=payload.category,
         created_by_user_id=user_id,
+        admin_count=1,
     )
 
 
 @router.get("/{organization_id}", response_model=Organization)
 def get_organization(
     organization_id: int,
+    request: Request,
+    response: Response,
     _conn: sqlite3.Connection = Depends(get_connection),
 ):
     """
     Get a single organization by ID.
 
+    Responses have an ETag that changes when the organization, its members or its events
+    change. Send it back in ``If-None-Match`` to get a 304 when nothing changed. Send
+    ``Accept: application/msgpack`` to get the organization as MessagePack.
+
     :param organization_id: the ID of the organization to retrieve
     :type organization_id: int
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     """
+    media_type = negotiate_media_type(request)
+    etag = make_etag(
+        "get_organization",
+        organization_id,
+        media_type,
+        get_row_version(_conn, "organization", organization_id),
+        # the upcoming event count goes down as days pass
+        date.today(),
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
     row = _conn.execute(
-        """
-        SELECT organization_id, name, description, category, created_by_user_id
-        FROM organizations
-        WHERE organization_id = ?
-        """,
+        f"{_ORGANIZATION_SELECT_SQL} WHERE organizations.organization_id = ?",
         (organization_id,),
     ).fetchone()
     if row is None:
         raise HTTPException(status_code=404, detail="Organization not found")
-    return Organization(
-        organization_id=row["organization_id"],
-        name=row["name"],
-        description=row["description"],
-        category=row["category"],
-        created_by_user_id=row["created_by_user_id"],
+    return fast_response(
+        _organization_from_row(row), media_type, dict(response.headers)
     )
 
 
@@ -170,11 +313,7 @@ def delete_organization(
     :type _conn: sqlite3.Connection
     """
     row = _conn.execute(
-        """
-        SELECT organization_id, name, description, category, created_by_user_id
-        FROM organizations
-        WHERE organization_id = ?
-        """,
+        f"{_ORGANIZATION_SELECT_SQL} WHERE organizations.organization_id = ?",
         (organization_id,),
     ).fetchone()
     if row is None:
@@ -200,6 +339,9 @@ def delete_organization(
         description=row["description"],
         category=row["category"],
         created_by_user_id=row["created_by_user_id"],
+        admin_count=row["admin_count"],
+        volunteer_count=row["volunteer_count"],
+        upcoming_event_count=row["upcoming_event_count"],
     )
 
 
@@ -221,11 +363,7 @@ def update_organization(
     :type _conn: sqlite3.Connection
     """
     row = _conn.execute(
-        """
-        SELECT organization_id, name, description, category, created_by_user_id
-        FROM organizations
-        WHERE organization_id = ?
-        """,
+        f"{_ORGANIZATION_SELECT_SQL} WHERE organizations.organization_id = ?",
         (organization_id,),
     ).fetchone()
     if row is None:
@@ -271,8 +409,156 @@ def update_organization(
         description=updated_description,
         category=updated_category,
         created_by_user_id=row["created_by_user_id"],
+        admin_count=row["admin_count"],
+        volunteer_count=row["volunteer_count"],
+        upcoming_event_count=row["upcoming_event_count"],
+    )
+
+
+@router.get("/{organization_id}/analytics", response_model=OrganizationAnalytics)
+def get_organization_analytics(
+    organization_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Get dashboard analytics for an organization, if the user is an admin: registrations
+    per event per week, active volunteers per week, and the fill rate of the events with
+    a capacity taking place in the date range.
+
+    Weekly numbers are read from the pre-aggregated ``event_week_registrations`` and
+    ``organization_volunteer_weeks`` rollups (bucketed by the Monday of the week the
+    registrations were made), fill rates from the event registration counters, so the
+    registrations themselves are never scanned.
+
+    :param organization_id: the organization to get analytics for
+    :type organization_id: int
+    :param start_date: the first day of the range (inclusive), defaults to 12 weeks ago
+    :type start_date: Optional[date]
+    :param end_date: the last day of the range (inclusive), defaults to 12 weeks from now
+    :type end_date: Optional[date]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    today = date.today()
+    start_date = start_date or today - timedelta(weeks=12)
+    end_date = end_date or today + timedelta(weeks=12)
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date",
+        )
+    if (end_date - start_date).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The analytics range cannot be longer than a year",
+        )
+
+    organization_row = _conn.execute(
+        "SELECT organization_id FROM organizations WHERE organization_id = ?",
+        (organization_id,),
+    ).fetchone()
+    if organization_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found"
+        )
+
+    role_row = _conn.execute(
+        """
+        SELECT permission_level
+        FROM roles
+        WHERE organization_id = ? AND user_id = ?
+        """,
+        (organization_id, _current_user["user_id"]),
+    ).fetchone()
+    if role_row is None or role_row["permission_level"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organization admins can view analytics",
+        )
+
+    # weeks are keyed by their Monday, so start from the Monday of start_date's week
+    first_week = (start_date - timedelta(days=start_date.weekday())).isoformat()
+    last_week = end_date.isoformat()
+
+    weekly_rows = _conn.execute(
+        """
+        SELECT event_week_registrations.event_id, events.name AS event_name,
+               event_week_registrations.week, event_week_registrations.registration_count
+        FROM event_week_registrations
+        JOIN events ON events.id = event_week_registrations.event_id
+        WHERE event_week_registrations.organization_id = ?
+          AND event_week_registrations.week BETWEEN ? AND ?
+        ORDER BY event_week_registrations.week, event_week_registrations.event_id
+        """,
+        (organization_id, first_week, last_week),
+    ).fetchall()
+
+    activity_rows = _conn.execute(
+        """
+        SELECT week,
+               COUNT(*) AS active_volunteers,
+               SUM(registration_count) AS registration_count
+        FROM organization_volunteer_weeks
+        WHERE organization_id = ? AND week BETWEEN ? AND ?
+        GROUP BY week
+        ORDER BY week
+        """,
+        (organization_id, first_week, last_week),
+    ).fetchall()
+
+    fill_rate_rows = _conn.execute(
+        """
+        SELECT events.id, events.name, events.date_time, events.capacity,
+               COALESCE(event_counters.registration_count, 0) AS registration_count
+        FROM events
+        LEFT JOIN event_counters ON event_counters.event_id = events.id
+        WHERE events.organization_id = ?
+          AND events.date_time >= date(?)
+          AND events.date_time < date(?, '+1 day')
+          AND events.capacity IS NOT NULL
+        ORDER BY events.date_time ASC, events.id ASC
+        """,
+        (organization_id, start_date.isoformat(), end_date.isoformat()),
+    ).fetchall()
+
+    return OrganizationAnalytics(
+        organization_id=organization_id,
+        start_date=start_date,
+        end_date=end_date,
+        weekly_registrations=[
+            EventWeeklyRegistrations(
+                event_id=row["event_id"],
+                event_name=row["event_name"],
+                week=row["week"],
+                registration_count=row["registration_count"],
+            )
+            for row in weekly_rows
+        ],
+        volunteer_activity=[
+            VolunteerActivityWeek(
+                week=row["week"],
+                active_volunteers=row["active_volunteers"],
+                registration_count=row["registration_count"],
+            )
+            for row in activity_rows
+        ],
+        fill_rates=[
+            EventFillRate(
+                event_id=row["id"],
+                event_name=row["name"],
+                date_time=row["date_time"],
+                capacity=row["capacity"],
+                registration_count=row["registration_count"],
+                fill_rate=row["registration_count"] / row["capacity"],
+            )
+            for row in fill_rate_rows
+        ],
     )
 
 
 # TODO: not sure if this is the right pattern or not?
 router.include_router(organization_roles_router, prefix="/{organization_id}/users")
+router.include_router(organization_exports_router, prefix="/{organization_id}/exports")
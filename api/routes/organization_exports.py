@@ -0,0 +1,207 @@
+import sqlite3
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from db import get_connection
+from utils.auth import get_current_user
+from utils.streaming import (
+    CSV_MEDIA_TYPE,
+    JSONL_MEDIA_TYPE,
+    accepts_gzip,
+    csv_chunks,
+    gzip_chunks,
+    ndjson_chunks,
+    stream_query,
+)
+
+router = APIRouter(prefix="")
+
+_ROSTER_COLUMNS = [
+    "cursor",
+    "user_id",
+    "email",
+    "first_name",
+    "last_name",
+    "permission_level",
+    "availability",
+]
+
+_REGISTRATION_COLUMNS = [
+    "cursor",
+    "event_id",
+    "event_name",
+    "event_date_time",
+    "user_id",
+    "email",
+    "first_name",
+    "last_name",
+    "registration_time",
+]
+
+
+def _require_organization_admin(
+    _conn: sqlite3.Connection, organization_id: int, current_user: dict
+) -> None:
+    """Raise 404 if the organization doesn't exist and 403 if the user isn't its admin."""
+    organization_row = _conn.execute(
+        "SELECT organization_id FROM organizations WHERE organization_id = ?",
+        (organization_id,),
+    ).fetchone()
+    if organization_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found"
+        )
+    role_row = _conn.execute(
+        "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ?",
+        (organization_id, current_user["user_id"]),
+    ).fetchone()
+    if role_row is None or role_row["permission_level"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organization admins can export organization data",
+        )
+
+
+def _parse_cursor(cursor: Optional[str], parts: int) -> Optional[list[int]]:
+    """Split a resume cursor into its ``parts`` integers, raising 400 if malformed."""
+    if cursor is None:
+        return None
+    values = cursor.split("-")
+    if len(values) != parts or not all(value.isdigit() for value in values):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return [int(value) for value in values]
+
+
+def _export_response(
+    request: Request,
+    rows: Iterator[dict],
+    columns: list[str],
+    format: str,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Stream ``rows`` as CSV or JSON Lines, gzip encoded on the fly when the client accepts
+    it.
+    """
+    if format == "csv":
+        chunks = csv_chunks(rows, columns)
+        media_type = CSV_MEDIA_TYPE
+    else:
+        chunks = ndjson_chunks(rows)
+        media_type = JSONL_MEDIA_TYPE
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            gzip_chunks(chunks), media_type=media_type, headers=headers
+        )
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+@router.get("/roster")
+def export_organization_roster(
+    organization_id: int,
+    request: Request,
+    format: Literal["csv", "jsonl"] = "csv",
+    cursor: Optional[str] = None,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Export every member of an organization with their role and contact details, if the
+    user is an admin of the organization.
+
+    Rows are streamed from a server-side cursor as they are read, ordered by user, and
+    gzip encoded on the fly when the request accepts it. Every row has a ``cursor``; if
+    a download is interrupted, request again with the ``cursor`` of the last row
+    received to get the rows after it.
+
+    :param organization_id: the organization to export the members of
+    :type organization_id: int
+    :param format: 'csv' (default) or 'jsonl' (one JSON object per line)
+    :type format: str
+    :param cursor: resume after the row with this cursor
+    :type cursor: Optional[str]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    _require_organization_admin(_conn, organization_id, _current_user)
+    after = _parse_cursor(cursor, 1)
+    rows = stream_query(
+        """
+        SELECT CAST(r.user_id AS TEXT) AS cursor, r.user_id, u.email, u.first_name,
+               u.last_name, r.permission_level, u.availability
+        FROM roles r
+        JOIN users u ON u.user_id = r.user_id
+        WHERE r.organization_id = ? AND r.user_id > ?
+        ORDER BY r.user_id
+        """,
+        (organization_id, after[0] if after else 0),
+    )
+    return _export_response(
+        request,
+        rows,
+        _ROSTER_COLUMNS,
+        format,
+        f"organization-{organization_id}-roster",
+    )
+
+
+@router.get("/registrations")
+def export_organization_registrations(
+    organization_id: int,
+    request: Request,
+    format: Literal["csv", "jsonl"] = "csv",
+    event_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Export the registration history of an organization's events, if the user is an
+    admin of the organization: every registration with its event and volunteer.
+
+    Streamed and resumable like the roster export, ordered by event then user.
+
+    :param organization_id: the organization to export the registrations of
+    :type organization_id: int
+    :param format: 'csv' (default) or 'jsonl' (one JSON object per line)
+    :type format: str
+    :param event_id: only export the registrations of this event
+    :type event_id: Optional[int]
+    :param cursor: resume after the row with this cursor
+    :type cursor: Optional[str]
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    _require_organization_admin(_conn, organization_id, _current_user)
+    after = _parse_cursor(cursor, 2) or [0, 0]
+    query = """
+        SELECT er.event_id || '-' || er.user_id AS cursor, er.event_id,
+               e.name AS event_name, e.date_time AS event_date_time, er.user_id,
+               u.email, u.first_name, u.last_name, er.registration_time
+        FROM event_registrations er
+        JOIN events e ON e.id = er.event_id
+        JOIN users u ON u.user_id = er.user_id
+        WHERE er.organization_id = ? AND (er.event_id, er.user_id) > (?, ?)
+    """
+    params: list = [organization_id, *after]
+    if event_id is not None:
+        query += " AND er.event_id = ?"
+        params.append(event_id)
+    query += " ORDER BY er.event_id, er.user_id"
+    rows = stream_query(query, params)
+    return _export_response(
+        request,
+        rows,
+        _REGISTRATION_COLUMNS,
+        format,
+        f"organization-{organization_id}-registrations",
+    )
@@ -1,3 +1,4 @@
+import os
 import sqlite3
 from typing import Literal, Optional
 
@@ -5,7 +6,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, PositiveInt
 
 from db import get_connection
-from models import RoleAndUser, RoleUpdate
+from models import (
+    RoleAndUser,
+    RoleBulkRequest,
+    RoleBulkResponse,
+    RoleBulkResult,
+    RoleUpdate,
+)
 from utils.auth import get_current_user
 
 
@@ -16,6 +23,9 @@ class RoleCreateRequest(BaseModel):
 
 router = APIRouter(prefix="")
 
+# operations applied by one bulk request, they share a single transaction
+MAX_BULK_ROLE_OPERATIONS = int(os.environ.get("MAX_BULK_ROLE_OPERATIONS", "500"))
+
 
 @router.get("", response_model=list[RoleAndUser])
 def list_organization_users(
@@ -235,3 +245,154 @@ def update_organization_user_role(
         name=f"{row['first_name']} {row['last_name']}",
         permission_level=payload.permission_level,
     )
+
+
+@router.post(
+    "/bulk",
+    response_model=RoleBulkResponse,
+    summary="Add, update and remove many members of an organization",
+)
+def bulk_update_organization_users(
+    organization_id: int,
+    payload: RoleBulkRequest,
+    _conn: sqlite3.Connection = Depends(get_connection),
+    _current_user: dict = Depends(get_current_user),
+):
+    """
+    Apply a list of add, update and remove operations to the members of an organization
+    in one request, e.g. to onboard a volunteer roster. Only organization admins can do
+    this.
+
+    Operations are applied in order, in a single transaction. Each one gets its own
+    result with the status it would have had as a single request (e.g. 404 if the user
+    doesn't exist, 409 if they already have a role), and a failing operation doesn't
+    stop the others.
+
+    :param organization_id: the organization to update the members of
+    :type organization_id: int
+    :param payload: the operations, at most ``MAX_BULK_ROLE_OPERATIONS``
+    :type payload: RoleBulkRequest
+    :param _conn: the connection to the database
+    :type _conn: sqlite3.Connection
+    """
+    if len(payload.operations) > MAX_BULK_ROLE_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot apply more than "
+            f"{MAX_BULK_ROLE_OPERATIONS} operations at once",
+        )
+    organization_row = _conn.execute(
+        "SELECT organization_id FROM organizations WHERE organization_id = ?",
+        (organization_id,),
+    ).fetchone()
+    if organization_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found"
+        )
+
+    # the write lock is taken before reading the current roles, so they can't change
+    # until the operations are applied
+    _conn.execute("BEGIN IMMEDIATE")
+    try:
+        admin_row = _conn.execute(
+            "SELECT permission_level FROM roles WHERE organization_id = ? AND user_id = ? AND permission_level = 'admin'",
+            (organization_id, _current_user["user_id"]),
+        ).fetchone()
+        if admin_row is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only organization admins can manage members in bulk",
+            )
+
+        # every user of the request with their current role, in a single query
+        user_ids = sorted({operation.user_id for operation in payload.operations})
+        names: dict[int, str] = {}
+        initial_roles: dict[int, Optional[str]] = {}
+        if user_ids:
+            placeholders = ",".join("?" * len(user_ids))
+            for row in _conn.execute(
+                f"""
+                SELECT u.user_id, u.first_name, u.last_name, r.permission_level
+                FROM users u
+                LEFT JOIN roles r
+                  ON r.user_id = u.user_id AND r.organization_id = ?
+                WHERE u.user_id IN ({placeholders})
+                """,
+                [organization_id, *user_ids],
+            ):
+                names[row["user_id"]] = f"{row['first_name']} {row['last_name']}"
+                initial_roles[row["user_id"]] = row["permission_level"]
+
+        roles = dict(initial_roles)
+        results = []
+        for operation in payload.operations:
+            user_id = operation.user_id
+            result = RoleBulkResult(
+                action=operation.action,
+                user_id=user_id,
+                status=status.HTTP_200_OK,
+            )
+            results.append(result)
+            if user_id not in names:
+                result.status = status.HTTP_404_NOT_FOUND
+                result.detail = "User not found"
+                continue
+            current = roles[user_id]
+            if operation.action == "add" and current is not None:
+                result.status = status.HTTP_409_CONFLICT
+                result.detail = "User already has a role in this organization"
+                continue
+            if operation.action != "add" and current is None:
+                result.status = status.HTTP_404_NOT_FOUND
+                result.detail = "User is not a member of this organization"
+                continue
+            if operation.action == "add":
+                result.status = status.HTTP_201_CREATED
+            roles[user_id] = (
+                None if operation.action == "remove" else operation.permission_level
+            )
+            result.role = RoleAndUser(
+                user_id=user_id,
+                organization_id=organization_id,
+                name=names[user_id],
+                permission_level=current
+                if operation.action == "remove"
+                else operation.permission_level,
+            )
+
+        # write the net change of each user, whatever the operations that led to it
+        inserted, updated, deleted = [], [], []
+        for user_id, permission_level in roles.items():
+            initial = initial_roles[user_id]
+            if permission_level == initial:
+                continue
+            if initial is None:
+                inserted.append((user_id, organization_id, permission_level))
+            elif permission_level is None:
+                deleted.append((organization_id, user_id))
+            else:
+                updated.append((permission_level, organization_id, user_id))
+        _conn.executemany(
+            "DELETE FROM roles WHERE organization_id = ? AND user_id = ?", deleted
+        )
+        _conn.executemany(
+            """
+            UPDATE roles
+            SET permission_level = ?
+            WHERE organization_id = ? AND user_id = ?
+            """,
+            updated,
+        )
+        _conn.executemany(
+            """
+            INSERT INTO roles (user_id, organization_id, permission_level)
+            VALUES (?, ?, ?)
+            """,
+            inserted,
+        )
+        _conn.commit()
+    except BaseException:
+        _conn.rollback()
+        raise
+
+    return RoleBulkResponse(results=results)
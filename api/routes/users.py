@@ -1,28 +1,56 @@
 import sqlite3
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from db import get_connection
-from models import User
+from models import User, UserBatch
 from models.user import UserUpdate
 from utils.auth import get_current_user
+from utils.batch_ids import order_by_ids, parse_ids
+from utils.fast_json import fast_response, negotiate_media_type
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("", response_model=list[User])
+def _user_dict(row: sqlite3.Row) -> dict:
+    """
+    The response dict of a row of the ``list_users`` query, the same as its User's but
+    without building one (see ``utils/fast_json.py``).
+    """
+    return {
+        "user_id": row["user_id"],
+        "email": row["email"],
+        "first_name": row["first_name"],
+        "last_name": row["last_name"],
+        "availability": row["availability"],
+        "skills": row["skills"] or "",
+        "interests": row["interests_str"].split(",") if row["interests_str"] else [],
+    }
+
+
+def _user_from_row(row: sqlite3.Row) -> User:
+    """Build a User from a row of the ``list_users`` query."""
+    return User(**_user_dict(row))
+
+
+@router.get("", response_model=list[User] | UserBatch)
 def list_users(
+    request: Request,
     _conn: sqlite3.Connection = Depends(get_connection),
     skip: int = 0,
     limit: int = 10,
     query: str | None = None,
     availability: str | None = None,
+    ids: Optional[List[str]] = Query(default=None),
 ):
     """
     List users with pagination, optional search query and the ability to filter by specific properties, currently supporting:
 
     - availability
 
+    Send ``Accept: application/msgpack`` to get the list as MessagePack.
+
     :param _conn: the connection to the database
     :type _conn: sqlite3.Connection
     :param skip: number of records to skip for pagination, defaults to 0
@@ -31,6 +59,8 @@ def list_users(
     :type limit: int, optional
     :param query: optional search query to filter users by email, first name, or last name, defaults to None
     :type query: str | None, optional
+    :param ids: look up these users instead of listing, repeated or comma separated (e.g. '1,2,3'), at most ``MAX_BATCH_IDS``. The response is an object with the ``users`` in the requested order and the ``missing_ids`` that don't exist
+    :type ids: Optional[List[str]], optional
     """
 
     base_sql = """
@@ -53,25 +83,32 @@ def list_users(
         conditions.append("u.availability = ?")
         params.append(availability)
 
+    user_ids = parse_ids(ids) if ids is not None else None
+    if user_ids is not None:
+        # a lookup by id ignores the search filters and pagination
+        conditions = [f"u.user_id IN ({','.join('?' * len(user_ids))})"]
+        params = list(user_ids)
+
     if conditions:
         base_sql += " WHERE " + " AND ".join(conditions)
 
+    if user_ids is not None:
+        rows = _conn.execute(base_sql + " GROUP BY u.user_id", params).fetchall()
+        users, missing_ids = order_by_ids(
+            {row["user_id"]: _user_from_row(row) for row in rows}, user_ids
+        )
+        return fast_response(
+            UserBatch(users=users, missing_ids=missing_ids),
+            negotiate_media_type(request),
+        )
+
     base_sql += " GROUP BY u.user_id ORDER BY u.user_id LIMIT ? OFFSET ?"
     params.extend([limit, skip])
 
     rows = _conn.execute(base_sql, params).fetchall()
-    return [
-        User(
-            user_id=row["user_id"],
-            email=row["email"],
-            first_name=row["first_name"],
-            last_name=row["last_name"],
-            availability=row["availability"],
-            skills=row["skills"] or "",
-            interests=row["interests_str"].split(",") if row["interests_str"] else [],
-        )
-        for row in rows
-    ]
+    return fast_response(
+        [_user_dict(row) for row in rows], negotiate_media_type(request)
+    )
 
 
 ## All the users can modify the data. No permission level check is implemented yet
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from utils.batch_ids import MAX_ID, order_by_ids, parse_ids
+
+
+def test_parse_ids_keeps_request_order_without_duplicates():
+    assert parse_ids(["3,1", "2", " 1 ,,3"]) == [3, 1, 2]
+
+
+def test_parse_ids_accepts_the_largest_sqlite_integer():
+    assert parse_ids([str(MAX_ID)]) == [MAX_ID]
+
+
+@pytest.mark.parametrize(
+    "value", ["0", "-1", "abc", "1.5", "²", str(MAX_ID + 1), "99999999999999999999"]
+)
+def test_parse_ids_rejects_invalid_ids(value):
+    with pytest.raises(HTTPException) as error:
+        parse_ids([value])
+    assert error.value.status_code == 400
+    assert error.value.detail == f"Invalid id: {value}"
+
+
+def test_parse_ids_limits_the_number_of_ids():
+    with pytest.raises(HTTPException) as error:
+        parse_ids(["1,2,3"], max_ids=2)
+    assert error.value.status_code == 400
+
+
+def test_order_by_ids_reports_missing_ids():
+    assert order_by_ids({1: "a", 3: "c"}, [3, 2, 1]) == (["c", "a"], [2])
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import db
+from routes.events import _stream_events
+from utils.streaming import stream_query
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "app.db")
+    db.init_db()
+
+
+def test_init_db_enables_wal(database):
+    conn = db.connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_an_open_stream_does_not_block_writes(database, monkeypatch):
+    conn = db.connect()
+    conn.executemany(
+        "INSERT INTO users (email, first_name, last_name) VALUES (?, 'A', 'B')",
+        [(f"{number}@example.com",) for number in range(5)],
+    )
+    conn.commit()
+    monkeypatch.setattr("utils.streaming.STREAM_CHUNK_SIZE", 2)
+    rows = stream_query("SELECT user_id FROM users ORDER BY user_id")
+    assert next(rows)["user_id"] == 1
+
+    writer = sqlite3.connect(db.DATABASE_PATH, timeout=0.1)
+    writer.execute("UPDATE users SET first_name = 'C' WHERE user_id = 5")
+    writer.commit()
+    writer.close()
+
+    assert [row["user_id"] for row in rows] == [2, 3, 4, 5]
+    conn.close()
+
+
+def test_a_streamed_event_list_does_not_block_writes(database):
+    conn = db.connect()
+    conn.execute(
+        "INSERT INTO users (email, first_name, last_name) VALUES ('a@example.com', 'A', 'B')"
+    )
+    conn.execute(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES ('One', '', 'animal_welfare', 1)"
+    )
+    conn.executemany(
+        "INSERT INTO events (name, description, location, date_time, organization_id) VALUES ('e', 'd', 'l', ?, 1)",
+        [
+            ((datetime(2030, 1, 1) + timedelta(hours=hour)).isoformat(),)
+            for hour in range(1200)
+        ],
+    )
+    conn.commit()
+    filters = dict.fromkeys(
+        [
+            "begin_time",
+            "end_time",
+            "begin_date",
+            "end_date",
+            "is_weekday",
+            "organization_id",
+            "availability",
+            "category",
+            "location",
+        ]
+    )
+    events = _stream_events(filters, None, ["id"], [])
+    assert next(events) == {"id": 1}
+
+    writer = sqlite3.connect(db.DATABASE_PATH, timeout=0.1)
+    writer.execute("UPDATE events SET name = 'f' WHERE id = 1200")
+    writer.commit()
+    writer.close()
+
+    assert [event["id"] for event in events] == list(range(2, 1201))
+    conn.close()
@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+from routes.events import _facets_for_filters
+from utils.db_schema import DB_SCHEMA
+
+FILTERS = {
+    "begin_time": None,
+    "end_time": None,
+    "begin_date": None,
+    "end_date": None,
+    "is_weekday": None,
+    "organization_id": None,
+    "availability": None,
+    "category": None,
+    "location": None,
+}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DB_SCHEMA)
+    conn.execute(
+        "INSERT INTO users (email, first_name, last_name) VALUES ('a@example.com', 'A', 'B')"
+    )
+    conn.executemany(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES (?, '', 'animal_welfare', 1)",
+        [("One",), ("Two",)],
+    )
+    # 2030-01-07 is a Monday, 2030-01-12 a Saturday
+    conn.executemany(
+        "INSERT INTO events (name, description, location, date_time, organization_id, category) VALUES ('e', 'd', 'l', ?, ?, ?)",
+        [
+            ("2030-01-07T09:00:00", 1, "Animal Welfare"),
+            ("2030-01-07T14:00:00", 1, "Animal Welfare"),
+            ("2030-01-12T09:00:00", 1, "Arts & Culture"),
+            ("2030-01-12T19:00:00", 2, "Arts & Culture"),
+            ("2030-01-08T19:00:00", 2, "Disaster Relief"),
+        ],
+    )
+    yield conn
+    conn.close()
+
+
+def test_facets_without_filters_count_every_event(conn):
+    facets = _facets_for_filters(conn, FILTERS)
+    assert facets.category == {
+        "Animal Welfare": 2,
+        "Arts & Culture": 2,
+        "Disaster Relief": 1,
+    }
+    assert facets.organization_id == {1: 3, 2: 2}
+    assert facets.day_type == {"weekday": 3, "weekend": 2}
+    assert facets.availability["Flexible"] == 5
+
+
+def test_a_facet_ignores_its_own_filter(conn):
+    facets = _facets_for_filters(conn, {**FILTERS, "category": ["Animal Welfare"]})
+    # every category, with the counts choosing it would return
+    assert facets.category == {
+        "Animal Welfare": 2,
+        "Arts & Culture": 2,
+        "Disaster Relief": 1,
+    }
+    # the other facets are narrowed by the category
+    assert facets.organization_id == {1: 2}
+    assert facets.day_type == {"weekday": 2, "weekend": 0}
+
+
+def test_facets_keep_the_other_dimensions_filters(conn):
+    facets = _facets_for_filters(
+        conn, {**FILTERS, "organization_id": [2], "is_weekday": False}
+    )
+    # categories of organization 2 on weekends
+    assert facets.category == {"Arts & Culture": 1}
+    # organizations on weekends, whatever the organization filter
+    assert facets.organization_id == {1: 1, 2: 1}
+    # days of organization 2, whatever the weekday filter
+    assert facets.day_type == {"weekday": 1, "weekend": 1}
+    assert facets.availability["Evenings"] == 1
+    assert facets.availability["Mornings"] == 0
@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from utils.db_schema import DB_SCHEMA
+from utils.event_index import EventIndex
+
+HORIZON = date(2030, 1, 1)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _add_event(conn, date_time):
+    cursor = conn.execute(
+        "INSERT INTO events (name, description, location, date_time, organization_id, category) VALUES ('e', 'd', 'l', ?, 1, 'Animal Welfare')",
+        (date_time,),
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "app.db")
+    conn = _connect(path)
+    conn.executescript(DB_SCHEMA)
+    conn.execute(
+        "INSERT INTO users (email, first_name, last_name) VALUES ('a@example.com', 'A', 'B')"
+    )
+    conn.execute(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES ('One', '', 'animal_welfare', 1)"
+    )
+    for day in (7, 8, 9):
+        _add_event(conn, f"2030-01-0{day}T09:00:00")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def index(path):
+    index = EventIndex(enabled=True)
+    conn = _connect(path)
+    index.load(conn, HORIZON)
+    conn.close()
+    return index
+
+
+def test_search_sees_writes_from_another_connection(path, index):
+    conn = _connect(path)
+    assert len(index.search(conn, begin_date="2030-01-01", is_weekday=True)) == 3
+    other = _connect(path)
+    event_id = _add_event(other, "2030-01-10T09:00:00")
+    other.execute("DELETE FROM events WHERE id = 1")
+    other.commit()
+    other.close()
+    assert index.search(conn, begin_date="2030-01-01", is_weekday=True) == [
+        2,
+        3,
+        event_id,
+    ]
+    conn.close()
+
+
+def test_own_writes_keep_the_index_without_a_reload(path, index, monkeypatch):
+    conn = _connect(path)
+    first = _add_event(conn, "2030-01-10T09:00:00")
+    index.upsert(conn, first)
+    added = [_add_event(conn, "2030-01-11T09:00:00") for _ in range(3)]
+    index.upsert(conn, *added)
+    conn.execute("DELETE FROM events WHERE id IN (1, 2)")
+    conn.commit()
+    index.remove(conn, 1, 2)
+
+    def load(*args):
+        raise AssertionError("the index was loaded again")
+
+    monkeypatch.setattr(index, "load", load)
+    assert index.search(conn, begin_date="2030-01-01", is_weekday=True) == [
+        3,
+        first,
+        *added,
+    ]
+    conn.close()
+
+
+def test_queries_sql_answers_from_an_index_are_left_to_sql(path, index):
+    conn = _connect(path)
+    assert index.search(conn, begin_date="2030-01-01", limit=6) is None
+    assert index.search(conn, begin_date="2030-01-01", organization_id=[1]) is None
+    assert (
+        index.search(conn, begin_date="2030-01-01", availability=["Flexible"]) is None
+    )
+    assert index.search(conn, begin_date="2030-01-01", availability=["Mornings"]) == [
+        1,
+        2,
+        3,
+    ]
+    conn.close()
+
+
+def test_negative_limit_is_no_limit_like_sql(path, index):
+    conn = _connect(path)
+    assert index.search(conn, begin_date="2030-01-01", is_weekday=True, limit=-1) == [
+        1,
+        2,
+        3,
+    ]
+    assert index.search(conn, begin_date="2030-01-01", is_weekday=True, limit=0) == []
+    assert index.search(conn, begin_date="2030-01-01", is_weekday=True, limit=2) == [
+        1,
+        2,
+    ]
+    conn.close()
+
+
+def test_concurrent_searches_share_one_reload(path, index, monkeypatch):
+    other = _connect(path)
+    _add_event(other, "2030-01-10T09:00:00")
+    other.close()
+    loads = []
+    load = index.load
+
+    def slow_load(conn, horizon=None):
+        loads.append(conn)
+        time.sleep(0.2)
+        load(conn, HORIZON)
+
+    monkeypatch.setattr(index, "load", slow_load)
+
+    def search():
+        conn = _connect(path)
+        results.append(index.search(conn, begin_date="2030-01-01", is_weekday=True))
+        conn.close()
+
+    results = []
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert results == [[1, 2, 3, 4]] * 4
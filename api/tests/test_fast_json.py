@@ -0,0 +1,193 @@
+"""
+The fast serialization path of the list routes (``utils/fast_json.py``) must render the
+same bytes as the routes' ``response_model`` serialization it replaces.
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+
+import msgpack
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from main import app
+from models import Event
+from routes.events import (
+    _EVENT_SELECT_SQL,
+    _event_dict,
+    _event_from_row,
+    _event_select_sql,
+    _parse_event_expand,
+    _parse_event_fields,
+    _shape_events,
+)
+from routes.organization import (
+    _ORGANIZATION_SELECT_SQL,
+    _organization_dict,
+    _organization_from_row,
+)
+from routes.users import _user_dict, _user_from_row
+from utils.db_schema import DB_SCHEMA
+from utils.fast_json import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, render
+
+# the formats a stored date_time can have: written by the seed scripts, by the API
+# with fractional seconds, and with a UTC or other offset
+DATE_TIMES = [
+    "2030-01-01T10:00:00",
+    "2030-01-01 10:00:00",
+    "2030-01-01T10:00:00.250000",
+    "2030-01-01T10:00:00.000001",
+    "2030-01-01T10:00:00+00:00",
+    "2030-01-01T10:00:00Z",
+    "2030-01-01T10:00:00.500000+00:00",
+    "2030-01-01T10:00:00+02:00",
+    "2030-01-01T10:00:00.125000-05:30",
+]
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DB_SCHEMA)
+    conn.executemany(
+        "INSERT INTO users (email, first_name, last_name, availability, skills) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("first@example.com", "First", "User", "Weekends", "cooking, driving"),
+            ("second@example.com", "Ünïcode", "Ñame", None, None),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO user_interests (user_id, category) VALUES (?, ?)",
+        [(1, "Animal Welfare"), (1, "Arts & Culture")],
+    )
+    conn.executemany(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES (?, ?, 'animal_welfare', 1)",
+        [("Paws", 'Shelter "help"\n'), ("Empty", "")],
+    )
+    conn.executemany(
+        """
+        INSERT INTO events (name, description, location, date_time, organization_id, category, capacity, duration_minutes)
+        VALUES (?, 'An event', 'Somewhere', ?, 1, 'Animal Welfare', ?, ?)
+        """,
+        [
+            (f"Event {i}", date_time, 10 if i % 2 else None, 90 if i % 3 else 60)
+            for i, date_time in enumerate(DATE_TIMES)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO event_registrations (user_id, event_id, organization_id, registration_time) VALUES (?, ?, 1, ?)",
+        [(1, 1, "2029-12-01T08:00:00"), (2, 1, "2029-12-02T08:00:00.5")],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _model_body(route_name: str, content) -> bytes:
+    """The body FastAPI renders for ``content`` against the route's response_model."""
+    route = next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.name == route_name
+    )
+    serialized = asyncio.run(
+        serialize_response(field=route.response_field, response_content=content)
+    )
+    return JSONResponse(serialized).body
+
+
+def _event_rows(conn):
+    return conn.execute(f"{_EVENT_SELECT_SQL} ORDER BY id").fetchall()
+
+
+def test_list_events_matches_models(conn):
+    rows = _event_rows(conn)
+    assert render([_event_dict(row) for row in rows], utc_z=True) == _model_body(
+        "list_events", [_event_from_row(row) for row in rows]
+    )
+
+
+@pytest.mark.parametrize("date_time", DATE_TIMES)
+def test_event_date_time_matches_model(conn, date_time):
+    row = conn.execute(
+        f"{_EVENT_SELECT_SQL} WHERE date_time = ?", (date_time,)
+    ).fetchone()
+    fast = render(_event_dict(row), utc_z=True)
+    assert fast == _model_body("get_event", _event_from_row(row))
+
+
+def test_utc_date_times_are_written_with_z(conn):
+    rows = _event_rows(conn)
+    body = render([_event_dict(row) for row in rows], utc_z=True)
+    assert b'"2030-01-01T10:00:00Z"' in body
+    assert b'"2030-01-01T10:00:00.500000Z"' in body
+    assert b"+00:00" not in body
+    assert b'"2030-01-01T10:00:00+02:00"' in body
+    assert b'"2030-01-01T10:00:00.250000"' in body
+
+
+def test_shaped_events_match_fastapi(conn):
+    fields = _parse_event_fields(["id,name,date_time,location,category"])
+    expand = _parse_event_expand(["organization"])
+    rows = conn.execute(f"{_event_select_sql(fields, expand)} ORDER BY id").fetchall()
+    shaped = _shape_events(conn, rows, fields, expand)
+    assert render(shaped) == _model_body("list_events", shaped)
+
+
+def test_recommended_events_match_models(conn):
+    rows = _event_rows(conn)
+    assert render([_event_dict(row) for row in rows], utc_z=True) == _model_body(
+        "recommended_events", [Event(**dict(row)) for row in rows]
+    )
+
+
+def test_list_organizations_matches_models(conn):
+    rows = conn.execute(
+        f"{_ORGANIZATION_SELECT_SQL} ORDER BY organizations.organization_id"
+    ).fetchall()
+    assert render([_organization_dict(row) for row in rows]) == _model_body(
+        "list_organizations", [_organization_from_row(row) for row in rows]
+    )
+
+
+def test_list_users_matches_models(conn):
+    rows = conn.execute(
+        """
+        SELECT u.user_id, u.email, u.first_name, u.last_name, u.availability, u.skills,
+               GROUP_CONCAT(ui.category) as interests_str
+        FROM users u
+        LEFT JOIN user_interests ui ON u.user_id = ui.user_id
+        GROUP BY u.user_id ORDER BY u.user_id
+        """
+    ).fetchall()
+    assert render([_user_dict(row) for row in rows]) == _model_body(
+        "list_users", [_user_from_row(row) for row in rows]
+    )
+
+
+def test_list_event_registrations_matches_models(conn):
+    rows = conn.execute(
+        """
+        SELECT user_id, event_id, organization_id, registration_time
+        FROM event_registrations ORDER BY registration_time DESC
+        """
+    ).fetchall()
+    content = [dict(row) for row in rows]
+    assert render(content) == _model_body("list_event_registrations", content)
+
+
+def test_msgpack_date_times_are_timestamps(conn):
+    rows = _event_rows(conn)
+    events = msgpack.unpackb(
+        render([_event_dict(row) for row in rows], MSGPACK_MEDIA_TYPE), timestamp=3
+    )
+    for event, row in zip(events, rows):
+        stored = datetime.fromisoformat(row["date_time"])
+        if stored.tzinfo is None:
+            # sent as UTC, the same wall clock time as in JSON
+            stored = stored.replace(tzinfo=timezone.utc)
+        assert event["date_time"] == stored
+    assert render([], JSON_MEDIA_TYPE) == b"[]"
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+import db
+from utils.live_updates import LiveUpdates
+from utils.recurrence import materialize_occurrence, occurrence_id
+
+
+@pytest.fixture
+def series_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "app.db")
+    db.init_db()
+    conn = db.connect()
+    conn.execute(
+        "INSERT INTO users (email, first_name, last_name) VALUES ('a@example.com', 'A', 'B')"
+    )
+    conn.execute(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES ('One', '', 'animal_welfare', 1)"
+    )
+    cursor = conn.execute(
+        "INSERT INTO event_series (name, description, location, first_date_time, organization_id, frequency) VALUES ('weekly', 'd', 'l', '2030-01-07T09:00:00', 1, 'weekly')"
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def _register(series_id: int) -> int:
+    """Register for the second occurrence the way the route does, return its stored id."""
+    conn = db.connect()
+    event_id = materialize_occurrence(conn, series_id, 1)
+    conn.execute(
+        "INSERT INTO event_registrations (user_id, event_id, organization_id, registration_time) VALUES (1, ?, 1, '2030-01-01T00:00:00')",
+        (event_id,),
+    )
+    conn.commit()
+    conn.close()
+    return event_id
+
+
+async def _next_message(stream) -> tuple[str, dict]:
+    while True:
+        message = await stream.__anext__()
+        if message.startswith("id:"):
+            lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+            return lines["event"], json.loads(lines["data"])
+
+
+def test_a_watched_occurrence_gets_the_updates_of_its_stored_event(series_id):
+    async def run():
+        live_updates = LiveUpdates(poll_seconds=0.05)
+        stream = live_updates.stream([occurrence_id(series_id, 1)])
+        # the retry line comes once the stream follows the change log
+        assert (await stream.__anext__()).startswith("retry:")
+        stored_id = await asyncio.to_thread(_register, series_id)
+        kind, state = await asyncio.wait_for(_next_message(stream), 5)
+        await stream.aclose()
+        return stored_id, kind, state
+
+    stored_id, kind, state = asyncio.run(run())
+    assert kind == "update"
+    assert state["id"] == stored_id
+    assert state["registration_count"] == 1
+
+
+def test_a_new_stream_starts_with_the_stored_occurrence(series_id):
+    stored_id = _register(series_id)
+
+    async def run():
+        stream = LiveUpdates().stream([occurrence_id(series_id, 1)])
+        await stream.__anext__()
+        message = await asyncio.wait_for(_next_message(stream), 5)
+        await stream.aclose()
+        return message
+
+    kind, state = asyncio.run(run())
+    assert kind == "update"
+    assert state["id"] == stored_id
@@ -2,7 +2,7 @@ import sqlite3
 from typing import Optional
 
 import jwt
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from db import get_connection
@@ -12,7 +12,13 @@ from utils.security import decode_access_token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
+# Key of the request scope state holding an already resolved user (or the
+# HTTPException resolving it raised), set by the batch route for its sub-requests
+SHARED_USER_STATE = "shared_user"
+
+
 def get_current_user(
+    request: Request,
     bearer_token: Optional[str] = Depends(oauth2_scheme),
     session: Optional[str] = Cookie(default=None),
     conn: sqlite3.Connection = Depends(get_connection),
@@ -27,7 +33,24 @@ def get_current_user(
     Raises 401 if neither is present, the token is invalid/expired, or the
     user no longer exists.
     """
-    token = session or bearer_token
+    shared = request.scope.get("state", {}).get(SHARED_USER_STATE)
+    if isinstance(shared, HTTPException):
+        raise shared
+    if shared is not None:
+        return shared
+    return resolve_user(session or bearer_token, conn)
+
+
+def resolve_user(token: Optional[str], conn: sqlite3.Connection) -> dict:
+    """
+    The ``get_current_user`` lookup for a token taken from the request by the caller.
+    Raises the same 401s.
+
+    :param token: the JWT from the session cookie or Authorization header, if any
+    :type token: Optional[str]
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    """
     if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
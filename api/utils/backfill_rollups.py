@@ -0,0 +1,66 @@
+"""
+Fill the weekly analytics rollups (``event_week_registrations`` and
+``organization_volunteer_weeks``) from the existing registrations.
+
+Triggers keep the rollups up to date once they exist, but registrations made before
+that are only counted after a backfill. The backfill runs in a single transaction, so
+dashboards never see half-filled rollups, and can be repeated safely.
+
+Run from the ``api`` directory:
+
+    python -m utils.backfill_rollups
+    python -m utils.backfill_rollups --organization-id 3
+"""
+
+import argparse
+import sqlite3
+import time
+from typing import Optional
+
+from db import connect, init_db
+from utils.db_schema import REBUILD_ANALYTICS_SQL
+
+
+def backfill_rollups(
+    conn: sqlite3.Connection, organization_id: Optional[int] = None
+) -> None:
+    """
+    Recompute the analytics rollups of one organization, or of all of them.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param organization_id: the organization to backfill, every organization if None
+    :type organization_id: Optional[int]
+    """
+    params = {"organization_id": organization_id}
+    with conn:
+        for statement in REBUILD_ANALYTICS_SQL:
+            conn.execute(statement, params)
+
+
+def main(organization_id: Optional[int]) -> None:
+    # make sure the rollup tables and their triggers exist
+    init_db()
+    conn = connect()
+    try:
+        started = time.perf_counter()
+        backfill_rollups(conn, organization_id)
+        weeks, volunteer_weeks = conn.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM event_week_registrations),
+                   (SELECT COUNT(*) FROM organization_volunteer_weeks)
+            """
+        ).fetchone()
+    finally:
+        conn.close()
+    print(
+        f"backfilled analytics rollups in {time.perf_counter() - started:.1f}s: "
+        f"{weeks} event weeks, {volunteer_weeks} volunteer weeks"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--organization-id", type=int, default=None)
+    args = parser.parse_args()
+    main(args.organization_id)
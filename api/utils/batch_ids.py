@@ -0,0 +1,65 @@
+"""
+The ``ids`` parameter of the list routes, which turns them into multi-get lookups.
+
+A page that needs a known set of events, organizations or users asks for all of them in
+one request (e.g. ``GET /api/events?ids=1,2,3``) instead of one request per item. Ids
+can be repeated and/or comma separated. Results keep the order of the request and ids
+that don't exist are reported instead of failing the whole request.
+
+The number of ids per request is capped by ``MAX_BATCH_IDS`` (environment variable,
+default 100), so a single lookup always fits in one query.
+"""
+
+import os
+from typing import Iterable, Mapping, TypeVar
+
+from fastapi import HTTPException, status
+
+MAX_BATCH_IDS = int(os.environ.get("MAX_BATCH_IDS", "100"))
+
+# the largest SQLite INTEGER, larger ids can't be bound to a query
+MAX_ID = 2**63 - 1
+
+T = TypeVar("T")
+
+
+def parse_ids(ids: Iterable[str], max_ids: int = MAX_BATCH_IDS) -> list[int]:
+    """
+    Turn the values of an ``ids`` query parameter into a list of ids in request order,
+    without duplicates. Raises a 400 for values that aren't positive integers up to
+    ``MAX_ID`` or when more than ``max_ids`` ids are requested.
+
+    :param ids: the raw query parameter values, each one id or a comma separated list
+    :type ids: Iterable[str]
+    :param max_ids: the maximum number of distinct ids
+    :type max_ids: int
+    """
+    parsed: dict[int, None] = {}
+    for value in ids:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            # isascii, since isdigit also accepts digits int() doesn't read, like '²'
+            if not (part.isascii() and part.isdigit()) or not 0 < int(part) <= MAX_ID:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid id: {part}",
+                )
+            parsed[int(part)] = None
+    if len(parsed) > max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot request more than {max_ids} ids at once",
+        )
+    return list(parsed)
+
+
+def order_by_ids(items: Mapping[int, T], ids: list[int]) -> tuple[list[T], list[int]]:
+    """
+    Arrange ``items`` (by id) in the order of ``ids``, and list the ids that have no
+    item.
+    """
+    found = [items[item_id] for item_id in ids if item_id in items]
+    missing = [item_id for item_id in ids if item_id not in items]
+    return found, missing
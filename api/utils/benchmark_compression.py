@@ -0,0 +1,83 @@
+"""
+Benchmark gzip and brotli compression levels on the list route payloads.
+
+Builds the same throwaway database as ``utils/benchmark_serialization.py``, renders the
+JSON body of each list route, then reports for each encoding and level the compressed
+size relative to the body and the time to compress and decompress it. The levels
+``utils/compression.py`` uses are marked with a '*'. Brotli is skipped when the
+``brotli`` package isn't installed.
+
+Run from the ``api`` directory:
+
+    python -m utils.benchmark_compression
+    python -m utils.benchmark_compression --rows 10000 --repeat 20
+"""
+
+import argparse
+import gzip
+import os
+import tempfile
+from typing import Callable
+
+from utils.benchmark_event_index import build_database, time_ms
+from utils.benchmark_msgpack import contents
+from utils.benchmark_serialization import _add_rows
+from utils.compression import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    brotli,
+)
+from utils.fast_json import JSON_MEDIA_TYPE, render
+
+GZIP_LEVELS = [1, 6, 9]
+BROTLI_QUALITIES = [1, 5, 9, 11]
+
+
+def codecs() -> dict[str, tuple[Callable, Callable]]:
+    """For each encoding and level, its compress and decompress functions."""
+    result = {}
+    for level in GZIP_LEVELS:
+        mark = "*" if level == COMPRESSION_GZIP_LEVEL else ""
+        result[f"gzip {level}{mark}"] = (
+            lambda body, level=level: gzip.compress(body, level, mtime=0),
+            gzip.decompress,
+        )
+    if brotli is not None:
+        for quality in BROTLI_QUALITIES:
+            mark = "*" if quality == COMPRESSION_BROTLI_QUALITY else ""
+            result[f"br {quality}{mark}"] = (
+                lambda body, quality=quality: brotli.compress(body, quality=quality),
+                brotli.decompress,
+            )
+    return result
+
+
+def main(num_rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = build_database(os.path.join(tmp_dir, "bench.db"), num_rows)
+        _add_rows(conn, num_rows)
+        print(
+            f"{'route':<26} {'KB':>7} {'encoding':<9} {'ratio':>6} "
+            f"{'compress ms':>12} {'decompress ms':>14}"
+        )
+        for name, (content, utc_z) in contents(conn, num_rows).items():
+            body = render(content, JSON_MEDIA_TYPE, utc_z)
+            for codec, (compress, decompress) in codecs().items():
+                compressed = compress(body)
+                assert decompress(compressed) == body, f"{codec} changed {name}"
+                compress_ms = time_ms(lambda: compress(body), repeat)
+                decompress_ms = time_ms(lambda: decompress(compressed), repeat)
+                print(
+                    f"{name:<26} {len(body) / 1024:>7.1f} {codec:<9} "
+                    f"{len(compressed) / len(body):>6.1%} {compress_ms:>12.2f} "
+                    f"{decompress_ms:>14.2f}"
+                )
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,159 @@
+"""
+Benchmark the in-memory event index against the SQL path of ``list_events``.
+
+Builds a throwaway database with synthetic events for each requested size, then times
+the queries the client actually sends (home page, events page filters, organization
+page) through both paths, checking that they return the same events. "index ms" is the
+full route through the index, including hydrating rows from SQLite; "mask ms" is the
+index lookup on its own.
+
+Run from the ``api`` directory:
+
+    python -m utils.benchmark_event_index
+    python -m utils.benchmark_event_index --sizes 10000 100000 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from routes.events import _query_events
+from utils.db_schema import DB_SCHEMA
+from utils.event_index import event_index
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+NUM_ORGANIZATIONS = 200
+CATEGORIES = [
+    "Animal Welfare",
+    "Arts & Culture",
+    "Disaster Relief",
+    "Education & Tutoring",
+    "Environmental Conservation",
+    "Health & Medical",
+    "Hunger and Food Security",
+    "Youth and Children",
+]
+
+
+def build_database(path: str, num_events: int) -> sqlite3.Connection:
+    """Create a database at ``path`` with ``num_events`` events spread over a year."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DB_SCHEMA)
+    conn.execute(
+        "INSERT INTO users (email, first_name, last_name) VALUES ('bench@example.com', 'Bench', 'User')"
+    )
+    conn.executemany(
+        "INSERT INTO organizations (name, description, category, created_by_user_id) VALUES (?, '', 'animal_welfare', 1)",
+        [(f"Organization {i}",) for i in range(NUM_ORGANIZATIONS)],
+    )
+
+    start = datetime.combine(date.today() - timedelta(days=30), datetime.min.time())
+    seconds_in_range = 395 * 24 * 3600
+    rng = random.Random(42)
+
+    def rows():
+        for i in range(num_events):
+            yield (
+                f"Event {i}",
+                "Synthetic benchmark event",
+                f"{rng.randint(1, 999)} Main Street",
+                start + timedelta(seconds=rng.randrange(seconds_in_range)),
+                rng.randint(1, NUM_ORGANIZATIONS),
+                rng.choice(CATEGORIES),
+            )
+
+    conn.executemany(
+        "INSERT INTO events (name, description, location, date_time, organization_id, category) VALUES (?, ?, ?, ?, ?, ?)",
+        rows(),
+    )
+    conn.commit()
+    return conn
+
+
+def benchmark_queries() -> dict[str, dict]:
+    """The ``list_events`` parameter sets sent by the client pages."""
+    today = date.today()
+    return {
+        "home page": {"begin_date": today.isoformat(), "limit": 6},
+        "events page, category + availability": {
+            "begin_date": today.isoformat(),
+            "category": CATEGORIES[:2],
+            "availability": ["Mornings", "Weekends"],
+        },
+        "events page, next 30 days on weekdays": {
+            "begin_date": today.isoformat(),
+            "end_date": (today + timedelta(days=30)).isoformat(),
+            "is_weekday": True,
+        },
+        "organization page": {
+            "begin_date": today.isoformat(),
+            "organization_id": [7],
+        },
+    }
+
+
+def run_list_events(conn: sqlite3.Connection, use_index: bool, params: dict) -> list:
+    event_index.enabled = use_index
+    # bypass the result cache so every run really executes the query
+    return _query_events(conn, **params)
+
+
+def time_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            print(f"\n=== {size:,} events ===")
+            started = time.perf_counter()
+            conn = build_database(os.path.join(tmp_dir, "bench.db"), size)
+            print(f"built database in {time.perf_counter() - started:.1f}s")
+
+            event_index.enabled = True
+            started = time.perf_counter()
+            event_index.load(conn)
+            print(
+                f"loaded {event_index.size:,} upcoming events into the index in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+
+            print(
+                f"{'query':<40} {'rows':>7} {'sql ms':>9} {'index ms':>9} "
+                f"{'mask ms':>9} {'speedup':>8}"
+            )
+            for name, params in benchmark_queries().items():
+                sql_result = run_list_events(conn, False, params)
+                index_result = run_list_events(conn, True, params)
+                assert [event.id for event in sql_result] == [
+                    event.id for event in index_result
+                ], f"index and SQL results differ for {name}"
+
+                sql_ms = time_ms(lambda: run_list_events(conn, False, params), repeat)
+                index_ms = time_ms(lambda: run_list_events(conn, True, params), repeat)
+                # the index lookup alone, without hydrating rows from SQLite
+                mask_ms = time_ms(lambda: event_index.search(conn, **params), repeat)
+                print(
+                    f"{name:<40} {len(sql_result):>7} {sql_ms:>9.2f} {index_ms:>9.2f} "
+                    f"{mask_ms:>9.2f} {sql_ms / index_ms:>7.1f}x"
+                )
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,151 @@
+"""
+Benchmark MessagePack responses against JSON for the list routes.
+
+Builds the same throwaway database as ``utils/benchmark_serialization.py``, then for
+each list route encodes the content the route returns both ways with
+``utils.fast_json.render``, and decodes it back the way a client would (datetimes as
+``datetime`` for MessagePack, left as strings for JSON). Each MessagePack body is checked
+to decode to the same content as the JSON one, with its timestamps matching the JSON
+datetime strings.
+
+Run from the ``api`` directory:
+
+    python -m utils.benchmark_msgpack
+    python -m utils.benchmark_msgpack --rows 10000 --repeat 20
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from typing import Any
+
+import msgpack
+import orjson
+
+from routes.events import (
+    _EVENT_SELECT_SQL,
+    _event_dict,
+    _event_select_sql,
+    _parse_event_expand,
+    _parse_event_fields,
+    _shape_events,
+)
+from routes.organization import _ORGANIZATION_SELECT_SQL, _organization_dict
+from routes.users import _user_dict
+from utils.benchmark_event_index import build_database, time_ms
+from utils.benchmark_serialization import _add_rows
+from utils.fast_json import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, render
+
+
+def _same_content(json_value: Any, msgpack_value: Any) -> bool:
+    """Whether a decoded MessagePack value holds the same as the decoded JSON value."""
+    if isinstance(msgpack_value, datetime):
+        parsed = datetime.fromisoformat(json_value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed == msgpack_value
+    if isinstance(msgpack_value, dict):
+        return json_value.keys() == msgpack_value.keys() and all(
+            _same_content(json_value[key], msgpack_value[key]) for key in json_value
+        )
+    if isinstance(msgpack_value, list):
+        return len(json_value) == len(msgpack_value) and all(
+            _same_content(a, b) for a, b in zip(json_value, msgpack_value)
+        )
+    return json_value == msgpack_value
+
+
+def contents(conn: sqlite3.Connection, rows: int) -> dict[str, tuple[Any, bool]]:
+    """
+    For each route, the content it returns for its rows, and whether it is rendered
+    with ``utc_z``.
+    """
+    event_rows = conn.execute(
+        f"{_EVENT_SELECT_SQL} ORDER BY date_time, id LIMIT ?", (rows,)
+    ).fetchall()
+    card_fields = _parse_event_fields(["id,name,date_time,location,category"])
+    card_expand = _parse_event_expand(["organization"])
+    card_rows = conn.execute(
+        f"{_event_select_sql(card_fields, card_expand)} ORDER BY date_time, id LIMIT ?",
+        (rows,),
+    ).fetchall()
+    organization_rows = conn.execute(
+        f"{_ORGANIZATION_SELECT_SQL} ORDER BY organizations.organization_id"
+    ).fetchall()
+    user_rows = conn.execute(
+        """
+        SELECT u.user_id, u.email, u.first_name, u.last_name, u.availability, u.skills,
+               GROUP_CONCAT(ui.category) as interests_str
+        FROM users u
+        LEFT JOIN user_interests ui ON u.user_id = ui.user_id
+        GROUP BY u.user_id ORDER BY u.user_id LIMIT ?
+        """,
+        (rows,),
+    ).fetchall()
+    registration_rows = conn.execute(
+        """
+        SELECT user_id, event_id, organization_id, registration_time
+        FROM event_registrations ORDER BY registration_time DESC LIMIT ?
+        """,
+        (rows,),
+    ).fetchall()
+    return {
+        "list_events": ([_event_dict(row) for row in event_rows], True),
+        "list_events, card fields": (
+            _shape_events(conn, card_rows, card_fields, card_expand),
+            False,
+        ),
+        "list_organizations": (
+            [_organization_dict(row) for row in organization_rows],
+            False,
+        ),
+        "list_users": ([_user_dict(row) for row in user_rows], False),
+        "list_event_registrations": (
+            [dict(row) for row in registration_rows],
+            False,
+        ),
+    }
+
+
+def main(num_rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = build_database(os.path.join(tmp_dir, "bench.db"), num_rows)
+        _add_rows(conn, num_rows)
+        print(
+            f"{'route':<26} {'rows':>6} {'json KB':>8} {'msgpack KB':>10} "
+            f"{'size':>5} {'json enc/dec ms':>16} {'msgpack enc/dec ms':>19}"
+        )
+        for name, (content, utc_z) in contents(conn, num_rows).items():
+            json_body = render(content, JSON_MEDIA_TYPE, utc_z)
+            msgpack_body = render(content, MSGPACK_MEDIA_TYPE)
+            assert _same_content(
+                orjson.loads(json_body), msgpack.unpackb(msgpack_body, timestamp=3)
+            ), f"the MessagePack body of {name} differs from the JSON one"
+            json_encode = time_ms(
+                lambda: render(content, JSON_MEDIA_TYPE, utc_z), repeat
+            )
+            json_decode = time_ms(lambda: orjson.loads(json_body), repeat)
+            msgpack_encode = time_ms(
+                lambda: render(content, MSGPACK_MEDIA_TYPE), repeat
+            )
+            msgpack_decode = time_ms(
+                lambda: msgpack.unpackb(msgpack_body, timestamp=3), repeat
+            )
+            print(
+                f"{name:<26} {len(content):>6} {len(json_body) / 1024:>8.1f} "
+                f"{len(msgpack_body) / 1024:>10.1f} "
+                f"{len(msgpack_body) / len(json_body):>5.0%} "
+                f"{json_encode:>7.2f} / {json_decode:>6.2f} "
+                f"{msgpack_encode:>9.2f} / {msgpack_decode:>7.2f}"
+            )
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,215 @@
+"""
+Benchmark the fast serialization path of the list routes against Pydantic models.
+
+Builds a throwaway database (see ``utils/benchmark_event_index.py``), then for each list
+route turns the same rows into a response body twice: the way the route used to, one
+model per row validated and serialized by FastAPI against the route's
+``response_model``, and through ``utils/fast_json.py``. Both bodies must be identical,
+so this is also the check that the fast path returns exactly what the models would.
+The query itself is left out of the timings, it is the same for both.
+
+Run from the ``api`` directory:
+
+    python -m utils.benchmark_serialization
+    python -m utils.benchmark_serialization --rows 10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from main import app
+from models import Event
+from routes.events import (
+    _EVENT_SELECT_SQL,
+    _event_dict,
+    _event_from_row,
+    _event_select_sql,
+    _parse_event_expand,
+    _parse_event_fields,
+    _shape_events,
+)
+from routes.organization import (
+    _ORGANIZATION_SELECT_SQL,
+    _organization_dict,
+    _organization_from_row,
+)
+from routes.users import _user_dict, _user_from_row
+from utils.benchmark_event_index import CATEGORIES, build_database, time_ms
+from utils.fast_json import render
+
+_loop = asyncio.new_event_loop()
+
+
+def _add_rows(conn: sqlite3.Connection, num_users: int) -> None:
+    """
+    Add users with interests and registrations to the benchmark database, and give some
+    events the fractional seconds and UTC offsets dates written by the API can have.
+    """
+    rng = random.Random(7)
+    conn.execute(
+        "UPDATE events SET date_time = date_time || '.250000' WHERE id % 3 = 0"
+    )
+    conn.execute("UPDATE events SET date_time = date_time || '+00:00' WHERE id % 5 = 0")
+    conn.executemany(
+        "INSERT INTO users (email, first_name, last_name, availability, skills) VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                f"volunteer{i}@example.com",
+                f"First{i}",
+                f"Last{i}",
+                rng.choice([None, "Mornings", "Weekends", "Flexible"]),
+                rng.choice(["", "cooking, driving", "first aid"]),
+            )
+            for i in range(num_users)
+        ],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO user_interests (user_id, category) VALUES (?, ?)",
+        [
+            (user_id, category)
+            for user_id in range(2, num_users + 2)
+            for category in rng.sample(CATEGORIES, 2)
+        ],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO event_registrations (user_id, event_id, organization_id, registration_time) VALUES (2, ?, 1, ?)",
+        [
+            (event_id, f"2026-01-01T10:{event_id % 60:02d}:00")
+            for event_id in range(1, num_users + 1)
+        ],
+    )
+    conn.commit()
+
+
+def _fastapi_body(route_name: str, content: Any) -> bytes:
+    """The body FastAPI sends for ``content`` returned by the route, as it did before."""
+    route = next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.name == route_name
+    )
+    serialized = _loop.run_until_complete(
+        serialize_response(field=route.response_field, response_content=content)
+    )
+    return JSONResponse(serialized).body
+
+
+def benchmarks(conn: sqlite3.Connection, rows: int) -> dict[str, tuple]:
+    """
+    For each route, its rows and the functions turning them into a body with models
+    (before) and with the fast path (after).
+    """
+    event_rows = conn.execute(
+        f"{_EVENT_SELECT_SQL} ORDER BY date_time, id LIMIT ?", (rows,)
+    ).fetchall()
+    card_fields = _parse_event_fields(["id,name,date_time,location,category"])
+    card_expand = _parse_event_expand(["organization"])
+    card_rows = conn.execute(
+        f"{_event_select_sql(card_fields, card_expand)} ORDER BY date_time, id LIMIT ?",
+        (rows,),
+    ).fetchall()
+    organization_rows = conn.execute(
+        f"{_ORGANIZATION_SELECT_SQL} ORDER BY organizations.organization_id"
+    ).fetchall()
+    user_rows = conn.execute(
+        """
+        SELECT u.user_id, u.email, u.first_name, u.last_name, u.availability, u.skills,
+               GROUP_CONCAT(ui.category) as interests_str
+        FROM users u
+        LEFT JOIN user_interests ui ON u.user_id = ui.user_id
+        GROUP BY u.user_id ORDER BY u.user_id LIMIT ?
+        """,
+        (rows,),
+    ).fetchall()
+    registration_rows = conn.execute(
+        """
+        SELECT user_id, event_id, organization_id, registration_time
+        FROM event_registrations ORDER BY registration_time DESC LIMIT ?
+        """,
+        (rows,),
+    ).fetchall()
+
+    def shaped(source):
+        return _shape_events(conn, source, card_fields, card_expand)
+
+    return {
+        "list_events": (
+            event_rows,
+            lambda: _fastapi_body(
+                "list_events", [_event_from_row(row) for row in event_rows]
+            ),
+            lambda: render([_event_dict(row) for row in event_rows], utc_z=True),
+        ),
+        "list_events, card fields": (
+            card_rows,
+            lambda: _fastapi_body("list_events", shaped(card_rows)),
+            lambda: render(shaped(card_rows)),
+        ),
+        "recommended_events": (
+            event_rows,
+            lambda: _fastapi_body(
+                "recommended_events", [Event(**dict(row)) for row in event_rows]
+            ),
+            lambda: render([_event_dict(row) for row in event_rows], utc_z=True),
+        ),
+        "list_organizations": (
+            organization_rows,
+            lambda: _fastapi_body(
+                "list_organizations",
+                [_organization_from_row(row) for row in organization_rows],
+            ),
+            lambda: render([_organization_dict(row) for row in organization_rows]),
+        ),
+        "list_users": (
+            user_rows,
+            lambda: _fastapi_body(
+                "list_users", [_user_from_row(row) for row in user_rows]
+            ),
+            lambda: render([_user_dict(row) for row in user_rows]),
+        ),
+        "list_event_registrations": (
+            registration_rows,
+            lambda: _fastapi_body(
+                "list_event_registrations",
+                [dict(row) for row in registration_rows],
+            ),
+            lambda: render([dict(row) for row in registration_rows]),
+        ),
+    }
+
+
+def main(num_rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = build_database(os.path.join(tmp_dir, "bench.db"), num_rows)
+        _add_rows(conn, num_rows)
+        print(
+            f"{'route':<28} {'rows':>7} {'models ms':>10} {'fast ms':>9} "
+            f"{'speedup':>8}"
+        )
+        for name, (rows, before, after) in benchmarks(conn, num_rows).items():
+            # also covered by tests/test_fast_json.py, not an assert so -O keeps it
+            if before() != after():
+                raise AssertionError(f"the fast path renders {name} differently")
+            before_ms = time_ms(before, repeat)
+            after_ms = time_ms(after, repeat)
+            print(
+                f"{name:<28} {len(rows):>7} {before_ms:>10.2f} {after_ms:>9.2f} "
+                f"{before_ms / after_ms:>7.1f}x"
+            )
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
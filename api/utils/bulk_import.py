@@ -0,0 +1,386 @@
+"""
+Import organizations or events in bulk from a JSON Lines or CSV file.
+
+Rows are read one at a time and validated with the same models as the create routes
+(``OrganizationCreate`` and ``EventIn``), so a file of any size is imported in constant
+memory. Valid rows are inserted ``IMPORT_CHUNK_SIZE`` (environment variable, default
+500) at a time with ``executemany``, one transaction per chunk. Invalid rows are
+reported with their line number and skipped, they never abort the import.
+
+Each chunk's transaction also records how far the import got in ``import_checkpoints``,
+so an import that crashed or was interrupted is resumed by running it again with the
+same import id: lines up to the checkpoint are skipped and no row is inserted twice.
+Running a finished import again inserts nothing.
+
+CSV files need a header row with the model's field names, empty cells are treated as
+missing values. Run from the ``api`` directory:
+
+    python -m utils.bulk_import organizations partners.jsonl --created-by-user-id 1
+    python -m utils.bulk_import events partner_events.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from db import connect, init_db
+from models import EventIn, ImportReport, ImportRowError, OrganizationCreate
+from utils.event_index import event_index
+from utils.streaming import chunked
+
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "500"))
+
+# errors kept in the report, the count covers all of them
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_KINDS = ("organizations", "events")
+IMPORT_FORMATS = ("jsonl", "csv")
+
+_MODELS: dict[str, type[BaseModel]] = {
+    "organizations": OrganizationCreate,
+    "events": EventIn,
+}
+
+# a line of the input and either its record or why it couldn't be read
+Record = tuple[int, Optional[dict], Optional[str]]
+
+
+def read_records(lines: Iterable[str], format: str) -> Iterator[Record]:
+    """
+    Parse the lines of a JSON Lines or CSV file into records, lazily. Yields
+    ``(line number, record, None)``, or ``(line number, None, error)`` for a line that
+    can't be parsed. Blank lines are skipped.
+
+    :param lines: the lines of the file, read with ``newline=""`` for CSV
+    :type lines: Iterable[str]
+    :param format: 'jsonl' or 'csv'
+    :type format: str
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, None, "Row has more cells than the header"
+                continue
+            record = {
+                key: value for key, value in row.items() if value not in ("", None)
+            }
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield line_number, None, f"Invalid JSON: {error.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _validation_messages(error: ValidationError) -> list[str]:
+    messages = []
+    for detail in error.errors():
+        location = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{location}: {detail['msg']}" if location else detail["msg"])
+    return messages
+
+
+def _check_organizations(
+    conn: sqlite3.Connection,
+    rows: list[tuple[int, EventIn]],
+    user_id: Optional[int],
+) -> dict[int, str]:
+    """
+    Find the events whose organization doesn't exist or, when importing for a user,
+    isn't administered by them, as ``line number -> error``. One query per chunk.
+    """
+    organization_ids = sorted({row.organization_id for _, row in rows})
+    if not organization_ids:
+        return {}
+    placeholders = ",".join("?" * len(organization_ids))
+    permissions = {
+        organization_id: permission_level
+        for organization_id, permission_level in conn.execute(
+            f"""
+            SELECT o.organization_id, r.permission_level
+            FROM organizations o
+            LEFT JOIN roles r ON r.organization_id = o.organization_id AND r.user_id = ?
+            WHERE o.organization_id IN ({placeholders})
+            """,
+            [user_id, *organization_ids],
+        )
+    }
+    errors = {}
+    for line_number, row in rows:
+        if row.organization_id not in permissions:
+            errors[line_number] = "organization_id: Organization not found"
+        elif user_id is not None and permissions[row.organization_id] != "admin":
+            errors[line_number] = (
+                "organization_id: Only organization admins can create events"
+            )
+    return errors
+
+
+def _insert_organizations(
+    conn: sqlite3.Connection, rows: list[OrganizationCreate], user_id: int
+) -> None:
+    (last_id,) = conn.execute(
+        "SELECT COALESCE(MAX(organization_id), 0) FROM organizations"
+    ).fetchone()
+    conn.executemany(
+        """
+        INSERT INTO organizations (name, description, category, created_by_user_id)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(row.name, row.description, row.category, user_id) for row in rows],
+    )
+    # the creator administers every imported organization, like with the create route.
+    # Ids only grow and the transaction holds the write lock, so the new organizations
+    # are exactly those after the last id seen before inserting
+    conn.execute(
+        """
+        INSERT INTO roles (user_id, organization_id, permission_level)
+        SELECT ?, organization_id, 'admin' FROM organizations WHERE organization_id > ?
+        """,
+        (user_id, last_id),
+    )
+
+
+def insert_events(conn: sqlite3.Connection, rows: list[EventIn]) -> list[int]:
+    """
+    Insert events with a single ``executemany`` and return their ids, in order. Must
+    run inside a write transaction (``BEGIN IMMEDIATE``): the new ids are read back as
+    those after the last id before inserting.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param rows: the events to insert
+    :type rows: list[EventIn]
+    """
+    (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+    conn.executemany(
+        """
+        INSERT INTO events (name, description, location, date_time, organization_id,
+                            category, capacity, duration_minutes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                row.name,
+                row.description,
+                row.location,
+                row.date_time,
+                row.organization_id,
+                row.category,
+                row.capacity,
+                row.duration_minutes,
+            )
+            for row in rows
+        ],
+    )
+    return [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM events WHERE id > ? ORDER BY id", (last_id,)
+        )
+    ]
+
+
+def import_records(
+    conn: sqlite3.Connection,
+    kind: str,
+    records: Iterable[Record],
+    import_id: str,
+    user_id: Optional[int] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_error: Optional[Callable[[ImportRowError], None]] = None,
+) -> ImportReport:
+    """
+    Validate and insert ``records`` chunk by chunk, resuming after the checkpoint of
+    ``import_id`` if it was started before. Raises a ValueError if ``import_id`` is an
+    import of another kind or ``user_id`` doesn't exist.
+
+    :param conn: the connection to the database, without a transaction in progress
+    :type conn: sqlite3.Connection
+    :param kind: 'organizations' or 'events'
+    :type kind: str
+    :param records: the records to import, as read by ``read_records``
+    :type records: Iterable[Record]
+    :param import_id: identifies the import to resume it, e.g. the path of the file
+    :type import_id: str
+    :param user_id: for organizations, the creator (required). For events, only import those of organizations this user is an admin of, or of any existing organization if None
+    :type user_id: Optional[int]
+    :param chunk_size: the number of lines per transaction
+    :type chunk_size: int
+    :param on_error: called with every invalid row as it is found
+    :type on_error: Optional[Callable[[ImportRowError], None]]
+    """
+    if kind == "organizations" and user_id is None:
+        raise ValueError("Importing organizations requires the id of their creator")
+    if (
+        user_id is not None
+        and conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        is None
+    ):
+        raise ValueError(f"User {user_id} not found")
+    model = _MODELS[kind]
+    checkpoint = conn.execute(
+        """
+        SELECT kind, line_number, inserted_count, error_count
+        FROM import_checkpoints WHERE import_id = ?
+        """,
+        (import_id,),
+    ).fetchone()
+    if checkpoint is not None and checkpoint["kind"] != kind:
+        raise ValueError(f"The import id belongs to an import of {checkpoint['kind']}")
+    resumed_from = checkpoint["line_number"] if checkpoint else 0
+    report = ImportReport(
+        import_id=import_id,
+        kind=kind,
+        line_number=resumed_from,
+        resumed_from=resumed_from,
+        inserted_count=checkpoint["inserted_count"] if checkpoint else 0,
+        error_count=checkpoint["error_count"] if checkpoint else 0,
+        errors=[],
+    )
+
+    pending = (record for record in records if record[0] > resumed_from)
+    for chunk in chunked(pending, chunk_size):
+        # validate outside the transaction, it only needs the rows
+        rows: list[tuple[int, BaseModel]] = []
+        errors: dict[int, list[str]] = {}
+        for line_number, record, error in chunk:
+            if error is not None:
+                errors[line_number] = [error]
+                continue
+            try:
+                rows.append((line_number, model.model_validate(record)))
+            except ValidationError as validation_error:
+                errors[line_number] = _validation_messages(validation_error)
+
+        # IMMEDIATE takes the write lock up front, so the organization checks still
+        # hold when the rows are inserted
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if kind == "events":
+                for line_number, error in _check_organizations(
+                    conn, rows, user_id
+                ).items():
+                    errors[line_number] = [error]
+                rows = [row for row in rows if row[0] not in errors]
+                new_event_ids = insert_events(conn, [row for _, row in rows])
+            else:
+                _insert_organizations(conn, [row for _, row in rows], user_id)
+                new_event_ids = []
+            line_number = chunk[-1][0]
+            conn.execute(
+                """
+                INSERT INTO import_checkpoints
+                    (import_id, kind, line_number, inserted_count, error_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (import_id) DO UPDATE SET
+                    line_number = excluded.line_number,
+                    inserted_count = inserted_count + excluded.inserted_count,
+                    error_count = error_count + excluded.error_count,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (import_id, kind, line_number, len(rows), len(errors)),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        event_index.upsert(conn, *new_event_ids)
+        report.line_number = line_number
+        report.inserted_count += len(rows)
+        report.error_count += len(errors)
+        for line_number in sorted(errors):
+            row_error = ImportRowError(line=line_number, errors=errors[line_number])
+            if on_error is not None:
+                on_error(row_error)
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(row_error)
+    return report
+
+
+def main(
+    kind: str,
+    path: str,
+    format: Optional[str],
+    import_id: Optional[str],
+    created_by_user_id: Optional[int],
+    chunk_size: int,
+) -> None:
+    if format is None:
+        format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    # make sure the checkpoint table exists
+    init_db()
+    conn = connect()
+    started = time.perf_counter()
+    try:
+        # utf-8-sig also reads the byte order mark spreadsheet exports start with
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            report = import_records(
+                conn,
+                kind,
+                read_records(file, format),
+                import_id or f"{kind}:{os.path.abspath(path)}",
+                user_id=created_by_user_id,
+                chunk_size=chunk_size,
+                on_error=lambda error: print(
+                    f"line {error.line}: {'; '.join(error.errors)}", file=sys.stderr
+                ),
+            )
+    except ValueError as error:
+        sys.exit(str(error))
+    finally:
+        conn.close()
+    resumed = (
+        f", resumed after line {report.resumed_from}" if report.resumed_from else ""
+    )
+    print(
+        f"imported {kind} up to line {report.line_number} in "
+        f"{time.perf_counter() - started:.1f}s{resumed}: "
+        f"{report.inserted_count} inserted, {report.error_count} errors"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format", choices=IMPORT_FORMATS, default=None, help="default: by extension"
+    )
+    parser.add_argument(
+        "--import-id", default=None, help="default: the kind and path of the file"
+    )
+    parser.add_argument(
+        "--created-by-user-id",
+        type=int,
+        default=None,
+        help="creator and admin of imported organizations",
+    )
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    main(
+        args.kind,
+        args.path,
+        args.format,
+        args.import_id,
+        args.created_by_user_id,
+        args.chunk_size,
+    )
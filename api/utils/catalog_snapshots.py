@@ -0,0 +1,393 @@
+"""
+Precomputed snapshots of the public event catalog.
+
+The pages anonymous visitors see run the same queries for every visit: the upcoming
+events of the home page, the events page (unfiltered or by category) and the
+organization directory. This module materializes them, plus the events of each of the
+next ``CATALOG_SNAPSHOT_DAYS`` days (environment variable, default 14), as static JSON
+files in ``CATALOG_SNAPSHOT_DIR`` (default ``api/catalog``), each next to a gzip
+compressed copy (and a brotli one when the ``brotli`` package is installed).
+``routes/catalog.py`` serves them without touching SQLite.
+
+Files are named after a hash of their content, so they never change and are served
+with a cache lifetime of a year. ``manifest.json`` maps every view to its current file
+and is the only file clients revalidate:
+
+- ``upcoming``: the next ``CATALOG_UPCOMING_LIMIT`` events, as on the home page
+- ``events``: every event, as on the unfiltered events page
+- ``events/category/<category>``: the events of one category
+- ``events/day/<YYYY-MM-DD>``: the events of one day
+- ``organizations``: the organization directory
+
+Events have the fields of the client's event cards and their organization, exactly as
+``list_events`` returns them with the same parameters.
+
+A refresh only rebuilds the views affected by the ``change_log`` entries since the last
+one: the views that held a changed event or organization and those a changed event now
+belongs to. Changes to recurring events rebuild every event view. The server refreshes
+every ``CATALOG_SNAPSHOT_INTERVAL_SECONDS`` (default 60, 0 to disable), and a refresh can
+be run from the ``api`` directory:
+
+    python -m utils.catalog_snapshots
+    python -m utils.catalog_snapshots --full
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import anyio
+from fastapi.encoders import jsonable_encoder
+
+from db import connect, init_db
+from routes.events import (
+    MAX_EVENT_LIST_LIMIT,
+    _parse_event_expand,
+    _parse_event_fields,
+    _query_events,
+)
+from routes.organization import _query_organizations
+from utils.change_log import compacted_through
+from utils.logger import get_logger
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip copies are written without it
+    brotli = None
+
+logger = get_logger(__name__)
+
+CATALOG_SNAPSHOT_DIR = Path(
+    os.environ.get(
+        "CATALOG_SNAPSHOT_DIR", Path(__file__).resolve().parent.parent / "catalog"
+    )
+)
+CATALOG_SNAPSHOT_DAYS = int(os.environ.get("CATALOG_SNAPSHOT_DAYS", "14"))
+CATALOG_UPCOMING_LIMIT = int(os.environ.get("CATALOG_UPCOMING_LIMIT", "6"))
+CATALOG_ORGANIZATION_LIMIT = int(os.environ.get("CATALOG_ORGANIZATION_LIMIT", "1000"))
+CATALOG_SNAPSHOT_INTERVAL_SECONDS = float(
+    os.environ.get("CATALOG_SNAPSHOT_INTERVAL_SECONDS", "60")
+)
+
+MANIFEST_FILE = "manifest.json"
+# what the last refresh was built from, not served
+_STATE_FILE = "state.json"
+
+# files no longer in the manifest are kept this long for clients holding an older one
+_STALE_FILE_SECONDS = 3600
+
+# past this many changes since the last refresh, rebuild everything instead of working
+# out what they affect
+_MAX_INCREMENTAL_CHANGES = 10_000
+
+# the event fields of the client's event cards (EVENT_CARD_QUERY)
+_CARD_FIELDS = _parse_event_fields(["id,name,date_time,location,category"])
+_CARD_EXPAND = _parse_event_expand(["organization"])
+
+# content codings written next to each file, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+
+def _render(content: Any) -> bytes:
+    """Serialize a response body the way FastAPI's JSONResponse does."""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _view_keys(conn: sqlite3.Connection, today: date) -> list[str]:
+    """Every view of the catalog as of ``today``."""
+    categories = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT category FROM events WHERE category IS NOT NULL
+            UNION
+            SELECT category FROM event_series WHERE category IS NOT NULL
+            """
+        )
+    ]
+    return [
+        "upcoming",
+        "events",
+        *(f"events/category/{category}" for category in sorted(categories)),
+        *(
+            f"events/day/{(today + timedelta(days=offset)).isoformat()}"
+            for offset in range(CATALOG_SNAPSHOT_DAYS)
+        ),
+        "organizations",
+    ]
+
+
+def _load_view(conn: sqlite3.Connection, key: str, today: date) -> list:
+    """Run the query of a view, with the parameters of the page it stands for."""
+    if key == "organizations":
+        return _query_organizations(conn, 0, CATALOG_ORGANIZATION_LIMIT, None)
+    params: dict[str, Any] = {"limit": MAX_EVENT_LIST_LIMIT}
+    if key == "upcoming":
+        params = {"begin_date": today.isoformat(), "limit": CATALOG_UPCOMING_LIMIT}
+    elif key.startswith("events/category/"):
+        params["category"] = [key.removeprefix("events/category/")]
+    elif key.startswith("events/day/"):
+        day = key.removeprefix("events/day/")
+        params.update(begin_date=day, end_date=day)
+    return _query_events(conn, fields=_CARD_FIELDS, expand=_CARD_EXPAND, **params)
+
+
+def _view_ids(key: str, items: list) -> dict[str, list[int]]:
+    """The events and organizations a view shows, to find it again when they change."""
+    if key == "organizations":
+        return {
+            "event_ids": [],
+            "organization_ids": [item.organization_id for item in items],
+        }
+    return {
+        "event_ids": [item["id"] for item in items],
+        "organization_ids": sorted(
+            {
+                item["organization"]["organization_id"]
+                for item in items
+                if item.get("organization")
+            }
+        ),
+    }
+
+
+def _affected_views(
+    conn: sqlite3.Connection, state: dict, today: date
+) -> Optional[set[str]]:
+    """
+    Work out which views the changes since the last refresh affect. Returns None when
+    every view has to be rebuilt.
+    """
+    rows = conn.execute(
+        """
+        SELECT entity, entity_key, operation FROM change_log
+        WHERE id > ? ORDER BY id LIMIT ?
+        """,
+        (state["cursor"], _MAX_INCREMENTAL_CHANGES + 1),
+    ).fetchall()
+    if len(rows) > _MAX_INCREMENTAL_CHANGES:
+        return None
+
+    views = state["views"]
+    affected: set[str] = set()
+    changed_events: set[int] = set()
+    changed_organizations: set[int] = set()
+    for row in rows:
+        key = json.loads(row["entity_key"])
+        if row["entity"] == "event_series":
+            return None
+        if row["entity"] == "event":
+            changed_events.add(key["id"])
+        elif row["entity"] == "organization":
+            changed_organizations.add(key["organization_id"])
+        elif row["entity"] == "role":
+            # member counts
+            affected.add("organizations")
+        # registration counts aren't part of any view
+
+    if changed_events:
+        # upcoming event counts of the directory, and the list of every event
+        affected.update(("organizations", "events", "upcoming"))
+    for view_key, view in views.items():
+        if not changed_events.isdisjoint(view["event_ids"]) or (
+            not changed_organizations.isdisjoint(view["organization_ids"])
+        ):
+            affected.add(view_key)
+    if changed_organizations:
+        affected.add("organizations")
+
+    # the views the changed events belong to now
+    changed = list(changed_events)
+    for start in range(0, len(changed), 500):
+        chunk = changed[start : start + 500]
+        for event in conn.execute(
+            f"""
+            SELECT category, date(date_time) AS day FROM events
+            WHERE id IN ({",".join("?" * len(chunk))})
+            """,
+            chunk,
+        ):
+            if event["category"] is not None:
+                affected.add(f"events/category/{event['category']}")
+            affected.add(f"events/day/{event['day']}")
+
+    if state["today"] != today.isoformat():
+        # the upcoming events and counts start from today
+        affected.update(("upcoming", "organizations"))
+    return affected
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def _write_file(directory: Path, body: bytes) -> str:
+    """Write a view's body and its compressed copies, unless they exist. Returns the name."""
+    name = f"{hashlib.sha256(body).hexdigest()[:20]}.json"
+    path = directory / name
+    if not path.exists():
+        # mtime=0 so the same body always compresses to the same bytes
+        _write_atomic(path.with_name(name + ".gz"), gzip.compress(body, 9, mtime=0))
+        if brotli is not None:
+            _write_atomic(path.with_name(name + ".br"), brotli.compress(body))
+        # written last, a file that exists always has its compressed copies
+        _write_atomic(path, body)
+    else:
+        # keep it from being cleaned up as stale
+        os.utime(path)
+    return name
+
+
+def _read_state(directory: Path) -> Optional[dict]:
+    try:
+        return json.loads((directory / _STATE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _remove_stale_files(directory: Path, current: set[str]) -> None:
+    cutoff = time.time() - _STALE_FILE_SECONDS
+    for path in directory.glob("*.json*"):
+        name = path.name.split(".json")[0] + ".json"
+        if name in current or path.name in (MANIFEST_FILE, _STATE_FILE):
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            # removed by another process
+            pass
+
+
+def refresh_catalog(
+    directory: Path = CATALOG_SNAPSHOT_DIR, full: bool = False
+) -> Optional[dict]:
+    """
+    Bring the catalog snapshots up to date with the database, rebuilding only the views
+    affected by the changes since the last refresh (every view when ``full``). Returns
+    what was done, or None when nothing changed.
+
+    Every view is read in one read transaction, so the files of a refresh are
+    consistent with each other. Files are written atomically, so refreshes of several
+    server processes can overlap. Every view is rebuilt when the database was reset
+    since the last refresh.
+
+    :param directory: where the snapshots are written
+    :type directory: Path
+    :param full: rebuild every view
+    :type full: bool
+    """
+    started = time.perf_counter()
+    directory.mkdir(parents=True, exist_ok=True)
+    state = _read_state(directory)
+    today = date.today()
+    conn = connect()
+    try:
+        conn.execute("BEGIN")
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"
+        ).fetchone()
+        cursor = row[0] if row else 0
+        # a cursor past the log means the database was dropped and created again
+        reset = state is not None and state["cursor"] > cursor
+        if full or reset:
+            state = None
+        elif state is not None and state["cursor"] < compacted_through(conn):
+            # deletes were compacted away, the views that held them can't be found
+            state = None
+        if (
+            state is not None
+            and state["cursor"] == cursor
+            and state["today"] == today.isoformat()
+        ):
+            return None
+
+        affected = None if state is None else _affected_views(conn, state, today)
+        previous = {} if state is None else state["views"]
+        views = {}
+        built = 0
+        for key in _view_keys(conn, today):
+            if affected is not None and key in previous and key not in affected:
+                views[key] = previous[key]
+                continue
+            items = _load_view(conn, key, today)
+            views[key] = {
+                "file": _write_file(directory, _render(items)),
+                **_view_ids(key, items),
+            }
+            built += 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+    current = _read_state(directory)
+    if current is not None and current["cursor"] > cursor and not reset:
+        # another process got further meanwhile
+        return None
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "views": {key: view["file"] for key, view in views.items()},
+    }
+    _write_atomic(directory / MANIFEST_FILE, _render(manifest))
+    _write_atomic(
+        directory / _STATE_FILE,
+        _render({"cursor": cursor, "today": today.isoformat(), "views": views}),
+    )
+    _remove_stale_files(directory, {view["file"] for view in views.values()})
+    return {
+        "views": len(views),
+        "rebuilt": built,
+        "cursor": cursor,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def refresh_catalog_periodically(
+    interval: float = CATALOG_SNAPSHOT_INTERVAL_SECONDS,
+) -> None:
+    """Refresh the snapshots every ``interval`` seconds, for the server's lifespan."""
+    while True:
+        try:
+            report = await anyio.to_thread.run_sync(refresh_catalog)
+            if report is not None:
+                logger.info("Refreshed the catalog snapshots: %s", report)
+        except Exception:
+            logger.exception("Refreshing the catalog snapshots failed")
+        await asyncio.sleep(interval)
+
+
+def main(full: bool) -> None:
+    # make sure the change log exists
+    init_db()
+    report = refresh_catalog(full=full)
+    if report is None:
+        print("catalog snapshots are up to date")
+        return
+    print(
+        f"refreshed the catalog snapshots in {report['seconds']:.2f}s: "
+        f"{report['rebuilt']} of {report['views']} views rebuilt "
+        f"(change log cursor {report['cursor']})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--full", action="store_true", help="rebuild every view")
+    args = parser.parse_args()
+    main(args.full)
@@ -0,0 +1,102 @@
+"""
+Compaction of the ``change_log`` change data capture table.
+
+Triggers append an entry to ``change_log`` for every insert, update and delete on the
+core tables. Entries are kept in full for ``CHANGE_LOG_RETENTION_DAYS`` (environment
+variable, default 7). Past that, compaction removes the entries superseded by a later
+change of the same row and the deletes, so the log stays about as large as the tables
+it describes. Consumers that synced within the retention period never miss a change;
+consumers behind a removed delete are told to resync (``compacted_through``).
+
+Compaction runs when the server starts and can be run from the ``api`` directory, e.g.
+from a daily cron job:
+
+    python -m utils.change_log
+    python -m utils.change_log --retention-days 30
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from db import connect, init_db
+
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get("CHANGE_LOG_RETENTION_DAYS", "7"))
+
+
+def compacted_through(conn: sqlite3.Connection) -> int:
+    """The highest cursor of a delete removed by compaction, 0 if none was."""
+    row = conn.execute(
+        "SELECT compacted_through FROM change_log_compaction WHERE id = 1"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def compact_change_log(
+    conn: sqlite3.Connection, retention_days: int = CHANGE_LOG_RETENTION_DAYS
+) -> int:
+    """
+    Remove the entries older than ``retention_days`` that are deletes or were superseded
+    by a later change of the same row, in one transaction. Returns the number of entries
+    removed.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param retention_days: how long every entry is kept
+    :type retention_days: int
+    """
+    params = {"cutoff": f"-{retention_days} days"}
+    with conn:
+        # consumers behind the last removed delete could still hold the deleted row
+        conn.execute(
+            """
+            UPDATE change_log_compaction
+            SET compacted_through = MAX(compacted_through, (
+                SELECT COALESCE(MAX(id), 0) FROM change_log
+                WHERE operation = 'delete' AND changed_at < datetime('now', :cutoff)
+            ))
+            WHERE id = 1
+            """,
+            params,
+        )
+        cursor = conn.execute(
+            """
+            DELETE FROM change_log
+            WHERE changed_at < datetime('now', :cutoff)
+              AND (
+                  operation = 'delete'
+                  OR EXISTS (
+                      SELECT 1 FROM change_log AS later
+                      WHERE later.entity = change_log.entity
+                        AND later.entity_key = change_log.entity_key
+                        AND later.id > change_log.id
+                  )
+              )
+            """,
+            params,
+        )
+    return cursor.rowcount
+
+
+def main(retention_days: int) -> None:
+    # make sure the change log exists
+    init_db()
+    conn = connect()
+    try:
+        started = time.perf_counter()
+        removed = compact_change_log(conn, retention_days)
+        (remaining,) = conn.execute("SELECT COUNT(*) FROM change_log").fetchone()
+    finally:
+        conn.close()
+    print(
+        f"compacted the change log in {time.perf_counter() - started:.1f}s: "
+        f"{removed} entries removed, {remaining} left"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--retention-days", type=int, default=CHANGE_LOG_RETENTION_DAYS)
+    args = parser.parse_args()
+    main(args.retention_days)
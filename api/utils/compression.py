@@ -0,0 +1,350 @@
+"""
+Negotiated gzip/brotli compression of responses, with a cache of compressed bodies.
+
+``CompressionMiddleware`` compresses every response whose client accepts it (brotli is
+preferred when the ``brotli`` package is installed) once its body is at least
+``COMPRESSION_MIN_SIZE`` bytes. Streamed responses (e.g. ``list_events`` as NDJSON) are
+compressed chunk by chunk, each chunk flushed so the client can decode rows as they
+arrive. Responses that are already encoded (the organization exports and the catalog
+files, compressed ahead of time) and server-sent event streams are sent as they are.
+
+Compressing a few hundred KB costs milliseconds, so the compressed bodies of cacheable
+responses, those with an ETag (see ``utils/etag.py``), are kept in a ``ResultCache``.
+Entries are keyed on the request and the response's media type and encoding, and are
+only valid for the ETag they were compressed for, which changes with the content, so a
+hot list is compressed once per change instead of once per request.
+
+Bytes in and out, the compression ratio and the time spent compressing are counted per
+encoding for the metrics endpoint, and ``python -m utils.benchmark_compression``
+compares levels on the list payloads.
+"""
+
+import gzip
+import os
+import threading
+import time
+import zlib
+from typing import Any, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.result_cache import ResultCache
+
+try:
+    import brotli
+except ImportError:  # optional, responses are only gzip compressed without it
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSED_CACHE_MAX_ENTRIES = int(
+    os.environ.get("COMPRESSED_CACHE_MAX_ENTRIES", "256")
+)
+COMPRESSED_CACHE_TTL_SECONDS = float(
+    os.environ.get("COMPRESSED_CACHE_TTL_SECONDS", "300")
+)
+
+# in order of preference
+COMPRESSION_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# larger bodies are compressed in the threadpool, not to hold up the event loop
+_THREADPOOL_MIN_SIZE = 64 * 1024
+
+
+def preferred_encoding(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """
+    The first of ``encodings`` an Accept-Encoding header allows, if any.
+
+    :param accept_encoding: the request's Accept-Encoding header
+    :type accept_encoding: str
+    :param encodings: the content codings the response can be sent in, preferred first
+    :type encodings: Iterable[str]
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, *params = [value.strip() for value in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.lower())
+    for encoding in encodings:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a whole response body.
+
+    :param body: the response body
+    :type body: bytes
+    :param encoding: 'br' or 'gzip'
+    :type encoding: str
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    # no timestamp, so the same body always compresses to the same bytes
+    return gzip.compress(body, COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Compresses a streamed body chunk by chunk, flushing each one."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 writes the gzip container instead of a raw zlib stream
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, wbits=31)
+
+    def compress(self, chunk: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._brotli.process(chunk)
+            return data + (self._brotli.finish() if last else self._brotli.flush())
+        data = self._zlib.compress(chunk)
+        return data + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionStats:
+    """Per encoding counters of the compressed responses, for the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings: dict[str, dict[str, Any]] = {}
+        self._skipped = 0
+
+    def record(
+        self,
+        encoding: str,
+        size: int,
+        compressed_size: int,
+        seconds: float,
+        cached: bool,
+    ) -> None:
+        """
+        Count a compressed response.
+
+        :param encoding: the content coding it was sent in
+        :type encoding: str
+        :param size: the size of the body before compression
+        :type size: int
+        :param compressed_size: the size of the body sent
+        :type compressed_size: int
+        :param seconds: the time spent compressing it, 0 when it came from the cache
+        :type seconds: float
+        :param cached: whether it came from the cache
+        :type cached: bool
+        """
+        with self._lock:
+            counters = self._encodings.setdefault(
+                encoding,
+                {
+                    "responses": 0,
+                    "cache_hits": 0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                    "compress_seconds": 0.0,
+                },
+            )
+            counters["responses"] += 1
+            counters["cache_hits"] += cached
+            counters["bytes_in"] += size
+            counters["bytes_out"] += compressed_size
+            counters["compress_seconds"] += seconds
+
+    def skip(self) -> None:
+        """Count a response sent uncompressed to a client accepting compression."""
+        with self._lock:
+            self._skipped += 1
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Bytes, ratio (compressed size over original size) and compression time per
+        encoding, and the counters of the compressed body cache.
+        """
+        with self._lock:
+            encodings = {}
+            for encoding, counters in self._encodings.items():
+                compressed = counters["responses"] - counters["cache_hits"]
+                encodings[encoding] = {
+                    "responses": counters["responses"],
+                    "cache_hits": counters["cache_hits"],
+                    "bytes_in": counters["bytes_in"],
+                    "bytes_out": counters["bytes_out"],
+                    "ratio": (
+                        counters["bytes_out"] / counters["bytes_in"]
+                        if counters["bytes_in"]
+                        else 0.0
+                    ),
+                    "compress_ms": counters["compress_seconds"] * 1000,
+                    "mean_compress_ms": (
+                        counters["compress_seconds"] * 1000 / compressed
+                        if compressed
+                        else 0.0
+                    ),
+                }
+            return {
+                "min_size": COMPRESSION_MIN_SIZE,
+                "encodings": encodings,
+                "skipped": self._skipped,
+                "cache": compressed_cache.stats(),
+            }
+
+
+# compressed bodies of responses with an ETag, see the module docstring
+compressed_cache = ResultCache(
+    max_entries=COMPRESSED_CACHE_MAX_ENTRIES,
+    ttl_seconds=COMPRESSED_CACHE_TTL_SECONDS,
+)
+compression_stats = CompressionStats()
+
+
+def _compressible(status: int, headers: Headers) -> bool:
+    if status < 200 or status in (204, 304):
+        return False
+    if "content-encoding" in headers:
+        return False
+    # events must reach the client as soon as they are sent
+    return not headers.get("content-type", "").startswith("text/event-stream")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the encoding the client prefers, see the
+    module docstring.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = preferred_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), COMPRESSION_ENCODINGS
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(scope, send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Compresses the response of one request as the app sends it."""
+
+    def __init__(self, scope: Scope, send: Send, encoding: str, minimum_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_StreamCompressor] = None
+        self._passthrough = False
+        self._size = 0
+        self._compressed_size = 0
+        self._seconds = 0.0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # held back until the first body chunk tells whether to compress
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not _compressible(start["status"], headers) or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                self._passthrough = True
+                compression_stats.skip()
+                await self._send(start)
+                await self._send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            # routes like the catalog files already vary on it
+            vary = [
+                value.strip().lower() for value in headers.get("vary", "").split(",")
+            ]
+            if "accept-encoding" not in vary:
+                headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                compressed = await self._compress_body(body, headers)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            self._compressor = _StreamCompressor(self.encoding)
+            await self._send(start)
+
+        started = time.perf_counter()
+        data = self._compressor.compress(body, last=not more_body)
+        self._seconds += time.perf_counter() - started
+        self._size += len(body)
+        self._compressed_size += len(data)
+        if not more_body:
+            compression_stats.record(
+                self.encoding, self._size, self._compressed_size, self._seconds, False
+            )
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
+
+    async def _compress_body(self, body: bytes, headers: MutableHeaders) -> bytes:
+        etag = headers.get("etag")
+        cacheable = (
+            etag is not None
+            and self.scope["method"] == "GET"
+            and "no-store" not in headers.get("cache-control", "")
+        )
+        key = (
+            self.scope["path"],
+            self.scope["query_string"],
+            headers.get("content-type"),
+            self.encoding,
+        )
+        if cacheable:
+            cached = compressed_cache.get(key, etag)
+            # the size guards against a tag shared by two different bodies
+            if cached is not None and cached[0] == len(body):
+                compression_stats.record(
+                    self.encoding, len(body), len(cached[1]), 0.0, True
+                )
+                return cached[1]
+
+        started = time.perf_counter()
+        if len(body) >= _THREADPOOL_MIN_SIZE:
+            compressed = await run_in_threadpool(compress, body, self.encoding)
+        else:
+            compressed = compress(body, self.encoding)
+        compression_stats.record(
+            self.encoding,
+            len(body),
+            len(compressed),
+            time.perf_counter() - started,
+            False,
+        )
+        if cacheable:
+            compressed_cache.set(key, etag, (len(body), compressed))
+        return compressed
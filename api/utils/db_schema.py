@@ -47,6 +47,9 @@ CREATE TABLE IF NOT EXISTS event_registrations (
     registration_time TEXT NOT NULL,
     PRIMARY KEY (user_id, organization_id, event_id)
 );
+CREATE INDEX IF NOT EXISTS idx_event_registrations_event ON event_registrations (event_id);
+CREATE INDEX IF NOT EXISTS idx_event_registrations_organization_event ON event_registrations (organization_id, event_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_roles_organization ON roles (organization_id, user_id);
 CREATE TABLE IF NOT EXISTS events (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL, 
@@ -55,16 +58,759 @@ CREATE TABLE IF NOT EXISTS events (
     date_time TEXT NOT NULL,
     organization_id INTEGER NOT NULL,
     category TEXT DEFAULT NULL,
+    -- maximum number of registrations, NULL means unlimited
+    capacity INTEGER DEFAULT NULL CHECK (capacity IS NULL OR capacity > 0),
+    duration_minutes INTEGER NOT NULL DEFAULT 60 CHECK (duration_minutes > 0),
+    -- set for materialized occurrences of a recurring event (see utils/recurrence.py)
+    series_id INTEGER DEFAULT NULL,
+    occurrence_index INTEGER DEFAULT NULL,
     FOREIGN KEY (organization_id) REFERENCES organizations(organization_id)
 );
+-- list_events filters and sorts on date_time, optionally scoped to organizations
+CREATE INDEX IF NOT EXISTS idx_events_date_time ON events (date_time);
+CREATE INDEX IF NOT EXISTS idx_events_organization_date_time ON events (organization_id, date_time);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_series_occurrence ON events (series_id, occurrence_index) WHERE series_id IS NOT NULL;
+-- Recurring events, stored once and expanded into occurrences at query time.
+-- first_date_time is the first occurrence, until the last day one may fall on.
+CREATE TABLE IF NOT EXISTS event_series (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    location TEXT NOT NULL,
+    first_date_time TEXT NOT NULL,
+    organization_id INTEGER NOT NULL,
+    category TEXT DEFAULT NULL,
+    capacity INTEGER DEFAULT NULL CHECK (capacity IS NULL OR capacity > 0),
+    duration_minutes INTEGER NOT NULL DEFAULT 60 CHECK (duration_minutes > 0),
+    frequency TEXT NOT NULL CHECK (frequency IN ('weekly', 'monthly')),
+    interval INTEGER NOT NULL DEFAULT 1 CHECK (interval > 0),
+    until TEXT DEFAULT NULL,
+    FOREIGN KEY (organization_id) REFERENCES organizations(organization_id)
+);
+CREATE INDEX IF NOT EXISTS idx_event_series_organization ON event_series (organization_id);
+-- Days on which an occurrence of a series is cancelled
+CREATE TABLE IF NOT EXISTS event_series_exceptions (
+    series_id INTEGER NOT NULL,
+    occurrence_date TEXT NOT NULL,
+    PRIMARY KEY (series_id, occurrence_date),
+    FOREIGN KEY (series_id) REFERENCES event_series(id) ON DELETE CASCADE
+);
 CREATE TABLE IF NOT EXISTS user_interests (
     user_id   INTEGER NOT NULL,
     category  TEXT NOT NULL,
     PRIMARY KEY (user_id, category),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
+-- Write counters per table, bumped by the triggers below on every insert, update and delete.
+-- Cached results remember the versions they were computed from and are discarded as soon as
+-- a counter moves, including for writes made by other server processes.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO table_versions (table_name)
+VALUES ('events'), ('organizations'), ('event_registrations'), ('roles'), ('event_series');
+CREATE TRIGGER IF NOT EXISTS trg_events_version_insert AFTER INSERT ON events
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'events';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_version_update AFTER UPDATE ON events
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'events';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_version_delete AFTER DELETE ON events
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'events';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_version_insert AFTER INSERT ON organizations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'organizations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_version_update AFTER UPDATE ON organizations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'organizations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_version_delete AFTER DELETE ON organizations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'organizations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_version_insert AFTER INSERT ON event_registrations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_registrations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_version_update AFTER UPDATE ON event_registrations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_registrations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_version_delete AFTER DELETE ON event_registrations
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_registrations';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_version_insert AFTER INSERT ON roles
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'roles';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_version_update AFTER UPDATE ON roles
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'roles';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_version_delete AFTER DELETE ON roles
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'roles';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_version_insert AFTER INSERT ON event_series
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_version_update AFTER UPDATE ON event_series
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_version_delete AFTER DELETE ON event_series
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_version_insert AFTER INSERT ON event_series_exceptions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_version_update AFTER UPDATE ON event_series_exceptions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_version_delete AFTER DELETE ON event_series_exceptions
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = 'event_series';
+END;
+-- Write counters per row of what single-row routes return, bumped by the triggers below
+-- whenever the row or something its response includes (registration and member counts)
+-- changes. Routes hash them into ETags (utils/etag.py) to answer conditional requests
+-- without loading the row. Rows not written since the table was added read as version 0.
+CREATE TABLE IF NOT EXISTS row_versions (
+    entity TEXT NOT NULL CHECK (entity IN ('event', 'organization', 'user')),
+    entity_id INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (entity, entity_id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_events_row_version_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', NEW.id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_row_version_update AFTER UPDATE ON events
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', NEW.id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', OLD.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_row_version_delete AFTER DELETE ON events
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', OLD.id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', OLD.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_row_version_insert AFTER INSERT ON event_registrations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', NEW.event_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_row_version_update AFTER UPDATE ON event_registrations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', OLD.event_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', NEW.event_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_row_version_delete AFTER DELETE ON event_registrations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('event', OLD.event_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_row_version_insert AFTER INSERT ON organizations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_row_version_update AFTER UPDATE ON organizations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_row_version_delete AFTER DELETE ON organizations
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', OLD.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_row_version_insert AFTER INSERT ON roles
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_row_version_update AFTER UPDATE ON roles
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', OLD.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', NEW.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_row_version_delete AFTER DELETE ON roles
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('organization', OLD.organization_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_users_row_version_update AFTER UPDATE ON users
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('user', NEW.user_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_users_row_version_delete AFTER DELETE ON users
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('user', OLD.user_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_interests_row_version_insert AFTER INSERT ON user_interests
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('user', NEW.user_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_interests_row_version_delete AFTER DELETE ON user_interests
+BEGIN
+    INSERT INTO row_versions (entity, entity_id) VALUES ('user', OLD.user_id)
+        ON CONFLICT DO UPDATE SET version = version + 1;
+END;
+-- Counters kept exactly in sync by the triggers below, so list routes can return them
+-- without a COUNT(*) per row. REBUILD_COUNTERS_SQL recomputes them from scratch.
+CREATE TABLE IF NOT EXISTS event_counters (
+    event_id INTEGER PRIMARY KEY,
+    registration_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS organization_counters (
+    organization_id INTEGER PRIMARY KEY,
+    admin_count INTEGER NOT NULL DEFAULT 0,
+    volunteer_count INTEGER NOT NULL DEFAULT 0
+);
+-- Number of events, registrations and open seats per organization, day and category
+-- ('' when the event has none). Upcoming event counts are the sum of the rows from
+-- today onwards, and the events calendar sums rows per day. open_seats only covers
+-- events with a capacity, as capacity minus registrations.
+CREATE TABLE IF NOT EXISTS event_day_rollups (
+    organization_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    event_count INTEGER NOT NULL DEFAULT 0,
+    registration_count INTEGER NOT NULL DEFAULT 0,
+    open_seats INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (organization_id, day, category)
+);
+CREATE INDEX IF NOT EXISTS idx_event_day_rollups_day ON event_day_rollups (day);
+CREATE TRIGGER IF NOT EXISTS trg_event_counters_registration_insert AFTER INSERT ON event_registrations
+BEGIN
+    INSERT INTO event_counters (event_id, registration_count) VALUES (NEW.event_id, 1)
+    ON CONFLICT (event_id) DO UPDATE SET registration_count = registration_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_counters_registration_delete AFTER DELETE ON event_registrations
+BEGIN
+    UPDATE event_counters SET registration_count = registration_count - 1
+    WHERE event_id = OLD.event_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_counters_registration_update AFTER UPDATE OF event_id ON event_registrations
+BEGIN
+    UPDATE event_counters SET registration_count = registration_count - 1
+    WHERE event_id = OLD.event_id;
+    INSERT INTO event_counters (event_id, registration_count) VALUES (NEW.event_id, 1)
+    ON CONFLICT (event_id) DO UPDATE SET registration_count = registration_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_counters_event_delete AFTER DELETE ON events
+BEGIN
+    DELETE FROM event_counters WHERE event_id = OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organization_counters_role_insert AFTER INSERT ON roles
+BEGIN
+    INSERT INTO organization_counters (organization_id, admin_count, volunteer_count)
+    VALUES (
+        NEW.organization_id,
+        NEW.permission_level = 'admin',
+        NEW.permission_level = 'volunteer'
+    )
+    ON CONFLICT (organization_id) DO UPDATE SET
+        admin_count = admin_count + (NEW.permission_level = 'admin'),
+        volunteer_count = volunteer_count + (NEW.permission_level = 'volunteer');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organization_counters_role_delete AFTER DELETE ON roles
+BEGIN
+    UPDATE organization_counters SET
+        admin_count = admin_count - (OLD.permission_level = 'admin'),
+        volunteer_count = volunteer_count - (OLD.permission_level = 'volunteer')
+    WHERE organization_id = OLD.organization_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organization_counters_role_update AFTER UPDATE OF permission_level, organization_id ON roles
+BEGIN
+    UPDATE organization_counters SET
+        admin_count = admin_count - (OLD.permission_level = 'admin'),
+        volunteer_count = volunteer_count - (OLD.permission_level = 'volunteer')
+    WHERE organization_id = OLD.organization_id;
+    INSERT INTO organization_counters (organization_id, admin_count, volunteer_count)
+    VALUES (
+        NEW.organization_id,
+        NEW.permission_level = 'admin',
+        NEW.permission_level = 'volunteer'
+    )
+    ON CONFLICT (organization_id) DO UPDATE SET
+        admin_count = admin_count + (NEW.permission_level = 'admin'),
+        volunteer_count = volunteer_count + (NEW.permission_level = 'volunteer');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organization_counters_organization_delete AFTER DELETE ON organizations
+BEGIN
+    DELETE FROM organization_counters WHERE organization_id = OLD.organization_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_event_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO event_day_rollups (organization_id, day, category, event_count)
+    VALUES (NEW.organization_id, date(NEW.date_time), COALESCE(NEW.category, ''), 1)
+    ON CONFLICT (organization_id, day, category) DO UPDATE SET event_count = event_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_event_delete AFTER DELETE ON events
+BEGIN
+    UPDATE event_day_rollups SET event_count = event_count - 1
+    WHERE organization_id = OLD.organization_id
+      AND day = date(OLD.date_time)
+      AND category = COALESCE(OLD.category, '');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_event_update AFTER UPDATE OF date_time, organization_id, category ON events
+BEGIN
+    UPDATE event_day_rollups SET event_count = event_count - 1
+    WHERE organization_id = OLD.organization_id
+      AND day = date(OLD.date_time)
+      AND category = COALESCE(OLD.category, '');
+    INSERT INTO event_day_rollups (organization_id, day, category, event_count)
+    VALUES (NEW.organization_id, date(NEW.date_time), COALESCE(NEW.category, ''), 1)
+    ON CONFLICT (organization_id, day, category) DO UPDATE SET event_count = event_count + 1;
+END;
+-- registration_count and open_seats of event_day_rollups. Upserts are used on the event
+-- side because the event_count triggers above may run before or after these ones.
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_seats_event_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO event_day_rollups (organization_id, day, category, open_seats)
+    VALUES (NEW.organization_id, date(NEW.date_time), COALESCE(NEW.category, ''), COALESCE(NEW.capacity, 0))
+    ON CONFLICT (organization_id, day, category) DO UPDATE SET
+        open_seats = open_seats + COALESCE(NEW.capacity, 0);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_seats_event_delete AFTER DELETE ON events
+BEGIN
+    UPDATE event_day_rollups SET
+        registration_count = registration_count - (
+            SELECT COUNT(*) FROM event_registrations WHERE event_id = OLD.id
+        ),
+        open_seats = open_seats - COALESCE(
+            OLD.capacity - (SELECT COUNT(*) FROM event_registrations WHERE event_id = OLD.id),
+            0
+        )
+    WHERE organization_id = OLD.organization_id
+      AND day = date(OLD.date_time)
+      AND category = COALESCE(OLD.category, '');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_seats_event_update AFTER UPDATE OF date_time, organization_id, category, capacity ON events
+BEGIN
+    UPDATE event_day_rollups SET
+        registration_count = registration_count - (
+            SELECT COUNT(*) FROM event_registrations WHERE event_id = OLD.id
+        ),
+        open_seats = open_seats - COALESCE(
+            OLD.capacity - (SELECT COUNT(*) FROM event_registrations WHERE event_id = OLD.id),
+            0
+        )
+    WHERE organization_id = OLD.organization_id
+      AND day = date(OLD.date_time)
+      AND category = COALESCE(OLD.category, '');
+    INSERT INTO event_day_rollups (organization_id, day, category, registration_count, open_seats)
+    VALUES (
+        NEW.organization_id,
+        date(NEW.date_time),
+        COALESCE(NEW.category, ''),
+        (SELECT COUNT(*) FROM event_registrations WHERE event_id = NEW.id),
+        COALESCE(
+            NEW.capacity - (SELECT COUNT(*) FROM event_registrations WHERE event_id = NEW.id),
+            0
+        )
+    )
+    ON CONFLICT (organization_id, day, category) DO UPDATE SET
+        registration_count = registration_count + excluded.registration_count,
+        open_seats = open_seats + excluded.open_seats;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_registration_insert AFTER INSERT ON event_registrations
+BEGIN
+    UPDATE event_day_rollups SET
+        registration_count = registration_count + 1,
+        open_seats = open_seats - (SELECT capacity IS NOT NULL FROM events WHERE id = NEW.event_id)
+    WHERE (organization_id, day, category) = (
+        SELECT organization_id, date(date_time), COALESCE(category, '')
+        FROM events
+        WHERE id = NEW.event_id
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_day_rollups_registration_delete AFTER DELETE ON event_registrations
+BEGIN
+    UPDATE event_day_rollups SET
+        registration_count = registration_count - 1,
+        open_seats = open_seats + (SELECT capacity IS NOT NULL FROM events WHERE id = OLD.event_id)
+    WHERE (organization_id, day, category) = (
+        SELECT organization_id, date(date_time), COALESCE(category, '')
+        FROM events
+        WHERE id = OLD.event_id
+    );
+END;
+-- Weekly analytics rollups for the organization dashboard, bucketed by the Monday of
+-- the week a registration was made. Rows that drop to zero registrations are deleted,
+-- so the number of rows per organization and week is the number of active volunteers.
+-- The triggers below only keep them up to date; utils/backfill_rollups.py fills them
+-- from existing registrations (REBUILD_ANALYTICS_SQL).
+CREATE TABLE IF NOT EXISTS event_week_registrations (
+    event_id INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    organization_id INTEGER NOT NULL,
+    registration_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, week)
+);
+CREATE INDEX IF NOT EXISTS idx_event_week_registrations_organization_week ON event_week_registrations (organization_id, week);
+CREATE TABLE IF NOT EXISTS organization_volunteer_weeks (
+    organization_id INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    registration_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (organization_id, week, user_id)
+);
+CREATE TRIGGER IF NOT EXISTS trg_analytics_registration_insert AFTER INSERT ON event_registrations
+BEGIN
+    INSERT INTO event_week_registrations (event_id, week, organization_id, registration_count)
+    SELECT NEW.event_id, date(NEW.registration_time, 'weekday 0', '-6 days'), NEW.organization_id, 1
+    WHERE EXISTS (SELECT 1 FROM events WHERE id = NEW.event_id)
+    ON CONFLICT (event_id, week) DO UPDATE SET registration_count = registration_count + 1;
+    INSERT INTO organization_volunteer_weeks (organization_id, week, user_id, registration_count)
+    VALUES (NEW.organization_id, date(NEW.registration_time, 'weekday 0', '-6 days'), NEW.user_id, 1)
+    ON CONFLICT (organization_id, week, user_id) DO UPDATE SET registration_count = registration_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_analytics_registration_delete AFTER DELETE ON event_registrations
+BEGIN
+    UPDATE event_week_registrations SET registration_count = registration_count - 1
+    WHERE event_id = OLD.event_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days');
+    DELETE FROM event_week_registrations
+    WHERE event_id = OLD.event_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND registration_count <= 0;
+    UPDATE organization_volunteer_weeks SET registration_count = registration_count - 1
+    WHERE organization_id = OLD.organization_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND user_id = OLD.user_id;
+    DELETE FROM organization_volunteer_weeks
+    WHERE organization_id = OLD.organization_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND user_id = OLD.user_id
+      AND registration_count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_analytics_registration_update AFTER UPDATE OF user_id, event_id, organization_id, registration_time ON event_registrations
+BEGIN
+    UPDATE event_week_registrations SET registration_count = registration_count - 1
+    WHERE event_id = OLD.event_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days');
+    DELETE FROM event_week_registrations
+    WHERE event_id = OLD.event_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND registration_count <= 0;
+    UPDATE organization_volunteer_weeks SET registration_count = registration_count - 1
+    WHERE organization_id = OLD.organization_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND user_id = OLD.user_id;
+    DELETE FROM organization_volunteer_weeks
+    WHERE organization_id = OLD.organization_id
+      AND week = date(OLD.registration_time, 'weekday 0', '-6 days')
+      AND user_id = OLD.user_id
+      AND registration_count <= 0;
+    INSERT INTO event_week_registrations (event_id, week, organization_id, registration_count)
+    SELECT NEW.event_id, date(NEW.registration_time, 'weekday 0', '-6 days'), NEW.organization_id, 1
+    WHERE EXISTS (SELECT 1 FROM events WHERE id = NEW.event_id)
+    ON CONFLICT (event_id, week) DO UPDATE SET registration_count = registration_count + 1;
+    INSERT INTO organization_volunteer_weeks (organization_id, week, user_id, registration_count)
+    VALUES (NEW.organization_id, date(NEW.registration_time, 'weekday 0', '-6 days'), NEW.user_id, 1)
+    ON CONFLICT (organization_id, week, user_id) DO UPDATE SET registration_count = registration_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_analytics_event_delete AFTER DELETE ON events
+BEGIN
+    DELETE FROM event_week_registrations WHERE event_id = OLD.id;
+END;
+-- Interval index of the time each user is committed to, used to detect schedule
+-- conflicts. One R*Tree entry per registration (id = event_registrations.rowid, which
+-- VACUUM may renumber, REBUILD_COUNTERS_SQL realigns it at startup) spanning the event
+-- in minutes since the Unix epoch. The user id is a dimension of its own, so a single
+-- lookup finds a user's commitments overlapping a time range.
+CREATE VIRTUAL TABLE IF NOT EXISTS user_commitment_intervals USING rtree_i32(
+    id,
+    min_user_id, max_user_id,
+    starts_at, ends_at,
+    +event_id
+);
+CREATE TRIGGER IF NOT EXISTS trg_user_commitments_registration_insert AFTER INSERT ON event_registrations
+BEGIN
+    INSERT INTO user_commitment_intervals (id, min_user_id, max_user_id, starts_at, ends_at, event_id)
+    SELECT NEW.rowid, NEW.user_id, NEW.user_id,
+           CAST(strftime('%s', date_time) AS INTEGER) / 60,
+           CAST(strftime('%s', date_time) AS INTEGER) / 60 + duration_minutes,
+           NEW.event_id
+    FROM events
+    WHERE id = NEW.event_id AND strftime('%s', date_time) IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_commitments_registration_delete AFTER DELETE ON event_registrations
+BEGIN
+    DELETE FROM user_commitment_intervals WHERE id = OLD.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_commitments_registration_update AFTER UPDATE OF user_id, event_id ON event_registrations
+BEGIN
+    DELETE FROM user_commitment_intervals WHERE id = OLD.rowid;
+    INSERT INTO user_commitment_intervals (id, min_user_id, max_user_id, starts_at, ends_at, event_id)
+    SELECT NEW.rowid, NEW.user_id, NEW.user_id,
+           CAST(strftime('%s', date_time) AS INTEGER) / 60,
+           CAST(strftime('%s', date_time) AS INTEGER) / 60 + duration_minutes,
+           NEW.event_id
+    FROM events
+    WHERE id = NEW.event_id AND strftime('%s', date_time) IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_commitments_event_update AFTER UPDATE OF date_time, duration_minutes ON events
+BEGIN
+    DELETE FROM user_commitment_intervals
+    WHERE id IN (SELECT rowid FROM event_registrations WHERE event_id = NEW.id);
+    INSERT INTO user_commitment_intervals (id, min_user_id, max_user_id, starts_at, ends_at, event_id)
+    SELECT rowid, user_id, user_id,
+           CAST(strftime('%s', NEW.date_time) AS INTEGER) / 60,
+           CAST(strftime('%s', NEW.date_time) AS INTEGER) / 60 + NEW.duration_minutes,
+           NEW.id
+    FROM event_registrations
+    WHERE event_id = NEW.id AND strftime('%s', NEW.date_time) IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_user_commitments_event_delete AFTER DELETE ON events
+BEGIN
+    DELETE FROM user_commitment_intervals
+    WHERE id IN (SELECT rowid FROM event_registrations WHERE event_id = OLD.id);
+END;
+-- Change data capture: every insert, update and delete on the core tables appends the key
+-- of the changed row to change_log, whose id is the cursor consumers sync from (see
+-- routes/changes.py). Only keys are logged, consumers read the current state of what
+-- changed. utils/change_log.py compacts entries past their retention.
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    entity_key TEXT NOT NULL,
+    operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_entity ON change_log (entity, entity_key, id);
+-- highest cursor of a delete removed by compaction, consumers behind it must resync
+CREATE TABLE IF NOT EXISTS change_log_compaction (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    compacted_through INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO change_log_compaction (id) VALUES (1);
+CREATE TRIGGER IF NOT EXISTS trg_events_change_log_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event', json_object('id', NEW.id), 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_change_log_update AFTER UPDATE ON events
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event', json_object('id', NEW.id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_events_change_log_delete AFTER DELETE ON events
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event', json_object('id', OLD.id), 'delete');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_change_log_insert AFTER INSERT ON organizations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('organization', json_object('organization_id', NEW.organization_id), 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_change_log_update AFTER UPDATE ON organizations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('organization', json_object('organization_id', NEW.organization_id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_organizations_change_log_delete AFTER DELETE ON organizations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('organization', json_object('organization_id', OLD.organization_id), 'delete');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_change_log_insert AFTER INSERT ON event_series
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', NEW.id), 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_change_log_update AFTER UPDATE ON event_series
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', NEW.id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_change_log_delete AFTER DELETE ON event_series
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', OLD.id), 'delete');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_change_log_insert AFTER INSERT ON event_registrations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_registration', json_object('event_id', NEW.event_id, 'organization_id', NEW.organization_id, 'user_id', NEW.user_id), 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_change_log_update AFTER UPDATE ON event_registrations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_registration', json_object('event_id', NEW.event_id, 'organization_id', NEW.organization_id, 'user_id', NEW.user_id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_registrations_change_log_delete AFTER DELETE ON event_registrations
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_registration', json_object('event_id', OLD.event_id, 'organization_id', OLD.organization_id, 'user_id', OLD.user_id), 'delete');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_change_log_insert AFTER INSERT ON roles
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('role', json_object('organization_id', NEW.organization_id, 'user_id', NEW.user_id), 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_change_log_update AFTER UPDATE ON roles
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('role', json_object('organization_id', NEW.organization_id, 'user_id', NEW.user_id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_roles_change_log_delete AFTER DELETE ON roles
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('role', json_object('organization_id', OLD.organization_id, 'user_id', OLD.user_id), 'delete');
+END;
+-- cancelling or restoring an occurrence changes the series
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_change_log_insert AFTER INSERT ON event_series_exceptions
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', NEW.series_id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_change_log_update AFTER UPDATE ON event_series_exceptions
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', NEW.series_id), 'update');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_event_series_exceptions_change_log_delete AFTER DELETE ON event_series_exceptions
+BEGIN
+    INSERT INTO change_log (entity, entity_key, operation)
+    VALUES ('event_series', json_object('id', OLD.series_id), 'update');
+END;
+-- Progress of bulk imports (utils/bulk_import.py), committed in the same transaction as
+-- each chunk of rows, so an interrupted import resumes after the last committed line
+-- without inserting any row twice.
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    import_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('organizations', 'events')),
+    line_number INTEGER NOT NULL DEFAULT 0,
+    inserted_count INTEGER NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Columns added to existing tables after their first release. CREATE TABLE IF NOT EXISTS
+# leaves existing tables alone, so init_db adds any of these that are missing before
+# running DB_SCHEMA (whose triggers may reference them).
+COLUMN_MIGRATIONS = [
+    (
+        "events",
+        "capacity",
+        "INTEGER DEFAULT NULL CHECK (capacity IS NULL OR capacity > 0)",
+    ),
+    ("event_day_rollups", "registration_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("event_day_rollups", "open_seats", "INTEGER NOT NULL DEFAULT 0"),
+    ("events", "series_id", "INTEGER DEFAULT NULL"),
+    ("events", "occurrence_index", "INTEGER DEFAULT NULL"),
+    (
+        "events",
+        "duration_minutes",
+        "INTEGER NOT NULL DEFAULT 60 CHECK (duration_minutes > 0)",
+    ),
+    (
+        "event_series",
+        "duration_minutes",
+        "INTEGER NOT NULL DEFAULT 60 CHECK (duration_minutes > 0)",
+    ),
+]
+
+# Recomputes every trigger-maintained counter from the source tables. Run at startup so
+# databases created before the counters existed (or edited with triggers bypassed) are
+# brought back in sync.
+REBUILD_COUNTERS_SQL = """
+DELETE FROM event_counters;
+INSERT INTO event_counters (event_id, registration_count)
+SELECT event_id, COUNT(*) FROM event_registrations GROUP BY event_id;
+DELETE FROM organization_counters;
+INSERT INTO organization_counters (organization_id, admin_count, volunteer_count)
+SELECT organization_id,
+       SUM(permission_level = 'admin'),
+       SUM(permission_level = 'volunteer')
+FROM roles
+GROUP BY organization_id;
+DELETE FROM event_day_rollups;
+INSERT INTO event_day_rollups (
+    organization_id, day, category, event_count, registration_count, open_seats
+)
+SELECT events.organization_id,
+       date(events.date_time),
+       COALESCE(events.category, ''),
+       COUNT(*),
+       SUM(COALESCE(event_counters.registration_count, 0)),
+       SUM(COALESCE(events.capacity - COALESCE(event_counters.registration_count, 0), 0))
+FROM events
+LEFT JOIN event_counters ON event_counters.event_id = events.id
+GROUP BY events.organization_id, date(events.date_time), COALESCE(events.category, '');
+DELETE FROM user_commitment_intervals;
+INSERT INTO user_commitment_intervals (id, min_user_id, max_user_id, starts_at, ends_at, event_id)
+SELECT event_registrations.rowid, event_registrations.user_id, event_registrations.user_id,
+       CAST(strftime('%s', events.date_time) AS INTEGER) / 60,
+       CAST(strftime('%s', events.date_time) AS INTEGER) / 60 + events.duration_minutes,
+       events.id
+FROM event_registrations
+JOIN events ON events.id = event_registrations.event_id
+WHERE strftime('%s', events.date_time) IS NOT NULL;
 """
 
+# Recomputes the weekly analytics rollups from event_registrations, for every
+# organization or only the one bound to :organization_id. Unlike REBUILD_COUNTERS_SQL
+# this is not run at startup, see utils/backfill_rollups.py.
+REBUILD_ANALYTICS_SQL = [
+    """
+    DELETE FROM event_week_registrations
+    WHERE :organization_id IS NULL OR organization_id = :organization_id
+    """,
+    """
+    INSERT INTO event_week_registrations (event_id, week, organization_id, registration_count)
+    SELECT event_id, date(registration_time, 'weekday 0', '-6 days'), MIN(organization_id), COUNT(*)
+    FROM event_registrations
+    WHERE (:organization_id IS NULL OR organization_id = :organization_id)
+      AND event_id IN (SELECT id FROM events)
+    GROUP BY event_id, date(registration_time, 'weekday 0', '-6 days')
+    """,
+    """
+    DELETE FROM organization_volunteer_weeks
+    WHERE :organization_id IS NULL OR organization_id = :organization_id
+    """,
+    """
+    INSERT INTO organization_volunteer_weeks (organization_id, week, user_id, registration_count)
+    SELECT organization_id, date(registration_time, 'weekday 0', '-6 days'), user_id, COUNT(*)
+    FROM event_registrations
+    WHERE :organization_id IS NULL OR organization_id = :organization_id
+    GROUP BY organization_id, date(registration_time, 'weekday 0', '-6 days'), user_id
+    """,
+]
+
 
 # DB schema for nuking the database, useful for testing and development when you want to reset the database
 DROP_DB_SQL = """
@@ -75,4 +821,17 @@ DROP TABLE IF EXISTS roles;
 DROP TABLE IF EXISTS event_registrations;
 DROP TABLE IF EXISTS credentials;
 DROP TABLE IF EXISTS events;
+DROP TABLE IF EXISTS event_series;
+DROP TABLE IF EXISTS event_series_exceptions;
+DROP TABLE IF EXISTS table_versions;
+DROP TABLE IF EXISTS row_versions;
+DROP TABLE IF EXISTS event_counters;
+DROP TABLE IF EXISTS organization_counters;
+DROP TABLE IF EXISTS event_day_rollups;
+DROP TABLE IF EXISTS event_week_registrations;
+DROP TABLE IF EXISTS organization_volunteer_weeks;
+DROP TABLE IF EXISTS user_commitment_intervals;
+DROP TABLE IF EXISTS import_checkpoints;
+DROP TABLE IF EXISTS change_log;
+DROP TABLE IF EXISTS change_log_compaction;
 """
@@ -0,0 +1,80 @@
+"""
+ETags for conditional GET requests.
+
+A route builds its ETag from the write counters of what its response is made of, the
+table versions (``db.get_table_versions``) of a list or the row version
+(``db.get_row_version``) of a single row, plus the parameters that shape the response.
+Reading them takes a single indexed lookup, so a client revalidating with
+``If-None-Match`` gets a ``304 Not Modified`` without the route running its query or
+serializing anything. Versions are read before the response is loaded, so an ETag is
+never newer than the response it is sent with.
+
+ETags are weak: two responses with the same tag are equivalent, not necessarily byte
+for byte identical (e.g. compressed differently).
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# part of every ETag, bump it when the shape of a response with an ETag changes so
+# clients don't keep what older code returned
+_ETAG_GENERATION = 1
+
+# revalidate on every use, so clients never show a stale response for long
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from everything a response depends on: the route, the versions it
+    was loaded from and the parameters that shape it.
+
+    :param parts: values with a stable ``repr`` (strings, numbers, tuples, ...)
+    :type parts: Any
+    """
+    digest = hashlib.blake2b(
+        repr((_ETAG_GENERATION, parts)).encode(), digest_size=12
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _if_none_match(request: Request) -> list[str]:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return []
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        # weak comparison, W/"x" and "x" match each other
+        tags.append(tag[2:] if tag.startswith("W/") else tag)
+    return tags
+
+
+def check_etag(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Optional[Response]:
+    """
+    Answer a conditional request. Returns a ``304 Not Modified`` response when the
+    request's ``If-None-Match`` has ``etag``, which the route returns as is. Otherwise
+    sets the ETag and Cache-Control headers on ``response`` and returns None, and the
+    route goes on to load its response.
+
+    :param request: the request being answered
+    :type request: Request
+    :param response: the response the route's return value is sent with
+    :type response: Response
+    :param etag: the ETag of the current response, from ``make_etag``
+    :type etag: str
+    :param cache_control: the Cache-Control header to send, 'private, no-cache' for responses that depend on the user
+    :type cache_control: str
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag[2:] in _if_none_match(request):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,435 @@
+"""
+Optional in-process columnar index of upcoming events, used to answer ``list_events``
+without scanning the events table.
+
+Upcoming events are held as NumPy columns (epoch, second of day, weekday,
+organization id and a category code) and every ``list_events`` filter is evaluated as a
+vectorized boolean mask. Only the ids of the matching events come out of the index, the
+rows themselves are still read ("hydrated") from SQLite.
+
+The index is disabled by default, set ``EVENT_INDEX_ENABLED=1`` to turn it on. It is
+built at startup and kept up to date by the event write routes calling
+``upsert``/``remove``. Other workers (and scripts) write to the same database, so each
+search first compares the events counter in ``table_versions`` with the one the index
+was built at, and rebuilds the index when another process changed the events table.
+Queries it cannot answer exactly (free-text ``location`` search, dates before the
+indexed window, unparsable values) return ``None`` so the caller can fall back to SQL.
+
+Benchmarks against the SQL path live in ``utils/benchmark_event_index.py``. The index
+only pays off for the time of day, weekday and availability filters, which SQLite can't
+answer from an index: other queries, like the home page's next few events, are left to
+SQL.
+"""
+
+import calendar
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+
+from db import get_table_versions
+from utils.logger import get_logger
+from utils.single_flight import single_flight
+
+logger = get_logger(__name__)
+
+EVENT_INDEX_ENABLED = os.environ.get("EVENT_INDEX_ENABLED", "0") == "1"
+
+# Kept in sync with AVAILABILITY_TIME_WINDOWS in routes/events.py, as seconds of day.
+# SQLite compares the 'HH:MM:SS' string from time(date_time) against 'HH:MM', so
+# 'HH:MM:00' already sorts after the upper bound: the window is [start, end).
+_AVAILABILITY_SECONDS = {
+    "Mornings": (6 * 3600, 11 * 3600 + 59 * 60),
+    "Afternoons": (12 * 3600, 16 * 3600 + 59 * 60),
+    "Evenings": (17 * 3600, 21 * 3600 + 59 * 60),
+}
+
+_INITIAL_CAPACITY = 1024
+
+_COLUMNS = (
+    "_ids",
+    "_epochs",
+    "_seconds_of_day",
+    "_weekdays",
+    "_organization_ids",
+    "_categories",
+    "_alive",
+)
+
+# compact the columns once this share of the slots are deleted rows
+_COMPACT_RATIO = 0.25
+
+
+def _parse_date_time(value: str) -> Optional[datetime]:
+    """
+    Parse a stored ``date_time`` into a naive UTC datetime, the same way SQLite's date
+    and time functions interpret it.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_seconds_of_day(value: str) -> Optional[int]:
+    try:
+        parsed = time.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+
+
+def _filters_availability(availability: Optional[list[str]]) -> bool:
+    """Whether ``availability`` filters anything, like the SQL path decides it."""
+    if not availability or "Flexible" in availability:
+        return False
+    return any(
+        option == "Weekends" or option in _AVAILABILITY_SECONDS
+        for option in availability
+    )
+
+
+def _epoch(value: date | datetime) -> int:
+    """Microseconds since the Unix epoch, keeping sub-second ordering of events."""
+    microseconds = value.microsecond if isinstance(value, datetime) else 0
+    return calendar.timegm(value.timetuple()) * 1_000_000 + microseconds
+
+
+class EventIndex:
+    """
+    Columnar, in-memory copy of the filterable columns of upcoming events.
+
+    Rows live in fixed-capacity arrays that grow by doubling. Deleted events are marked
+    dead in the ``_alive`` column and physically removed when enough of them pile up, so
+    single-event writes never rebuild the whole index.
+    """
+
+    def __init__(self, enabled: bool = EVENT_INDEX_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._horizon: Optional[date] = None
+        # events counter in table_versions the columns are up to date with
+        self._version: Optional[int] = None
+        self._category_codes: dict[str, int] = {}
+        self._reset(_INITIAL_CAPACITY)
+
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._dead = 0
+        self._positions: dict[int, int] = {}
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._epochs = np.zeros(capacity, dtype=np.int64)
+        self._seconds_of_day = np.zeros(capacity, dtype=np.int32)
+        # 0 = Sunday ... 6 = Saturday, same as SQLite's strftime('%w')
+        self._weekdays = np.zeros(capacity, dtype=np.int8)
+        self._organization_ids = np.zeros(capacity, dtype=np.int64)
+        # -1 = no category
+        self._categories = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+    @property
+    def size(self) -> int:
+        """Number of events currently held by the index."""
+        return self._size - self._dead
+
+    def load(self, conn: sqlite3.Connection, horizon: Optional[date] = None) -> None:
+        """
+        (Re)build the index from every event on or after ``horizon`` (default: today).
+
+        :param conn: the connection to the database
+        :type conn: sqlite3.Connection
+        :param horizon: the first day held by the index
+        :type horizon: Optional[date]
+        """
+        horizon = horizon or datetime.now(timezone.utc).date()
+        # read first, a write in between only makes the next search load again
+        (version,) = get_table_versions(conn, "events")
+        cursor = conn.execute(
+            """
+            SELECT id, date_time, organization_id, category
+            FROM events
+            WHERE date_time >= ?
+            """,
+            (horizon.isoformat(),),
+        )
+        with self._lock:
+            self._horizon = horizon
+            self._version = version
+            self._reset(_INITIAL_CAPACITY)
+            while True:
+                rows = cursor.fetchmany(10_000)
+                if not rows:
+                    break
+                for row in rows:
+                    self._set_row(row[0], row[1], row[2], row[3])
+        logger.info(f"Event index loaded with {self.size} events from {horizon}")
+
+    def upsert(self, conn: sqlite3.Connection, *event_ids: int) -> None:
+        """
+        Refresh events from the database after they were created or updated.
+
+        :param conn: the connection to the database
+        :type conn: sqlite3.Connection
+        :param event_ids: the events to refresh, one write each
+        :type event_ids: int
+        """
+        if not self.enabled or self._horizon is None:
+            return
+        rows = conn.execute(
+            """
+            SELECT id, date_time, organization_id, category FROM events
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(event_ids),),
+        ).fetchall()
+        self._apply(conn, event_ids, rows)
+
+    def remove(self, conn: sqlite3.Connection, *event_ids: int) -> None:
+        """
+        Drop events from the index after they were deleted.
+
+        :param conn: the connection to the database
+        :type conn: sqlite3.Connection
+        :param event_ids: the events to drop, one write each
+        :type event_ids: int
+        """
+        if not self.enabled or self._horizon is None:
+            return
+        self._apply(conn, event_ids, [])
+
+    def _apply(
+        self, conn: sqlite3.Connection, event_ids: tuple[int, ...], rows: list
+    ) -> None:
+        """Set the rows read for ``event_ids`` and drop the others."""
+        (version,) = get_table_versions(conn, "events")
+        found = {row[0] for row in rows}
+        with self._lock:
+            for row in rows:
+                self._set_row(row[0], row[1], row[2], row[3])
+            for event_id in event_ids:
+                if event_id not in found:
+                    self._remove_position(event_id)
+            # every write bumps the counter once, so when these writes are the only
+            # ones since, the index is still up to date, otherwise the next search
+            # loads it again
+            if version == self._version + len(event_ids):
+                self._version = version
+
+    def search(
+        self,
+        conn: sqlite3.Connection,
+        begin_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        begin_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        is_weekday: Optional[bool] = None,
+        organization_id: Optional[list[int]] = None,
+        availability: Optional[list[str]] = None,
+        category: Optional[list[str]] = None,
+        location: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[int]]:
+        """
+        Return the ids of the events matching the ``list_events`` filters, ordered by
+        ``date_time``, or ``None`` if the index cannot answer this query exactly.
+
+        ``conn`` is used to check that the index is up to date and to load it again if
+        not, the other parameters have the same meaning as in ``list_events``.
+        """
+        if not self.enabled or self._horizon is None:
+            return None
+        # SQLite answers dates and organizations from its indexes faster than a scan of
+        # the columns, the index only pays off for filters on the time of day
+        if (
+            begin_time is None
+            and end_time is None
+            and is_weekday is None
+            and not _filters_availability(availability)
+        ):
+            return None
+        (version,) = get_table_versions(conn, "events")
+        if version != self._version:
+            # concurrent searches share a single rebuild
+            single_flight.do(("event_index", version), lambda: self.load(conn))
+        # substring search over free text is left to SQLite
+        if location:
+            return None
+        # only upcoming events are indexed, so the query must not reach further back
+        if begin_date is None:
+            return None
+        begin = _parse_date(begin_date)
+        if begin is None or begin < self._horizon:
+            return None
+
+        bounds: list[tuple[str, int]] = [("begin_epoch", _epoch(begin))]
+        if end_date is not None:
+            end = _parse_date(end_date)
+            if end is None:
+                return None
+            bounds.append(("end_epoch", _epoch(end + timedelta(days=1))))
+        for name, value in (("begin_time", begin_time), ("end_time", end_time)):
+            if value is not None:
+                seconds = _parse_seconds_of_day(value)
+                if seconds is None:
+                    return None
+                bounds.append((name, seconds))
+
+        with self._lock:
+            size = self._size
+            epochs = self._epochs[:size]
+            seconds_of_day = self._seconds_of_day[:size]
+            weekdays = self._weekdays[:size]
+            mask = self._alive[:size].copy()
+
+            for name, value in bounds:
+                if name == "begin_epoch":
+                    mask &= epochs >= value
+                elif name == "end_epoch":
+                    mask &= epochs < value
+                elif name == "begin_time":
+                    mask &= seconds_of_day >= value
+                else:
+                    mask &= seconds_of_day <= value
+
+            if is_weekday is not None:
+                is_weekend = (weekdays == 0) | (weekdays == 6)
+                mask &= ~is_weekend if is_weekday else is_weekend
+
+            if organization_id is not None:
+                mask &= np.isin(
+                    self._organization_ids[:size],
+                    np.asarray(organization_id, dtype=np.int64),
+                )
+
+            if availability and "Flexible" not in availability:
+                availability_mask = np.zeros(size, dtype=bool)
+                matched_option = False
+                for option in availability:
+                    if option == "Weekends":
+                        availability_mask |= (weekdays == 0) | (weekdays == 6)
+                        matched_option = True
+                    elif option in _AVAILABILITY_SECONDS:
+                        window_start, window_end = _AVAILABILITY_SECONDS[option]
+                        availability_mask |= (seconds_of_day >= window_start) & (
+                            seconds_of_day < window_end
+                        )
+                        matched_option = True
+                # unknown options alone apply no filter, same as the SQL path
+                if matched_option:
+                    mask &= availability_mask
+
+            if category:
+                codes = [
+                    self._category_codes[name]
+                    for name in category
+                    if name in self._category_codes
+                ]
+                mask &= np.isin(
+                    self._categories[:size], np.asarray(codes, dtype=np.int32)
+                )
+
+            positions = np.flatnonzero(mask)
+            # like SQLite, a negative limit means no limit
+            if limit is not None and limit < 0:
+                limit = None
+            if limit is not None:
+                if limit == 0:
+                    return []
+                if limit < len(positions):
+                    # only the first ``limit`` events (plus ties) need to be sorted
+                    cutoff = np.partition(epochs[positions], limit - 1)[limit - 1]
+                    positions = positions[epochs[positions] <= cutoff]
+            ids = self._ids[positions]
+            # same order as the SQL path: date_time, then id
+            ordered = ids[np.lexsort((ids, epochs[positions]))]
+            if limit is not None:
+                ordered = ordered[:limit]
+            return ordered.tolist()
+
+    def _set_row(
+        self,
+        event_id: int,
+        date_time: str,
+        organization_id: int,
+        category: Optional[str],
+    ) -> None:
+        """Insert or overwrite the row for ``event_id``. Caller holds the lock."""
+        parsed = _parse_date_time(date_time)
+        if parsed is None or parsed.date() < self._horizon:
+            # unparsable rows and past events are served by SQL only
+            self._remove_position(event_id)
+            return
+
+        position = self._positions.get(event_id)
+        if position is None:
+            if self._size == len(self._ids):
+                self._grow()
+            position = self._size
+            self._size += 1
+            self._positions[event_id] = position
+
+        if category is None:
+            category_code = -1
+        else:
+            category_code = self._category_codes.setdefault(
+                category, len(self._category_codes)
+            )
+
+        self._ids[position] = event_id
+        self._epochs[position] = _epoch(parsed)
+        self._seconds_of_day[position] = (
+            parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+        )
+        self._weekdays[position] = (parsed.weekday() + 1) % 7
+        self._organization_ids[position] = organization_id
+        self._categories[position] = category_code
+        self._alive[position] = True
+
+    def _remove_position(self, event_id: int) -> None:
+        """Mark ``event_id`` as deleted. Caller holds the lock."""
+        position = self._positions.pop(event_id, None)
+        if position is None:
+            return
+        self._alive[position] = False
+        self._dead += 1
+        if self._dead > _COMPACT_RATIO * self._size:
+            self._compact()
+
+    def _grow(self) -> None:
+        for name in _COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(len(column) * 2, dtype=column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[: self._size])
+        for name in _COLUMNS:
+            column = getattr(self, name)
+            compacted = np.zeros(len(column), dtype=column.dtype)
+            compacted[: len(keep)] = column[keep]
+            setattr(self, name, compacted)
+        self._size = len(keep)
+        self._dead = 0
+        self._positions = {
+            int(event_id): position
+            for position, event_id in enumerate(self._ids[: self._size])
+        }
+
+
+# shared instance used by the events routes
+event_index = EventIndex()
@@ -0,0 +1,351 @@
+"""
+In-process fan-out of event updates to server-sent event streams.
+
+One background task per server process follows the ``change_log`` (see
+``utils/change_log.py``) every ``LIVE_UPDATES_POLL_SECONDS`` (environment variable,
+default 0.5) while there are subscribers. It loads the current state of the watched
+events that changed, including their registration count, once per poll however many
+streams watch them, and hands it to every subscriber of the event. Writes made by any
+process (other workers, imports) are seen, and an idle stream costs a parked coroutine,
+no thread, connection or query.
+
+Bursts are coalesced: a stream gets at most one message per event per poll, and a slow
+stream only keeps the latest state of each event until it catches up. Messages carry the
+change log cursor as their id, so a reconnecting client sends ``Last-Event-ID`` and only
+gets the events that changed since.
+
+Streams stay open until the client leaves, so run uvicorn with
+``--timeout-graceful-shutdown`` for restarts not to wait on them.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from typing import AsyncIterator, Iterable, Optional
+
+import anyio
+
+from db import connect
+from models import Event
+from utils.change_log import compacted_through
+from utils.logger import get_logger
+from utils.recurrence import find_materialized, parse_occurrence_id
+
+logger = get_logger(__name__)
+
+LIVE_UPDATES_POLL_SECONDS = float(os.environ.get("LIVE_UPDATES_POLL_SECONDS", "0.5"))
+
+# comment lines sent to idle streams so proxies don't close them
+LIVE_UPDATES_KEEPALIVE_SECONDS = float(
+    os.environ.get("LIVE_UPDATES_KEEPALIVE_SECONDS", "15")
+)
+
+# how long clients wait before reconnecting, sent with the first message
+_RETRY_MILLISECONDS = 3000
+
+# changes read per poll, a longer backlog is read by the following polls
+_POLL_BATCH_SIZE = 5000
+
+_EVENT_STATE_SQL = """
+    SELECT events.id, events.name, events.description, events.location,
+           events.date_time, events.organization_id, events.category, events.capacity,
+           events.duration_minutes,
+           COALESCE(event_counters.registration_count, 0) AS registration_count,
+           events.series_id
+    FROM events
+    LEFT JOIN event_counters ON event_counters.event_id = events.id
+"""
+
+# the event each change of an event or registration is about
+_CHANGED_EVENTS_SQL = """
+    SELECT id,
+           CASE entity
+               WHEN 'event' THEN json_extract(entity_key, '$.id')
+               ELSE json_extract(entity_key, '$.event_id')
+           END AS event_id
+    FROM change_log
+    WHERE id > ? AND entity IN ('event', 'event_registration')
+    ORDER BY id
+"""
+
+# an event's state, None once deleted
+State = Optional[dict]
+
+
+def _load_states(
+    conn: sqlite3.Connection, event_ids: Iterable[int]
+) -> dict[int, State]:
+    """
+    Load the current state of events as JSON-ready dicts. Events that don't exist map
+    to None, except occurrences of recurring events that were never stored.
+    """
+    event_ids = list(event_ids)
+    states: dict[int, State] = {
+        event_id: None
+        for event_id in event_ids
+        if parse_occurrence_id(event_id) is None
+    }
+    for start in range(0, len(event_ids), 500):
+        chunk = event_ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"{_EVENT_STATE_SQL} WHERE events.id IN ({placeholders})", chunk
+        ):
+            states[row["id"]] = Event(**dict(row)).model_dump(mode="json")
+    return states
+
+
+def _materialized_occurrences(
+    conn: sqlite3.Connection, event_ids: Iterable[int]
+) -> dict[int, int]:
+    """
+    Map the stored id of each occurrence among ``event_ids`` that was materialized
+    since (e.g. by its first registration) to the occurrence id.
+    """
+    occurrences = {}
+    for event_id in event_ids:
+        occurrence = parse_occurrence_id(event_id)
+        if occurrence is not None:
+            stored_id = find_materialized(conn, *occurrence)
+            if stored_id is not None:
+                occurrences[stored_id] = event_id
+    return occurrences
+
+
+def _watched_states(
+    conn: sqlite3.Connection, changed: Optional[set[int]], watched: Iterable[int]
+) -> dict[int, State]:
+    """
+    Load the state of the watched events among the ``changed`` stored events (every
+    watched event when None), keyed by the watched id.
+
+    Changes are logged under the stored id of an event, so a watched occurrence of a
+    recurring event is matched through its stored row once it has one, and its state
+    (which has the stored id) is sent under the occurrence id.
+    """
+    watched = set(watched)
+    occurrences = _materialized_occurrences(conn, watched)
+    if changed is None:
+        changed = watched | occurrences.keys()
+    direct = changed & watched
+    stored = changed & occurrences.keys()
+    if not direct and not stored:
+        return {}
+    loaded = _load_states(conn, direct | stored)
+    states = {event_id: loaded[event_id] for event_id in direct if event_id in loaded}
+    for stored_id in stored:
+        states[occurrences[stored_id]] = loaded[stored_id]
+    return states
+
+
+def _latest_cursor(conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+class _Subscriber:
+    __slots__ = ("event_ids", "pending", "wakeup")
+
+    def __init__(self, event_ids: list[int]):
+        self.event_ids = event_ids
+        # event id -> (cursor, state) of the latest update not sent yet
+        self.pending: dict[int, tuple[int, State]] = {}
+        self.wakeup = asyncio.Event()
+
+
+class LiveUpdates:
+    """Fan-out of event updates from the change log to the streams watching them."""
+
+    def __init__(self, poll_seconds: float = LIVE_UPDATES_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._subscribers: dict[int, set[_Subscriber]] = {}
+        self._stream_count = 0
+        self._poller: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._cursor = 0
+        self._polls = 0
+        self._messages = 0
+
+    def _add(self, subscriber: _Subscriber) -> None:
+        self._stream_count += 1
+        for event_id in subscriber.event_ids:
+            self._subscribers.setdefault(event_id, set()).add(subscriber)
+
+    def _remove(self, subscriber: _Subscriber) -> None:
+        self._stream_count -= 1
+        for event_id in subscriber.event_ids:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[event_id]
+
+    async def _start_poller(self) -> None:
+        """Start following the change log if it isn't followed yet."""
+        # a poller of an event loop that was shut down is done without having reset
+        if self._poller is None or self._poller.done():
+            self._ready = asyncio.Event()
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        await self._ready.wait()
+
+    def _read_changes(
+        self, conn: sqlite3.Connection, since: int, watched: frozenset[int]
+    ) -> tuple[int, int, dict[int, State]]:
+        """
+        Read the changes after ``since`` and the state of the watched events they are
+        about, in one read transaction. Returns the cursor of the last change read, the
+        number of changes read and the states.
+        """
+        conn.execute("BEGIN")
+        try:
+            rows = conn.execute(
+                f"{_CHANGED_EVENTS_SQL} LIMIT ?", (since, _POLL_BATCH_SIZE)
+            ).fetchall()
+            cursor = rows[-1]["id"] if rows else since
+            if not rows:
+                return cursor, 0, {}
+            changed = {row["event_id"] for row in rows}
+            return cursor, len(rows), _watched_states(conn, changed, watched)
+        finally:
+            conn.rollback()
+
+    async def _poll(self) -> None:
+        conn = connect()
+        try:
+            self._cursor = await anyio.to_thread.run_sync(_latest_cursor, conn)
+            self._ready.set()
+            while True:
+                await asyncio.sleep(self.poll_seconds)
+                # checked and reset without awaiting, so a stream subscribing right
+                # after always finds either this poller or none
+                if not self._subscribers:
+                    self._poller = None
+                    return
+                # keep reading while there is a backlog
+                while True:
+                    cursor, read, states = await anyio.to_thread.run_sync(
+                        self._read_changes,
+                        conn,
+                        self._cursor,
+                        frozenset(self._subscribers),
+                    )
+                    self._polls += 1
+                    self._cursor = cursor
+                    self._publish(cursor, states)
+                    if read < _POLL_BATCH_SIZE:
+                        break
+        except Exception:
+            logger.exception("Live updates stopped following the change log")
+            self._poller = None
+            self._ready.set()
+            # wake the streams so they end instead of waiting forever
+            for subscribers in self._subscribers.values():
+                for subscriber in subscribers:
+                    subscriber.wakeup.set()
+        finally:
+            conn.close()
+
+    def _publish(self, cursor: int, states: dict[int, State]) -> None:
+        for event_id, state in states.items():
+            for subscriber in self._subscribers.get(event_id, ()):
+                subscriber.pending[event_id] = (cursor, state)
+                subscriber.wakeup.set()
+
+    def _initial_states(
+        self, event_ids: list[int], last_event_id: Optional[int]
+    ) -> tuple[int, dict[int, State]]:
+        """
+        Read what a new stream starts with: the state of every event, or when resuming
+        from ``last_event_id`` only of those that changed since.
+        """
+        conn = connect()
+        try:
+            conn.execute("BEGIN")
+            cursor = _latest_cursor(conn)
+            if last_event_id is None or last_event_id < compacted_through(conn):
+                changed = None
+            else:
+                changed = {
+                    row["event_id"]
+                    for row in conn.execute(_CHANGED_EVENTS_SQL, (last_event_id,))
+                }
+            return cursor, _watched_states(conn, changed, event_ids)
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def _message(self, event_id: int, cursor: int, state: State) -> str:
+        self._messages += 1
+        if state is None:
+            return (
+                f"id: {cursor}\nevent: delete\ndata: {json.dumps({'id': event_id})}\n\n"
+            )
+        return f"id: {cursor}\nevent: update\ndata: {json.dumps(state)}\n\n"
+
+    async def stream(
+        self, event_ids: list[int], last_event_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the updates of ``event_ids`` as server-sent events: an ``update`` message
+        with the event (and its registration count) whenever it or its registrations
+        change, a ``delete`` message when it is deleted. The stream starts with the
+        current state of every event, or of those changed since ``last_event_id``.
+        Occurrences of recurring events are followed through their stored event once
+        they have one, their messages then have its id.
+
+        :param event_ids: the events to watch
+        :type event_ids: list[int]
+        :param last_event_id: the id of the last message a reconnecting client got
+        :type last_event_id: Optional[int]
+        """
+        subscriber = _Subscriber(event_ids)
+        self._add(subscriber)
+        try:
+            # follow the change log before reading the initial states, so no change
+            # falls between the two
+            await self._start_poller()
+            floor, states = await anyio.to_thread.run_sync(
+                self._initial_states, event_ids, last_event_id
+            )
+            yield f"retry: {_RETRY_MILLISECONDS}\n\n"
+            for event_id, state in states.items():
+                yield self._message(event_id, floor, state)
+
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        subscriber.wakeup.wait(), LIVE_UPDATES_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if self._poller is None and not subscriber.pending:
+                    # the poller failed, let the client reconnect
+                    return
+                subscriber.wakeup.clear()
+                pending, subscriber.pending = subscriber.pending, {}
+                for event_id, (cursor, state) in sorted(
+                    pending.items(), key=lambda item: item[1][0]
+                ):
+                    # polls read before the initial states are already included
+                    if cursor > floor:
+                        yield self._message(event_id, cursor, state)
+        finally:
+            self._remove(subscriber)
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        return {
+            "streams": self._stream_count,
+            "watched_events": len(self._subscribers),
+            "polls": self._polls,
+            "messages": self._messages,
+            "cursor": self._cursor,
+        }
+
+
+live_updates = LiveUpdates()
@@ -18,6 +18,10 @@ if __name__ == "__main__":
         print(f"\n{db_file} has been removed\n")
     else:
         print(f"\n{db_file} does not exist\n")
+    # the write-ahead log of the removed database must not be replayed into the new one
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_file + suffix):
+            os.remove(db_file + suffix)
 
     conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
@@ -0,0 +1,279 @@
+"""
+Recurring events: rules stored once in ``event_series`` and expanded into occurrences
+only for the window a query asks for.
+
+Occurrences that nobody has interacted with exist only virtually. They are identified
+by a synthetic event id (see ``occurrence_id``) far above the ids SQLite hands out, so
+they can be used anywhere an event id is expected. The first time an occurrence needs
+to be a real row, typically because someone registers for it, it is materialized into
+``events`` with its ``series_id`` and ``occurrence_index`` and from then on the stored
+row replaces the virtual occurrence.
+"""
+
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Collection, Iterator, Optional
+
+# virtual occurrence ids are OCCURRENCE_ID_BASE + (series_id << 16) + occurrence_index,
+# which stays below 2**53 so the client can still represent them as numbers
+OCCURRENCE_ID_BASE = 1 << 40
+MAX_OCCURRENCES = 1 << 16
+
+SERIES_SELECT_SQL = """
+    SELECT id, name, description, location, first_date_time, organization_id,
+           category, capacity, duration_minutes, frequency, interval, until
+    FROM event_series
+"""
+
+
+def occurrence_id(series_id: int, index: int) -> int:
+    """The synthetic event id of the ``index``-th occurrence of a series."""
+    return OCCURRENCE_ID_BASE + (series_id << 16) + index
+
+
+def parse_occurrence_id(event_id: int) -> Optional[tuple[int, int]]:
+    """
+    Split a synthetic event id into its series id and occurrence index, or return
+    ``None`` for the id of a stored event.
+    """
+    if event_id < OCCURRENCE_ID_BASE:
+        return None
+    offset = event_id - OCCURRENCE_ID_BASE
+    return offset >> 16, offset & (MAX_OCCURRENCES - 1)
+
+
+def parse_date_time(value: str) -> Optional[datetime]:
+    """
+    Parse a stored date_time into a naive UTC datetime, the same way SQLite's date and
+    time functions interpret it.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def occurrence_at(
+    first: datetime, frequency: str, interval: int, index: int
+) -> Optional[datetime]:
+    """
+    Return the date_time of the ``index``-th occurrence, ignoring ``until`` and
+    exceptions, or ``None`` when there is no such occurrence.
+
+    Monthly occurrences keep the day of month of the first one and are skipped in months
+    that don't have that day (e.g. the 31st in April), like RFC 5545 does.
+    """
+    if index < 0 or index >= MAX_OCCURRENCES:
+        return None
+    if frequency == "weekly":
+        return first + timedelta(weeks=interval * index)
+    month = first.month - 1 + interval * index
+    try:
+        return first.replace(year=first.year + month // 12, month=month % 12 + 1)
+    except ValueError:
+        return None
+
+
+def expand_occurrences(
+    first: datetime,
+    frequency: str,
+    interval: int,
+    until: Optional[date],
+    start: Optional[datetime],
+    end: datetime,
+    exceptions: Collection[date] = (),
+) -> Iterator[tuple[int, datetime]]:
+    """
+    Lazily yield ``(occurrence_index, date_time)`` for every occurrence in
+    ``[start, end)``, in order. Occurrences falling on a date listed in ``exceptions``
+    or after ``until`` are skipped.
+
+    Expansion jumps straight to the first occurrence of the window, so its cost only
+    depends on the number of occurrences inside the window.
+
+    :param first: the date_time of the first occurrence
+    :type first: datetime
+    :param frequency: 'weekly' or 'monthly'
+    :type frequency: str
+    :param interval: the number of weeks/months between occurrences
+    :type interval: int
+    :param until: the last day an occurrence may fall on, None for no end
+    :type until: Optional[date]
+    :param start: the beginning of the window (inclusive), None for no lower bound
+    :type start: Optional[datetime]
+    :param end: the end of the window (exclusive)
+    :type end: datetime
+    :param exceptions: days on which the occurrence is cancelled
+    :type exceptions: Collection[date]
+    """
+    index = 0
+    if start is not None and start > first:
+        if frequency == "weekly":
+            period = timedelta(weeks=interval)
+            index = -((first - start) // period)
+        else:
+            months = (start.year - first.year) * 12 + start.month - first.month
+            index = max(0, months // interval - 1)
+
+    while index < MAX_OCCURRENCES:
+        value = occurrence_at(first, frequency, interval, index)
+        index += 1
+        if value is None:
+            continue
+        if value >= end or (until is not None and value.date() > until):
+            return
+        if start is not None and value < start:
+            continue
+        if value.date() in exceptions:
+            continue
+        yield index - 1, value
+
+
+def is_valid_occurrence(
+    series: sqlite3.Row, index: int, exceptions: Collection[date]
+) -> Optional[datetime]:
+    """
+    Return the date_time of occurrence ``index`` of ``series`` if it is a real (not
+    skipped, not cancelled) occurrence, otherwise ``None``.
+    """
+    first = parse_date_time(series["first_date_time"])
+    if first is None:
+        return None
+    value = occurrence_at(first, series["frequency"], series["interval"], index)
+    if value is None or value.date() in exceptions:
+        return None
+    until = date.fromisoformat(series["until"]) if series["until"] else None
+    if until is not None and value.date() > until:
+        return None
+    return value
+
+
+def load_exceptions(conn: sqlite3.Connection, series_id: int) -> set[date]:
+    """The days on which occurrences of a series are cancelled."""
+    return {
+        date.fromisoformat(row[0])
+        for row in conn.execute(
+            "SELECT occurrence_date FROM event_series_exceptions WHERE series_id = ?",
+            (series_id,),
+        )
+    }
+
+
+def find_materialized(
+    conn: sqlite3.Connection, series_id: int, index: int
+) -> Optional[int]:
+    """The id of the stored row of an occurrence, if it was materialized."""
+    row = conn.execute(
+        "SELECT id FROM events WHERE series_id = ? AND occurrence_index = ?",
+        (series_id, index),
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def find_materialized_on(
+    conn: sqlite3.Connection, series: sqlite3.Row, day: date
+) -> list[int]:
+    """
+    The ids of the stored rows of the occurrences of a series scheduled on ``day``,
+    whatever their ``date_time`` was edited to since.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param series: the series, selected with ``SERIES_SELECT_SQL``
+    :type series: sqlite3.Row
+    :param day: the day of the occurrences
+    :type day: date
+    """
+    first = parse_date_time(series["first_date_time"])
+    if first is None:
+        return []
+    event_ids = []
+    for row in conn.execute(
+        "SELECT id, occurrence_index FROM events WHERE series_id = ?", (series["id"],)
+    ):
+        value = occurrence_at(
+            first, series["frequency"], series["interval"], row["occurrence_index"]
+        )
+        if value is not None and value.date() == day:
+            event_ids.append(row["id"])
+    return event_ids
+
+
+def materialize_occurrence(
+    conn: sqlite3.Connection, series_id: int, index: int
+) -> Optional[int]:
+    """
+    Make sure occurrence ``index`` of a series is stored in ``events`` and return its id,
+    or ``None`` if the series or the occurrence doesn't exist. The caller commits.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param series_id: the series the occurrence belongs to
+    :type series_id: int
+    :param index: the index of the occurrence within the series
+    :type index: int
+    """
+    existing = find_materialized(conn, series_id, index)
+    if existing is not None:
+        return existing
+
+    series = conn.execute(f"{SERIES_SELECT_SQL} WHERE id = ?", (series_id,)).fetchone()
+    if series is None:
+        return None
+    value = is_valid_occurrence(series, index, load_exceptions(conn, series_id))
+    if value is None:
+        return None
+
+    # the unique (series_id, occurrence_index) index makes concurrent materializations
+    # of the same occurrence collapse into one row
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO events (
+            name, description, location, date_time, organization_id, category, capacity,
+            duration_minutes, series_id, occurrence_index
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            series["name"],
+            series["description"],
+            series["location"],
+            value,
+            series["organization_id"],
+            series["category"],
+            series["capacity"],
+            series["duration_minutes"],
+            series_id,
+            index,
+        ),
+    )
+    return find_materialized(conn, series_id, index)
+
+
+def cancel_occurrence(conn: sqlite3.Connection, series_id: int, index: int) -> None:
+    """
+    Record occurrence ``index`` of a series as an exception, so it is not expanded
+    again, e.g. after its materialized row was deleted. The caller commits.
+    """
+    series = conn.execute(
+        "SELECT first_date_time, frequency, interval FROM event_series WHERE id = ?",
+        (series_id,),
+    ).fetchone()
+    if series is None:
+        return
+    first = parse_date_time(series["first_date_time"])
+    if first is None:
+        return
+    value = occurrence_at(first, series["frequency"], series["interval"], index)
+    if value is None:
+        return
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO event_series_exceptions (series_id, occurrence_date)
+        VALUES (?, ?)
+        """,
+        (series_id, value.date().isoformat()),
+    )
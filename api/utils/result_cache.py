@@ -0,0 +1,132 @@
+"""
+In-process cache for the results of hot list queries (``list_events``,
+``list_organizations``).
+
+Entries are keyed on the route name plus its normalized query parameters and remember
+the table versions (see ``db.get_table_versions``) they were computed from. A lookup
+with a different version discards the entry, so a cached result is never served after
+the underlying tables changed, whichever server process wrote to them. On top of that
+the cache is bounded in size with LRU eviction, and entries expire after a TTL.
+
+Size and TTL can be tuned with the ``RESULT_CACHE_MAX_ENTRIES`` and
+``RESULT_CACHE_TTL_SECONDS`` environment variables, a max size of 0 disables caching.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "60"))
+
+
+def make_cache_key(route: str, params: dict[str, Any]) -> tuple:
+    """
+    Build a cache key from the route name and its query parameters.
+
+    Parameters are normalized so that requests meaning the same thing share an entry:
+    unset and empty values are dropped and multi-value parameters are deduplicated and
+    sorted, since the list filters combine them with OR.
+
+    :param route: the name of the route the result belongs to
+    :type route: str
+    :param params: the query parameters of the request
+    :type params: dict[str, Any]
+    """
+    normalized = []
+    for name, value in sorted(params.items()):
+        if value is None or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(set(value)))
+        normalized.append((name, value))
+    return (route, tuple(normalized))
+
+
+class ResultCache:
+    """
+    Thread-safe LRU + TTL cache whose entries are only valid for one table version.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (version, expires_at, value), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[Hashable, float, Any]] = (
+            OrderedDict()
+        )
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for ``key`` if it was stored for ``version`` and has
+        not expired, otherwise ``None``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_version, expires_at, value = entry
+            if stored_version != version:
+                del self._entries[key]
+                self._invalidations += 1
+                self._misses += 1
+                return None
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, version: Hashable, value: Any) -> None:
+        """Store ``value`` for ``key``, computed from the tables at ``version``."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss/eviction counters and the current size, for the metrics endpoint."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+
+# shared instance used by the list routes
+result_cache = ResultCache()
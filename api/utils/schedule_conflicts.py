@@ -0,0 +1,128 @@
+"""
+Schedule-conflict detection against the ``user_commitment_intervals`` R*Tree.
+
+Every registration has an entry in the interval index spanning its event, keyed by user,
+so finding a user's commitments that overlap a candidate event is a single index lookup
+instead of a scan of all their registrations joined to events.
+"""
+
+import calendar
+import sqlite3
+from typing import Iterable
+
+from utils.recurrence import (
+    SERIES_SELECT_SQL,
+    find_materialized,
+    is_valid_occurrence,
+    load_exceptions,
+    parse_date_time,
+    parse_occurrence_id,
+)
+
+# VALUES rows are 3 parameters each, stay well below SQLite's bound parameter limit
+_CHUNK_SIZE = 300
+
+
+def event_intervals(
+    conn: sqlite3.Connection, event_ids: Iterable[int]
+) -> dict[int, tuple[int, int, int]]:
+    """
+    Resolve events to the interval they occupy, as ``requested id -> (event id, start,
+    end)`` in minutes since the Unix epoch, the same unit as the interval index.
+
+    Ids of virtual occurrences of recurring events resolve to their stored row when they
+    were materialized. Ids of events that don't exist are left out.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param event_ids: the events to resolve
+    :type event_ids: Iterable[int]
+    """
+    intervals: dict[int, tuple[int, int, int]] = {}
+    stored_ids: dict[int, int] = {}
+    for event_id in event_ids:
+        occurrence = parse_occurrence_id(event_id)
+        if occurrence is None:
+            stored_ids[event_id] = event_id
+            continue
+        series_id, index = occurrence
+        materialized_id = find_materialized(conn, series_id, index)
+        if materialized_id is not None:
+            stored_ids[event_id] = materialized_id
+            continue
+        series = conn.execute(
+            f"{SERIES_SELECT_SQL} WHERE id = ?", (series_id,)
+        ).fetchone()
+        if series is None:
+            continue
+        value = is_valid_occurrence(series, index, load_exceptions(conn, series_id))
+        if value is not None:
+            starts_at = calendar.timegm(value.timetuple()) // 60
+            intervals[event_id] = (
+                event_id,
+                starts_at,
+                starts_at + series["duration_minutes"],
+            )
+
+    requested_by_stored_id: dict[int, list[int]] = {}
+    for requested_id, stored_id in stored_ids.items():
+        requested_by_stored_id.setdefault(stored_id, []).append(requested_id)
+    unique_ids = list(requested_by_stored_id)
+    for start in range(0, len(unique_ids), 500):
+        chunk = unique_ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT id, date_time, duration_minutes FROM events WHERE id IN ({placeholders})",
+            chunk,
+        ):
+            value = parse_date_time(row[1])
+            if value is None:
+                continue
+            starts_at = calendar.timegm(value.timetuple()) // 60
+            for requested_id in requested_by_stored_id[row[0]]:
+                intervals[requested_id] = (row[0], starts_at, starts_at + row[2])
+    return intervals
+
+
+def find_conflicts(
+    conn: sqlite3.Connection,
+    user_id: int,
+    candidates: Iterable[tuple[int, int, int]],
+) -> dict[int, list[int]]:
+    """
+    Find the events ``user_id`` is registered for that overlap each candidate, as
+    ``candidate event id -> conflicting event ids``. Intervals are half-open, so an
+    event ending exactly when another starts is not a conflict. A candidate never
+    conflicts with itself.
+
+    :param conn: the connection to the database
+    :type conn: sqlite3.Connection
+    :param user_id: the user whose commitments are checked
+    :type user_id: int
+    :param candidates: ``(event id, start, end)`` of the events to check, in minutes since the Unix epoch
+    :type candidates: Iterable[tuple[int, int, int]]
+    """
+    candidates = list(candidates)
+    conflicts: dict[int, list[int]] = {event_id: [] for event_id, _, _ in candidates}
+    for start in range(0, len(candidates), _CHUNK_SIZE):
+        chunk = candidates[start : start + _CHUNK_SIZE]
+        values = ",".join("(?, ?, ?)" for _ in chunk)
+        params: list = [value for candidate in chunk for value in candidate]
+        params.extend([user_id, user_id])
+        rows = conn.execute(
+            f"""
+            WITH candidates (event_id, starts_at, ends_at) AS (VALUES {values})
+            SELECT candidates.event_id, intervals.event_id AS conflicting_event_id
+            FROM candidates
+            JOIN user_commitment_intervals AS intervals
+              ON intervals.starts_at < candidates.ends_at
+             AND intervals.ends_at > candidates.starts_at
+            WHERE intervals.min_user_id <= ? AND intervals.max_user_id >= ?
+              AND intervals.event_id != candidates.event_id
+            ORDER BY candidates.event_id, intervals.starts_at, intervals.event_id
+            """,
+            params,
+        ).fetchall()
+        for row in rows:
+            conflicts[row[0]].append(row[1])
+    return conflicts
@@ -0,0 +1,102 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When many requests ask for the same thing at the same moment (typically right after a
+cached list expired), only the first one runs the query. The others wait for it and
+share its result, or its exception, instead of stampeding the database with identical
+queries.
+
+Sync routes run in FastAPI's threadpool, so calls are coordinated with threading
+primitives. Waiting is bounded by ``SINGLE_FLIGHT_WAIT_SECONDS``: a caller that waits
+longer than that stops waiting and runs the query itself.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.environ.get("SINGLE_FLIGHT_WAIT_SECONDS", "5"))
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight execution that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and hands its outcome to every caller that
+    asked for the same key while it was running.
+    """
+
+    def __init__(self, wait_seconds: float = SINGLE_FLIGHT_WAIT_SECONDS):
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._executions = 0
+        self._coalesced = 0
+        self._timeouts = 0
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        """
+        Return ``function()``, sharing a single execution between concurrent callers that
+        use the same ``key``.
+
+        :param key: identifies identical requests, e.g. the route name and its parameters
+        :type key: Hashable
+        :param function: computes the result; only called by the first caller
+        :type function: Callable[[], T]
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+
+        if is_leader:
+            try:
+                call.result = function()
+                return call.result
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(self.wait_seconds):
+            # the leader is taking too long, don't keep this request hanging on it
+            with self._lock:
+                self._timeouts += 1
+                self._executions += 1
+            return function()
+
+        with self._lock:
+            self._coalesced += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict[str, Any]:
+        """Execution/coalescing counters, for the metrics endpoint."""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "wait_seconds": self.wait_seconds,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "wait_timeouts": self._timeouts,
+            }
+
+
+# shared instance used by the read routes
+single_flight = SingleFlight()
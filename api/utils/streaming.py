@@ -0,0 +1,125 @@
+"""
+Serialization of large results as a stream of chunks, for routes that return them with
+a ``StreamingResponse`` instead of building the whole body in memory.
+
+Items are plain dicts (e.g. shaped event rows) and are written in chunks of
+``STREAM_CHUNK_SIZE`` rows, so memory stays constant whatever the number of rows and
+the first bytes leave before the last row was read.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from fastapi import Request
+
+from db import connect
+
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "500"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSONL_MEDIA_TYPE = "application/jsonl"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+
+
+def chunked(items: Iterable[Any], size: int = STREAM_CHUNK_SIZE) -> Iterator[list]:
+    """Split ``items`` into lists of at most ``size`` items, lazily."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def stream_query(query: str, params: Iterable[Any] = ()) -> Iterator[dict]:
+    """
+    Yield the rows of ``query`` as dicts, reading the cursor ``STREAM_CHUNK_SIZE`` rows
+    at a time.
+
+    Runs on its own connection, opened when iteration starts: a request's connection is
+    closed before a streamed body is sent. The cursor stays open until the client has
+    read the last chunk, writers aren't held up meanwhile because the database is in
+    WAL mode (see ``init_db``).
+    """
+    conn = connect()
+    try:
+        cursor = conn.execute(query, list(params))
+        while chunk := cursor.fetchmany(STREAM_CHUNK_SIZE):
+            for row in chunk:
+                yield dict(row)
+    finally:
+        conn.close()
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether the request's Accept-Encoding allows a gzip encoded response."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, parameters = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return parameters.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00")
+    return False
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Gzip a stream of text chunks on the fly. Every chunk is flushed, so the client can
+    decode everything it received so far, e.g. to find where to resume.
+    """
+    # wbits=31 writes the gzip container instead of a raw zlib stream
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunks(items: Iterable[dict]) -> Iterator[str]:
+    """Serialize ``items`` as newline delimited JSON, one chunk of rows at a time."""
+    for chunk in chunked(items):
+        yield "".join(
+            json.dumps(item, default=_json_default, separators=(",", ":")) + "\n"
+            for item in chunk
+        )
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(items: Iterable[dict], columns: list[str]) -> Iterator[str]:
+    """
+    Serialize ``items`` as CSV with a header row, one chunk of rows at a time. Nested
+    dicts are flattened into ``<key>_<nested key>`` columns, which must be listed in
+    ``columns``.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for chunk in chunked(items):
+        for item in chunk:
+            row = {}
+            for key, value in item.items():
+                if isinstance(value, dict):
+                    for nested_key, nested_value in value.items():
+                        row[f"{key}_{nested_key}"] = _csv_value(nested_value)
+                else:
+                    row[key] = _csv_value(value)
+            writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # only the header when there were no rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
@@ -65,6 +65,20 @@ const EventDetailPage = (props: PageProps) => {
     fetchAll();
   }, [eventId, userId]);
 
+  // Keep the event and its registration count up to date as they change, pushed by
+  // the server instead of refetched
+  useEffect(() => {
+    const source = new EventSource(`/api/events/stream?ids=${eventId}`);
+    source.addEventListener("update", (message: MessageEvent) => {
+      const update: Partial<Event> = JSON.parse(message.data);
+      setEvent((current) => (current ? { ...current, ...update } : current));
+    });
+    source.addEventListener("delete", () => {
+      setError((current) => current ?? "This event has been deleted.");
+    });
+    return () => source.close();
+  }, [eventId]);
+
   const handleRegister = async () => {
     if (!event) return;
     if (typeof userId !== "number") {
@@ -174,6 +188,11 @@ const EventDetailPage = (props: PageProps) => {
 
           <p className="text-muted-foreground text-sm mt-1">{formattedDate}</p>
           <p className="text-muted-foreground text-sm">{event.location}</p>
+          {event.capacity !== null && (
+            <p className="text-muted-foreground text-sm">
+              {event.registration_count} of {event.capacity} spots filled
+            </p>
+          )}
         </CardHeader>
 
         <Separator />
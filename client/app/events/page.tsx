@@ -1,7 +1,7 @@
 "use client";
 
 import { useRoles } from "@/context/RolesContext";
-import { Event } from "@/models/event";
+import { EVENT_CARD_QUERY, EventCard } from "@/models/event";
 import { Filters } from "@/models/filters";
 import { useCallback, useEffect, useState } from "react";
 import EventCarousel from "../../components/EventCarousel";
@@ -10,7 +10,7 @@ import NavBar from "../../components/NavBar";
 import { filtersToQueryParams } from "./filters-to-query-params";
 
 const EventsPage = () => {
-  const [events, setEvents] = useState<Event[]>([]);
+  const [events, setEvents] = useState<EventCard[]>([]);
   const { roles: userRoles } = useRoles();
   const [filters, setFilters] = useState<Filters>({
     scope: "all",
@@ -21,7 +21,9 @@ const EventsPage = () => {
   const fetchEvents = useCallback(() => {
     const queryParams = filtersToQueryParams(filters, userRoles);
     const queryString = queryParams.toString();
-    const eventsUrl = queryString ? `/api/events?${queryString}` : "/api/events";
+    const eventsUrl = queryString
+      ? `/api/events?${queryString}&${EVENT_CARD_QUERY}`
+      : `/api/events?${EVENT_CARD_QUERY}`;
 
     fetch(eventsUrl)
       .then((res) => {
@@ -8,6 +8,7 @@ import { Card, CardHeader, CardTitle } from "@/components/ui/card";
 import { Separator } from "@/components/ui/separator";
 import { Skeleton } from "@/components/ui/skeleton";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
+import { fetchBatch } from "@/lib/batch";
 import { useCurrentUserId } from "@/lib/useCurrentUserId";
 import { Event } from "@/models/event";
 import { getOrganizationCategoryLabel } from "@/models/organizationCategories";
@@ -37,30 +38,27 @@ const IndividualOrganizationPage = (props: PageProps) => {
       setLoading(true);
       setError(null);
       try {
-        const [orgRes, membersRes, eventsRes] = await Promise.all([
-          fetch(`/api/organization/${orgId}`),
-          fetch(`/api/organization/${orgId}/users`),
-          fetch(`/api/events?organization_id=${orgId}`),
+        // one round trip for the organization, its members and its events
+        const [orgRes, membersRes, eventsRes] = await fetchBatch([
+          `/api/organization/${orgId}`,
+          `/api/organization/${orgId}/users`,
+          `/api/events?organization_id=${orgId}`,
         ]);
 
         if (orgRes.status === 404) {
           setError("Organization not found.");
           return;
         }
-        if (!orgRes.ok) {
+        if (orgRes.status !== 200) {
           setError("Failed to load organization.");
           return;
         }
 
-        const [orgData, membersData, eventsData] = await Promise.all([
-          orgRes.json(),
-          membersRes.ok ? membersRes.json() : [],
-          eventsRes.ok ? eventsRes.json() : [],
-        ]);
-
-        setOrg(orgData);
-        setMembers(membersData);
-        setEvents(eventsData);
+        setOrg(orgRes.body as Organization);
+        setMembers(
+          membersRes.status === 200 ? (membersRes.body as RoleAndUser[]) : [],
+        );
+        setEvents(eventsRes.status === 200 ? (eventsRes.body as Event[]) : []);
       } catch {
         setError("An unexpected error occurred.");
       } finally {
@@ -8,22 +8,30 @@ import RecommendedEvents from "@/components/RecommendedEvents";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Separator } from "@/components/ui/separator";
+import { getCatalogView } from "@/lib/catalog";
 import { getServerSession } from "@/lib/session";
-import type { Event } from "@/models/event";
+import { EVENT_CARD_QUERY, type EventCard } from "@/models/event";
 
 async function UpcomingEvents() {
   const today = new Date().toISOString().split("T")[0];
   // API_URL is a server-side env var; falls back to localhost for local development.
   // Set API_URL in production to the internal API base URL (e.g. http://api:8000).
   const apiUrl = process.env.API_URL ?? "http://localhost:8000";
-  let events: Event[] = [];
+  let events: EventCard[] = [];
 
   try {
-    const res = await fetch(`${apiUrl}/api/events?begin_date=${today}&limit=6`, {
-      cache: "no-store",
-    });
-    if (res.ok) {
-      events = await res.json();
+    // the precomputed snapshot, or the live query when the catalog isn't generated
+    const snapshot = await getCatalogView<EventCard[]>("upcoming", `${apiUrl}/api`);
+    if (snapshot) {
+      events = snapshot;
+    } else {
+      const res = await fetch(
+        `${apiUrl}/api/events?begin_date=${today}&limit=6&${EVENT_CARD_QUERY}`,
+        { cache: "no-store" },
+      );
+      if (res.ok) {
+        events = await res.json();
+      }
     }
   } catch {
     // API unavailable — show fallback below
@@ -7,12 +7,12 @@ import {
   CardHeader,
   CardTitle,
 } from "@/components/ui/card";
-import { Event } from "@/models/event";
-import { CalendarDays, MapPin } from "lucide-react";
+import { Event, EventCard } from "@/models/event";
+import { Building2, CalendarDays, MapPin } from "lucide-react";
 import { useState } from "react";
 
 interface EventCarouselProps {
-  events: Event[];
+  events: EventCard[];
   groupByCategory?: boolean;
 }
 
@@ -32,9 +32,9 @@ function EventRow({
   selectedEvent,
   onSelect,
 }: {
-  events: Event[];
-  selectedEvent: Event | null;
-  onSelect: (event: Event) => void;
+  events: EventCard[];
+  selectedEvent: EventCard | null;
+  onSelect: (event: EventCard) => void;
 }) {
   return (
     <div className="flex overflow-x-auto gap-4 pb-2">
@@ -60,6 +60,12 @@ function EventRow({
                 <span className="truncate">{event.location}</span>
               </span>
             )}
+            {event.organization && (
+              <span className="flex items-center gap-1">
+                <Building2 className="h-3.5 w-3.5 shrink-0" />
+                <span className="truncate">{event.organization.name}</span>
+              </span>
+            )}
           </CardContent>
         </Card>
       ))}
@@ -68,7 +74,25 @@ function EventRow({
 }
 
 const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps) => {
-  const [selectedEvent, setSelectedEvent] = useState<Event | null>(null);
+  const [selectedEvent, setSelectedEvent] = useState<EventCard | null>(null);
+  // descriptions of selected events that were listed without one, by event id
+  const [descriptions, setDescriptions] = useState<Record<number, string>>({});
+
+  const selectEvent = (event: EventCard) => {
+    setSelectedEvent(event);
+    if (event.description !== undefined || event.id in descriptions) return;
+    fetch(`/api/events/${event.id}`)
+      .then((res) => (res.ok ? res.json() : null))
+      .then((data: Event | null) => {
+        if (data) {
+          setDescriptions((prev) => ({ ...prev, [event.id]: data.description }));
+        }
+      })
+      .catch((error) => console.error("Error fetching event:", error));
+  };
+  const selectedDescription = selectedEvent
+    ? (selectedEvent.description ?? descriptions[selectedEvent.id])
+    : undefined;
 
   if (events.length === 0) {
     return (
@@ -79,7 +103,7 @@ const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps)
   }
 
   if (groupByCategory) {
-    const categoryMap = new Map<string, Event[]>();
+    const categoryMap = new Map<string, EventCard[]>();
     for (const event of events) {
       const key = event.category ?? "Other";
       const group = categoryMap.get(key) ?? [];
@@ -101,7 +125,7 @@ const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps)
             <EventRow
               events={categoryEvents}
               selectedEvent={selectedEvent}
-              onSelect={setSelectedEvent}
+              onSelect={selectEvent}
             />
           </section>
         ))}
@@ -126,7 +150,9 @@ const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps)
             </CardHeader>
             <CardContent>
               <p className="text-sm text-muted-foreground whitespace-pre-wrap">
-                {selectedEvent.description || "No description provided."}
+                {selectedDescription === undefined
+                  ? "Loading description…"
+                  : selectedDescription || "No description provided."}
               </p>
             </CardContent>
           </Card>
@@ -138,7 +164,7 @@ const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps)
   return (
     <div className="flex flex-col gap-6">
       {/* Scrollable event card list */}
-      <EventRow events={events} selectedEvent={selectedEvent} onSelect={setSelectedEvent} />
+      <EventRow events={events} selectedEvent={selectedEvent} onSelect={selectEvent} />
 
       {/* Featured / selected event detail */}
       {selectedEvent && (
@@ -160,7 +186,9 @@ const EventCarousel = ({ events, groupByCategory = false }: EventCarouselProps)
           </CardHeader>
           <CardContent>
             <p className="text-sm text-muted-foreground whitespace-pre-wrap">
-              {selectedEvent.description || "No description provided."}
+              {selectedDescription === undefined
+                ? "Loading description…"
+                : selectedDescription || "No description provided."}
             </p>
           </CardContent>
         </Card>
@@ -5,7 +5,7 @@ import { useEffect, useState } from "react";
 
 import EventCarousel from "@/components/EventCarousel";
 import { useCurrentUserId } from "@/lib/useCurrentUserId";
-import type { Event } from "@/models/event";
+import { EVENT_CARD_QUERY, type EventCard } from "@/models/event";
 
 /**
  * Client component that fetches and displays personalised event recommendations
@@ -18,8 +18,8 @@ import type { Event } from "@/models/event";
  */
 export default function RecommendedEvents() {
   const userId = useCurrentUserId();
-  // null = not yet fetched; Event[] = fetch complete (may be empty)
-  const [events, setEvents] = useState<Event[] | null>(null);
+  // null = not yet fetched; EventCard[] = fetch complete (may be empty)
+  const [events, setEvents] = useState<EventCard[] | null>(null);
 
   useEffect(() => {
     // Only schedule the async fetch — no synchronous setState calls in this body
@@ -27,9 +27,9 @@ export default function RecommendedEvents() {
 
     let cancelled = false;
 
-    fetch(`/api/events/recommended?user_id=${userId}&limit=10`)
+    fetch(`/api/events/recommended?user_id=${userId}&limit=10&${EVENT_CARD_QUERY}`)
       .then((res) => (res.ok ? res.json() : []))
-      .then((data: Event[]) => {
+      .then((data: EventCard[]) => {
         if (!cancelled) setEvents(data);
       })
       .catch(() => {
@@ -50,7 +50,8 @@ export function AuthProvider({ children }: AuthProviderProps) {
     try {
       const res = await fetch("/api/auth/me", {
         credentials: "include",
-        cache: "no-store",
+        // revalidated with the ETag of the last response, a 304 when unchanged
+        cache: "no-cache",
       });
       if (res.ok) {
         const data = (await res.json()) as AuthUser;
@@ -0,0 +1,29 @@
+const API_BASE = "/api";
+
+export interface BatchResponse<T = unknown> {
+  status: number;
+  /** The decoded JSON body of the response, null when it was empty */
+  body: T;
+}
+
+/**
+ * Runs several GET requests against the API in a single round trip.
+ *
+ * @param paths - API paths with their query strings, e.g. "/api/events?limit=5".
+ * @returns The response to each path, in the same order.
+ */
+export async function fetchBatch(paths: string[]): Promise<BatchResponse[]> {
+  const res = await fetch(`${API_BASE}/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    credentials: "include",
+    body: JSON.stringify({ requests: paths.map((path) => ({ path })) }),
+  });
+
+  if (!res.ok) {
+    throw new Error("Failed to fetch batch.");
+  }
+
+  const data: { responses: BatchResponse[] } = await res.json();
+  return data.responses;
+}
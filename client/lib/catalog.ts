@@ -0,0 +1,38 @@
+const API_BASE = "/api";
+
+interface CatalogManifest {
+  generated_at: string;
+  views: Record<string, string>;
+}
+
+/**
+ * Fetches a view of the public catalog snapshots, e.g. "upcoming" or
+ * "events/category/Animal Welfare". The manifest is revalidated every minute and
+ * the files it points to never change, so both are served from the HTTP cache.
+ *
+ * @param view - The name of the view in the catalog manifest.
+ * @param apiBase - The API base URL, absolute when called from the server.
+ * @returns The view's content, or null if the catalog doesn't have it.
+ */
+export async function getCatalogView<T>(
+  view: string,
+  apiBase = API_BASE,
+): Promise<T | null> {
+  const manifestRes = await fetch(`${apiBase}/catalog`, {
+    next: { revalidate: 60 },
+  });
+  if (!manifestRes.ok) {
+    return null;
+  }
+  const manifest = (await manifestRes.json()) as CatalogManifest;
+  const file = manifest.views[view];
+  if (!file) {
+    return null;
+  }
+
+  const res = await fetch(`${apiBase}/catalog/${file}`, { cache: "force-cache" });
+  if (!res.ok) {
+    return null;
+  }
+  return res.json() as Promise<T>;
+}
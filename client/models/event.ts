@@ -1,4 +1,5 @@
 import { EventCategory } from "./eventCategories";
+import { OrganizationCategoryValue } from "./organizationCategories";
 
 export const TIME_OF_DAY_RANGES = {
   Mornings: { start: 6, end: 11 }, // 06:00 - 11:59
@@ -74,12 +75,42 @@ export interface Event {
   organization_id: number;
 
   category: EventCategory | null;
+  /** Maximum number of volunteers, null when the event is unlimited */
+  capacity: number | null;
+  /** How long the event lasts, used to detect schedule conflicts */
+  duration_minutes: number;
+  /** Number of volunteers registered for the event */
+  registration_count: number;
+  /** The recurring event this is an occurrence of, null for one-off events */
+  series_id: number | null;
   // TODO: the following fields are not yet supported on the back-end
   time_zone: string;
-  signup_count: number;
   user_signed_up: boolean;
 }
 
+/** The organization of an event, included with `expand=organization` */
+export interface EventOrganizationSummary {
+  organization_id: number;
+  name: string;
+  category: OrganizationCategoryValue;
+}
+
+/**
+ * Query parameters for event lists rendered as cards: only the fields the cards show,
+ * plus the organization name. The description is loaded when an event is selected.
+ */
+export const EVENT_CARD_QUERY =
+  "fields=id,name,date_time,location,category&expand=organization";
+
+/** An event as returned with EVENT_CARD_QUERY, or a full Event */
+export type EventCard = Pick<
+  Event,
+  "id" | "name" | "date_time" | "location" | "category"
+> & {
+  description?: string;
+  organization?: EventOrganizationSummary | null;
+};
+
 export interface EventIn {
   name: string;
   description: string;
@@ -88,6 +119,8 @@ export interface EventIn {
   date_time: string;
   organization_id: number;
   category?: EventCategory | null;
+  capacity?: number | null;
+  duration_minutes?: number;
 }
 
 export type EventUpdate = Partial<EventIn>;
@@ -6,6 +6,10 @@ export interface Organization {
   description: string | null;
   category: OrganizationCategoryValue;
   created_by_user_id: number;
+  admin_count: number;
+  volunteer_count: number;
+  /** Number of the organization's events from today onwards */
+  upcoming_event_count: number;
 }
 
 export type { RoleAndUser } from "@/models/roles";